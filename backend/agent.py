@@ -2,29 +2,35 @@
 LangChain Agent for Cricket Chatbot - Using Google Gemini
 """
 
-from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.agents import create_tool_calling_agent
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.memory import ConversationBufferMemory
-from cricket_tools import ALL_TOOLS
+from langchain_core.callbacks import BaseCallbackHandler
+from cricket_tools import get_compact_tools, get_db, get_player_index, get_queries, get_stats_engine, get_tools, tool_cache
+from llm_resilience import LLMUnavailable, resilient
+from metrics import CACHE_LOOKUPS, ERRORS, LLM_TOKENS, ROUTES, TOOL_CALLS, record_span, span
+from parallel_executor import ParallelAgentExecutor
+from response_cache import ResponseCache
+from router import PRONOUNS, IntentRouter, RoutePlan
+from session_memory import SessionStore, estimate_tokens
+from worker_pool import PoolSaturated
+import asyncio
+import contextvars
+import json
+import logging
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
-class CricketAgent:
-    def __init__(self):
-        # Initialize Gemini LLM
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",  # Fast and efficient (or use gemini-2.5-flash for better results)
-            temperature=0,
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            convert_system_message_to_human=True  # Fix for system messages
-        )
-        
-        # Create prompt
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert cricket statistics analyst. 
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = """You are an expert cricket statistics analyst. 
             You have access to detailed cricket data including batting and bowling performances.
             
             Use the available tools to answer questions accurately:
@@ -34,9 +40,159 @@ class CricketAgent:
             - get_top_performers: For rankings
             - get_match_summary: For match overviews
             - analyze_recent_form: For form analysis
+            - get_phase_stats: For powerplay, middle-overs and death-overs performance
+            - get_matchup: For a batter's record against a specific bowler
             
             Always provide specific numbers from the database.
-            If you don't have data, clearly state that."""),
+            If you don't have data, clearly state that.
+            
+            {session_context}"""
+
+# Tools describe themselves; results arrive as key=value lines the answer should turn into prose
+COMPACT_SYSTEM_PROMPT = """Cricket stats analyst. Answer only from tool results (key=value), quoting the numbers \
+in readable sentences or bullets. Say so if there is no data.
+{session_context}"""
+
+class TokenCounter(BaseCallbackHandler):
+    """Counts one request's LLM input and output tokens
+    
+    Uses the provider's usage metadata when a response carries it and
+    otherwise estimates from the messages, bound tool schemas and reply.
+    """
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.calls = 0
+        self._prompts: Dict[str, int] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        tools = (kwargs.get("invocation_params") or {}).get("tools") or []
+        text = "".join(str(message.content) for batch in messages for message in batch)
+        self._prompts[str(run_id)] = estimate_tokens(text + json.dumps(tools, default=str))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        estimate = self._prompts.pop(str(run_id), 0)
+        usage = None
+        output = ""
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or usage
+                output += generation.text + json.dumps(getattr(message, "tool_calls", None) or [], default=str)
+        self.calls += 1
+        self.input_tokens += usage["input_tokens"] if usage else estimate
+        self.output_tokens += usage["output_tokens"] if usage else estimate_tokens(output)
+
+class TokenStats:
+    """Running LLM token totals across requests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def record(self, counter: TokenCounter):
+        if not counter.calls:
+            return
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += counter.input_tokens
+            self.output_tokens += counter.output_tokens
+        LLM_TOKENS.inc(counter.input_tokens, direction="input")
+        LLM_TOKENS.inc(counter.output_tokens, direction="output")
+        logger.info(f"LLM tokens: {counter.input_tokens} in, {counter.output_tokens} out over {counter.calls} calls")
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'input_tokens': self.input_tokens,
+                'output_tokens': self.output_tokens,
+                'avg_input_tokens': self.input_tokens / self.requests if self.requests else 0.0,
+                'avg_output_tokens': self.output_tokens / self.requests if self.requests else 0.0,
+            }
+
+class TracingCallback(BaseCallbackHandler):
+    """Records LLM and tool runs of an agent invocation as spans"""
+
+    def __init__(self):
+        self._runs: Dict[str, Tuple[str, float, Dict]] = {}
+
+    def _start(self, run_id, kind: str, **attrs):
+        self._runs[str(run_id)] = (kind, time.perf_counter(), attrs)
+
+    def _end(self, run_id, error: bool = False):
+        run = self._runs.pop(str(run_id), None)
+        if run is None:
+            return
+        kind, started, attrs = run
+        record_span(kind, started, time.perf_counter() - started, **attrs)
+        if kind == 'tool':
+            TOOL_CALLS.inc(tool=attrs['tool'], status='error' if error else 'ok')
+        elif error:
+            ERRORS.inc(source='llm')
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, 'llm')
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, 'llm')
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, 'tool', tool=(serialized or {}).get('name') or kwargs.get('name', 'unknown'))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+def _default_llm():
+    """Gemini, or the offline scripted model when CRICKET_LLM=scripted"""
+    if os.getenv("CRICKET_LLM") == "scripted":
+        from fake_llm import ScriptedChatModel
+        return ScriptedChatModel(
+            player_names=[row[0] for row in get_db().fetch_all("SELECT full_name FROM players")],
+            latency=float(os.getenv("SCRIPTED_LLM_LATENCY", "0")),
+            slow_rate=float(os.getenv("SCRIPTED_LLM_SLOW_RATE", "0")),
+            slow_latency=float(os.getenv("SCRIPTED_LLM_SLOW_LATENCY", "0")),
+            error_rate=float(os.getenv("SCRIPTED_LLM_ERROR_RATE", "0"))
+        )
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash",  # Fast and efficient (or use gemini-2.5-flash for better results)
+        temperature=0,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        convert_system_message_to_human=True  # Fix for system messages
+    )
+
+class CricketAgent:
+    def __init__(self, llm=None):
+        self.db = get_db()
+        # Compact mode sends minimal tool schemas, a short prompt and key=value tool results
+        self.compact = os.getenv("AGENT_COMPACT") == "1"
+        self.tools = get_compact_tools() if self.compact else get_tools()
+        self.token_stats = TokenStats()
+        # Load the columnar stats engine (if enabled) now rather than on the first leaderboard question
+        get_stats_engine()
+        
+        # Initialize Gemini LLM unless a chat model is supplied
+        self.llm = llm if llm is not None else _default_llm()
+        # Deadlines, retries, hedging and a circuit breaker around every LLM call
+        if os.getenv("LLM_RESILIENCE", "1") != "0":
+            self.llm = resilient(self.llm)
+        
+        # Create prompt
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", COMPACT_SYSTEM_PROMPT if self.compact else SYSTEM_PROMPT),
+            MessagesPlaceholder(variable_name="chat_history", optional=True),
             ("human", "{input}"),
             MessagesPlaceholder(variable_name="agent_scratchpad"),
         ])
@@ -44,47 +200,426 @@ class CricketAgent:
         # Create agent (using tool calling for Gemini)
         self.agent = create_tool_calling_agent(
             llm=self.llm,
-            tools=ALL_TOOLS,
+            tools=self.tools,
             prompt=self.prompt
         )
         
-        # Create executor
-        self.agent_executor = AgentExecutor(
+        # Create executor; tool calls from the same turn run concurrently
+        max_time = os.getenv("AGENT_MAX_EXECUTION_TIME")
+        self.agent_executor = ParallelAgentExecutor(
             agent=self.agent,
-            tools=ALL_TOOLS,
-            verbose=True,
-            return_intermediate_steps=True
+            tools=self.tools,
+            verbose=os.getenv("AGENT_VERBOSE") == "1",
+            return_intermediate_steps=True,
+            max_iterations=int(os.getenv("AGENT_MAX_ITERATIONS", "5")),
+            max_execution_time=float(max_time) if max_time else None,
+            max_parallel_tools=int(os.getenv("AGENT_TOOL_WORKERS", "4"))
+        )
+        
+        # Per-session window and summary, so follow-ups like "and his bowling?" keep their context
+        self.sessions = SessionStore(
+            max_sessions=int(os.getenv("SESSION_MAX", "10000")),
+            ttl=float(os.getenv("SESSION_TTL", "1800")),
+            window=int(os.getenv("SESSION_WINDOW", "4")),
+            token_budget=int(os.getenv("SESSION_TOKEN_BUDGET", "800"))
         )
         
-        # Memory
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
+        # Fast path for questions that map onto a single tool call
+        # The router answers users directly, so it keeps the human-readable tools. It also
+        # answers from the tools alone while the LLM is unavailable, even with the fast path off
+        self.fallback = IntentRouter({tool.name: tool.func for tool in get_tools()}, get_player_index())
+        self.router = self.fallback if os.getenv("ROUTER_ENABLED", "1") != "0" else None
+        
+        # Answers keyed on the normalized question and the data version
+        similarity = os.getenv("RESPONSE_CACHE_SIMILARITY")
+        cache_path = os.getenv("RESPONSE_CACHE_PATH")
+        if cache_path is None and self.db.db_path != ":memory:":
+            # Beside the database rather than wherever the server happened to be started
+            cache_path = os.path.join(os.path.dirname(os.path.abspath(self.db.db_path)), "response_cache.db")
+        self.cache = ResponseCache(
+            get_player_index(),
+            max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1000")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+            path=cache_path or None,
+            similarity_threshold=float(similarity) if similarity else None
         )
     
-    def ask(self, question: str) -> dict:
-        """Process a question and return answer"""
+    def ask(self, question: str, session_id: Optional[str] = None) -> dict:
+        """Process a question and return answer, remembering the turn under `session_id`"""
+        # Follow-ups that lean on the conversation ("his bowling") are not shared through the cache
+        contextual = self._contextual(question, session_id)
+        version = self.db.data_version
+        if not contextual:
+            with span("cache"):
+                cached = self.cache.get(question, version)
+            CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                self._remember(session_id, question, cached)
+                return cached
+        
+        result = self._answer(question, session_id)
+        if result["success"] and not contextual and not result.get("degraded"):
+            self.cache.put(question, version, result)
+        return result
+    
+    def _contextual(self, question: str, session_id: Optional[str]) -> bool:
+        return bool(PRONOUNS.search(question.lower())) and self.sessions.current_player(session_id) is not None
+    
+    def _remember(self, session_id: Optional[str], question: str, result: dict, player_args: Iterable[str] = ()):
+        """Record a turn and the players named in the question or passed to tools"""
+        if not session_id:
+            return
+        index = get_player_index()
+        players = _question_players(question)
+        for arg in player_args:
+            player_id = index.resolve(arg) if isinstance(arg, str) else None
+            if player_id is not None:
+                players.append(player_id)
+        self.sessions.record(session_id, question, result, [(pid, index.name(pid)) for pid in players])
+    
+    def ask_many(self, questions: Iterable[str], max_concurrency: int = 4, executor=None) -> Iterator[dict]:
+        """Answer a batch of questions, yielding results in input order
+        
+        Questions with the same cache key are answered once, and questions
+        the router maps to the same tool call share one execution. At most
+        `max_concurrency` cache misses run at a time, on `executor` (such as
+        the server's BoundedWorkerPool) or on threads of the batch's own;
+        each result is yielded as soon as it and every earlier one are
+        ready. If the executor is full, jobs wait for one of the batch's
+        running jobs to finish, or run on the calling thread if none is.
+        """
+        questions = list(questions)
+        version = self.db.data_version
+        keys = [self.cache.normalize(question) for question in questions]
+        answers: Dict[str, Future] = {}
+        plans: Dict[Tuple, list] = {}
+        agent_questions = []
+        for question, key in zip(questions, keys):
+            if key in answers:
+                continue
+            answers[key] = Future()
+            with span("cache"):
+                cached = self.cache.get(question, version)
+            CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                answers[key].set_result(cached)
+                continue
+            plan = self._plan_route(question) if self.router is not None else None
+            if plan is not None:
+                plans.setdefault(plan, []).append((key, question))
+            else:
+                agent_questions.append((key, question))
+        
+        # Routed groups are cheap SQL, so they are queued ahead of LLM calls
+        pending = deque(list(plans.items()) + [(None, [item]) for item in agent_questions])
+        running: Dict[Future, list] = {}
+        limit = max(1, max_concurrency)
+        owned = executor is None
+        if owned:
+            executor = ThreadPoolExecutor(max_workers=limit, thread_name_prefix="batch-worker")
         try:
-            response = self.agent_executor.invoke({
-                "input": question
-            })
+            for key in keys:
+                while not answers[key].done():
+                    while pending and len(running) < limit:
+                        plan, group = pending[0]
+                        try:
+                            running[self._submit(executor, version, plan, group)] = group
+                        except PoolSaturated:
+                            break
+                        pending.popleft()
+                    if running:
+                        for job in wait(running, return_when=FIRST_COMPLETED).done:
+                            self._settle(answers, running.pop(job), job)
+                    else:
+                        # Nothing of ours is running and the pool is full; use the caller's slot
+                        plan, group = pending.popleft()
+                        job = Future()
+                        try:
+                            job.set_result(self._answer_group(version, plan, group))
+                        except Exception as e:
+                            job.set_exception(e)
+                        self._settle(answers, group, job)
+                yield dict(answers[key].result())
+        finally:
+            for job in running:
+                job.cancel()
+            if owned:
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _submit(self, executor, version: int, plan, group) -> Future:
+        # Carry the caller's context (request trace) into the worker thread
+        return executor.submit(contextvars.copy_context().run, self._answer_group, version, plan, group)
+    
+    @staticmethod
+    def _settle(answers: Dict[str, Future], group, done: Future):
+        for key, _ in group:
+            if done.cancelled():
+                answers[key].cancel()
+            elif done.exception() is not None:
+                answers[key].set_exception(done.exception())
+            else:
+                answers[key].set_result(done.result())
+    
+    def _answer_group(self, version: int, plan, group) -> dict:
+        """Answer questions sharing one router plan (or one agent question) and cache the result"""
+        start = time.perf_counter()
+        result = None
+        if plan is not None:
+            try:
+                with span("router"):
+                    answer = self.router.execute(plan)
+                result = {"answer": answer, "tools_used": [plan.tool], "success": True}
+                ROUTES.inc(len(group), path="router")
+                self.router.stats.record("router", time.perf_counter() - start)
+            except Exception:
+                ERRORS.inc(source="router")
+        if result is None:
+            ROUTES.inc(path="agent")
+            result = self._ask_agent(group[0][1])
+            if self.router is not None:
+                self.router.stats.record("agent", time.perf_counter() - start)
+        if result["success"] and not result.get("degraded"):
+            for _, question in group:
+                self.cache.put(question, version, result)
+        return result
+    
+    def _answer(self, question: str, session_id: Optional[str] = None) -> dict:
+        """Answer through the fast-path router, falling back to the agent"""
+        start = time.perf_counter()
+        if self.router is not None:
+            plan = routed = None
+            try:
+                with span("router"):
+                    plan = self.router.plan(question, self.sessions.current_player(session_id))
+                    if plan is not None:
+                        routed = {"answer": self.router.execute(plan), "tools_used": [plan.tool], "success": True}
+            except Exception:
+                ERRORS.inc(source="router")
+            if routed is not None:
+                ROUTES.inc(path="router")
+                self.router.stats.record("router", time.perf_counter() - start)
+                self._remember(session_id, question, routed, _player_args(plan.tool, plan.args))
+                return routed
+        
+        ROUTES.inc(path="agent")
+        result = self._ask_agent(question, session_id)
+        if self.router is not None:
+            self.router.stats.record("agent", time.perf_counter() - start)
+        return result
+    
+    async def astream(self, question: str, session_id: Optional[str] = None) -> AsyncIterator[dict]:
+        """Answer a question as a stream of events
+        
+        Yields `tool_start`, `tool_end` and `token` events as the agent
+        works, then a final `done` event carrying the same fields as ask().
+        """
+        contextual = self._contextual(question, session_id)
+        version = self.db.data_version
+        cached = None if contextual else await asyncio.to_thread(self.cache.get, question, version)
+        if not contextual:
+            CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+        if cached is not None:
+            await asyncio.to_thread(self._remember, session_id, question, cached)
+            yield {"event": "token", "text": cached["answer"]}
+            yield {"event": "done", **cached}
+            return
+        
+        start = time.perf_counter()
+        if self.router is not None:
+            plan = await asyncio.to_thread(self._plan_route, question, self.sessions.current_player(session_id))
+            answer = None
+            if plan is not None:
+                yield {"event": "tool_start", "tool": plan.tool, "input": list(plan.args)}
+                try:
+                    answer = await asyncio.to_thread(self.router.execute, plan)
+                except Exception:
+                    # Fall back to the agent, as ask() does
+                    ERRORS.inc(source="router")
+                yield {"event": "tool_end", "tool": plan.tool}
+            if answer is not None:
+                ROUTES.inc(path="router")
+                yield {"event": "token", "text": answer}
+                result = {"answer": answer, "tools_used": [plan.tool], "success": True}
+                self.router.stats.record("router", time.perf_counter() - start)
+                if not contextual:
+                    await asyncio.to_thread(self.cache.put, question, version, result)
+                await asyncio.to_thread(self._remember, session_id, question, result,
+                                        _player_args(plan.tool, plan.args))
+                yield {"event": "done", **result}
+                return
+        
+        ROUTES.inc(path="agent")
+        tools_used = []
+        player_args = []
+        tokens = []
+        answer = None
+        counter = TokenCounter()
+        try:
+            async for event in self.agent_executor.astream_events(
+                self._agent_input(question, session_id), {"callbacks": [TracingCallback(), counter]}, version="v2"
+            ):
+                kind = event["event"]
+                if kind == "on_tool_start":
+                    tools_used.append(event["name"])
+                    player_args.extend(_player_args(event["name"], event["data"].get("input")))
+                    yield {"event": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+                elif kind == "on_tool_end":
+                    yield {"event": "tool_end", "tool": event["name"], "output": str(event["data"].get("output"))}
+                elif kind == "on_chat_model_stream":
+                    text = _chunk_text(event["data"]["chunk"].content)
+                    if text:
+                        tokens.append(text)
+                        yield {"event": "token", "text": text}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # The executor's own run: its output is the final answer, without earlier turns' text
+                    answer = event["data"]["output"]["output"]
+            
+            result = {"answer": answer if answer is not None else "".join(tokens),
+                      "tools_used": tools_used, "success": True}
+            if not contextual:
+                await asyncio.to_thread(self.cache.put, question, version, result)
+        except LLMUnavailable as e:
+            result = await asyncio.to_thread(self._degraded, question, session_id, e)
+            yield {"event": "token", "text": ("\n\n" if tokens else "") + result["answer"]}
+        except Exception as e:
+            ERRORS.inc(source="agent")
+            result = {"answer": f"Error: {str(e)}", "tools_used": tools_used, "success": False}
+        
+        self.token_stats.record(counter)
+        if self.router is not None:
+            self.router.stats.record("agent", time.perf_counter() - start)
+        await asyncio.to_thread(self._remember, session_id, question, result, player_args)
+        yield {"event": "done", **result}
+    
+    def _plan_route(self, question: str, default_player: Optional[str] = None):
+        try:
+            return self.router.plan(question, default_player)
+        except Exception:
+            ERRORS.inc(source="router")
+            return None
+    
+    def stats(self) -> dict:
+        """Response cache, tool cache, routing and per-statement SQL statistics"""
+        return {
+            "cache": self.cache.stats(),
+            "tools": tool_cache.stats(),
+            "router": self.router.stats.summary() if self.router else None,
+            "sessions": self.sessions.stats(),
+            "tokens": self.token_stats.summary(),
+            "llm": self.llm.stats() if hasattr(self.llm, "stats") else None,
+            "queries": get_queries().stats()
+        }
+    
+    def _agent_input(self, question: str, session_id: Optional[str] = None) -> dict:
+        """Executor input with the session summary and the recent turns that fit its token budget"""
+        summary, history = self.sessions.context(session_id)
+        return {
+            "input": question,
+            "chat_history": history,
+            "session_context": f"Conversation so far:\n{summary}" if summary else ""
+        }
+    
+    def _ask_agent(self, question: str, session_id: Optional[str] = None) -> dict:
+        """Answer a question through the LLM agent"""
+        counter = TokenCounter()
+        try:
+            response = self.agent_executor.invoke(
+                self._agent_input(question, session_id), {"callbacks": [TracingCallback(), counter]}
+            )
             
             # Extract tool usage info
-            tools_used = []
-            if "intermediate_steps" in response:
-                for step in response["intermediate_steps"]:
-                    if len(step) >= 2:
-                        action = step[0]
-                        tools_used.append(action.tool)
+            with span("format"):
+                tools_used = []
+                player_args = []
+                if "intermediate_steps" in response:
+                    for step in response["intermediate_steps"]:
+                        if len(step) >= 2:
+                            action = step[0]
+                            tools_used.append(action.tool)
+                            player_args.extend(_player_args(action.tool, action.tool_input))
             
-            return {
+            result = {
                 "answer": response["output"],
                 "tools_used": tools_used,
                 "success": True
             }
+            self._remember(session_id, question, result, player_args)
+            return result
+        except LLMUnavailable as e:
+            result = self._degraded(question, session_id, e)
+            self._remember(session_id, question, result)
+            return result
         except Exception as e:
+            ERRORS.inc(source="agent")
             return {
                 "answer": f"Error: {str(e)}",
                 "tools_used": [],
                 "success": False
             }
+        finally:
+            self.token_stats.record(counter)
+    
+    def _degraded(self, question: str, session_id: Optional[str], error: Exception) -> dict:
+        """Answer from the tools alone while the LLM is unavailable; never cached"""
+        logger.warning(f"LLM unavailable, answering from tools: {error}")
+        ROUTES.inc(path="degraded")
+        plan = None
+        try:
+            plan = self.fallback.plan(question, self.sessions.current_player(session_id))
+        except Exception:
+            ERRORS.inc(source="router")
+        if plan is not None:
+            plans = [plan]
+        else:
+            # Otherwise the stats of up to two players named in the question
+            index = get_player_index()
+            plans = [RoutePlan(tool, (index.name(player_id),))
+                     for player_id in _question_players(question)[:2]
+                     for tool in ('get_player_batting_stats', 'get_player_bowling_stats')]
+        answers = []
+        tools_used = []
+        for plan in plans:
+            try:
+                answers.append(self.fallback.execute(plan))
+                tools_used.append(plan.tool)
+            except Exception:
+                ERRORS.inc(source="router")
+        if not answers:
+            return {"answer": DEGRADED_MESSAGE, "tools_used": [], "success": False, "degraded": True}
+        return {"answer": "\n\n".join(answers), "tools_used": tools_used, "success": True, "degraded": True}
+
+DEGRADED_MESSAGE = ("The language model is unavailable right now, so only direct statistics questions can be "
+                    "answered: a player's batting, bowling or recent form, comparisons, matchups and the "
+                    "top batsmen or bowlers.")
+
+def _question_players(question: str) -> List[int]:
+    """Ids of the players named in a question"""
+    return [int(token[len("player:"):]) for token in get_player_index().canonicalize(question).split()
+            if token.startswith("player:")]
+
+# Tool arguments that name players, as keyword names or leading positional arguments
+PLAYER_ARGS = {
+    'get_player_batting_stats': ('player_name',),
+    'get_player_bowling_stats': ('player_name',),
+    'analyze_recent_form': ('player_name',),
+    'get_phase_stats': ('player_name',),
+    'compare_players': ('player1', 'player2'),
+    'get_matchup': ('batter', 'bowler'),
+}
+
+def _player_args(tool: str, tool_input) -> List[str]:
+    """Player names passed to a tool call given as a dict, a positional tuple or a bare string"""
+    fields = PLAYER_ARGS.get(tool, ())
+    if not fields or not tool_input:
+        return []
+    if isinstance(tool_input, dict):
+        return [tool_input[field] for field in fields if field in tool_input]
+    if isinstance(tool_input, (tuple, list)):
+        return list(tool_input[:len(fields)])
+    return [tool_input]
+
+def _chunk_text(content) -> str:
+    """Text of a streamed model chunk, which may be a string or a list of parts"""
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
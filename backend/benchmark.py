@@ -0,0 +1,648 @@
+"""
+Benchmarks for the cricket chatbot backend
+Run from the backend directory: python benchmark.py <scenario> [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import CricketDatabase
+from latency import LatencyStats
+from player_index import PlayerIndex
+from synthetic_data import FIRST_NAMES, LAST_NAMES, player_name, write_matches
+
+def build_synthetic_db(db_path: str, innings: int, players: int = 2000, seed: int = 7) -> CricketDatabase:
+    """Create a database with `innings` batting and bowling rows spread over `players` players"""
+    rng = random.Random(seed)
+    db = CricketDatabase(db_path)
+    names = {}
+    for player_id in range(1, players + 1):
+        first = rng.choice(FIRST_NAMES)
+        last = f"{rng.choice(LAST_NAMES)}{player_id}"
+        names[player_id] = (first, last, f"{first} {last}")
+
+    cursor = db.conn.cursor()
+    cursor.executemany(
+        "INSERT OR IGNORE INTO players (player_id, first_name, last_name, full_name) VALUES (?, ?, ?, ?)",
+        [(pid, *names[pid]) for pid in names]
+    )
+    batting = []
+    bowling = []
+    for i in range(innings):
+        pid = rng.randint(1, players)
+        runs, balls = rng.randint(0, 120), rng.randint(1, 80)
+        batting.append((str(i // 22), pid, names[pid][2], runs, balls, runs // 8, runs // 20,
+                        runs * 100 / balls, rng.randint(0, 1), 'b'))
+        pid = rng.randint(1, players)
+        bowling.append((str(i // 22), pid, names[pid][2], '4.0', 24, rng.randint(10, 50),
+                        rng.randint(0, 5), 0, rng.randint(4, 14), 0, 0, rng.uniform(4, 12)))
+    cursor.executemany('''
+    INSERT INTO batting_performances
+    (match_id, player_id, player_name, runs_scored, balls_faced, fours, sixes, strike_rate, is_out, how_out)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', batting)
+    cursor.executemany('''
+    INSERT INTO bowling_performances
+    (match_id, player_id, player_name, overs, balls, runs_conceded, wickets,
+     maidens, dot_balls, wides, no_balls, economy)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', bowling)
+    db.conn.commit()
+    db.rebuild_summaries()
+    return db
+
+def time_call(fn, repeat: int) -> float:
+    """Median wall time of `fn()` in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def bench_names(sizes, repeat: int = 20):
+    """Per-query latency of LIKE '%name%' scans vs resolved player_id lookups"""
+    like_query = '''
+    SELECT player_name, COUNT(*), SUM(runs_scored), AVG(runs_scored), MAX(runs_scored)
+    FROM batting_performances
+    WHERE LOWER(player_name) LIKE LOWER(?)
+    GROUP BY player_name
+    '''
+    id_query = '''
+    SELECT player_name, COUNT(*), SUM(runs_scored), AVG(runs_scored), MAX(runs_scored)
+    FROM batting_performances
+    WHERE player_id = ?
+    GROUP BY player_id
+    '''
+    results = []
+    print(f"{'innings':>10} {'LIKE scan (ms)':>16} {'resolve (ms)':>14} {'player_id (ms)':>16}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = build_synthetic_db(os.path.join(tmp, "bench.db"), size)
+            index = PlayerIndex(db)
+            index.refresh()
+            name = index.name(42)
+            player_id = index.resolve(name)
+            conn = db.conn
+
+            like_ms = time_call(lambda: conn.execute(like_query, (f"%{name}%",)).fetchall(), repeat)
+            resolve_ms = time_call(lambda: index.resolve(name), repeat)
+            id_ms = time_call(lambda: conn.execute(id_query, (player_id,)).fetchall(), repeat)
+            print(f"{size:>10} {like_ms:>16.3f} {resolve_ms:>14.3f} {id_ms:>16.3f}")
+            results.append({'innings': size, 'like_ms': like_ms, 'resolve_ms': resolve_ms, 'player_id_ms': id_ms})
+            conn.close()
+    return results
+
+def bench_rows(innings: int = 50000, repeat: int = 200):
+    """Per-call overhead of DataFrame results vs the sqlite3.Row API on tool-sized queries"""
+    queries = {
+        'player lookup': ("SELECT * FROM player_batting_summary WHERE player_id = ?", (42,)),
+        'top 5': ("SELECT player_name, total_runs, innings FROM player_batting_summary "
+                  "WHERE innings >= 2 ORDER BY total_runs DESC LIMIT 5", ()),
+    }
+    import_ms = time_call(lambda: subprocess.run([sys.executable, "-c", "import pandas"], check=True), 3)
+    base_ms = time_call(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), 3)
+    print(f"pandas import: {import_ms - base_ms:.1f} ms")
+    results = {'pandas_import_ms': import_ms - base_ms, 'queries': {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = build_synthetic_db(os.path.join(tmp, "bench.db"), innings)
+        db.execute_query("SELECT 1")  # import pandas outside the timed loop
+        print(f"{'query':>14} {'DataFrame (us)':>16} {'rows (us)':>11} {'speedup':>8}")
+        for name, (query, params) in queries.items():
+            frame_ms = time_call(lambda: db.execute_query(query, params), repeat)
+            rows_ms = time_call(lambda: db.fetch_all(query, params), repeat)
+            print(f"{name:>14} {frame_ms * 1000:>16.1f} {rows_ms * 1000:>11.1f} {frame_ms / rows_ms:>7.1f}x")
+            results['queries'][name] = {'dataframe_us': frame_ms * 1000, 'rows_us': rows_ms * 1000}
+        db.close()
+    return results
+
+def bench_load(url: str, questions, concurrency_levels, duration: float = 10.0, quiet: bool = False):
+    """Closed-loop load test against a running server: throughput and latency per concurrency level"""
+    import requests
+
+    results = []
+    if not quiet:
+        print(f"{'clients':>8} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'503s':>6} {'errors':>7}")
+    for clients in concurrency_levels:
+        latency = LatencyStats()
+        counts = {'ok': 0, 'busy': 0, 'error': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def client(worker: int):
+            session = requests.Session()
+            i = worker
+            while time.perf_counter() < deadline:
+                question = questions[i % len(questions)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    response = session.post(f"{url}/chat", json={"question": question}, timeout=60)
+                    outcome = 'ok' if response.status_code == 200 else 'busy' if response.status_code == 503 else 'error'
+                except requests.RequestException:
+                    outcome = 'error'
+                if outcome == 'ok':
+                    latency.record(time.perf_counter() - start)
+                with lock:
+                    counts[outcome] += 1
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        summary = latency.summary()
+        if not quiet:
+            print(f"{clients:>8} {counts['ok'] / duration:>10.1f} {summary['p50_ms']:>10.1f} "
+                  f"{summary['p99_ms']:>10.1f} {counts['busy']:>6} {counts['error']:>7}")
+        results.append({'clients': clients, 'requests_per_sec': counts['ok'] / duration, **summary,
+                        'rejected': counts['busy'], 'errors': counts['error']})
+    return results
+
+def ingest_synthetic(tmp: str, innings: int, fmt: str = "jsonl", batch_size: int = 5000,
+                     ball_by_ball: bool = False):
+    """Generate `innings` synthetic innings into `tmp` and stream them into cricket_stats.db there"""
+    data_path = os.path.join(tmp, f"synthetic.{'json' if fmt == 'array' else 'jsonl'}")
+    start = time.perf_counter()
+    matches = write_matches(data_path, innings, fmt, ball_by_ball=ball_by_ball)
+    generate_s = time.perf_counter() - start
+    db = CricketDatabase(os.path.join(tmp, "cricket_stats.db"))
+    stats = db.load_json_stream(data_path, batch_size=batch_size)
+    stats.update(generate_seconds=generate_s, file_mb=os.path.getsize(data_path) / 1e6, innings=innings)
+    os.remove(data_path)
+    return db, stats, matches
+
+def bench_ingest(sizes, fmt: str = "jsonl", batch_size: int = 5000, ball_by_ball: bool = False):
+    """Rows per second for streaming synthetic JSON into a fresh database"""
+    results = []
+    print(f"{'innings':>10} {'matches':>9} {'file (MB)':>10} {'rows':>10} {'load (s)':>9} {'rows/s':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db, stats, matches = ingest_synthetic(tmp, size, fmt, batch_size, ball_by_ball)
+            db.close()
+        print(f"{size:>10} {matches:>9} {stats['file_mb']:>10.1f} {stats['rows']:>10} "
+              f"{stats['seconds']:>9.2f} {stats['rows_per_sec']:>10.0f}")
+        results.append(stats)
+    return results
+
+def bench_tools(innings: int, repeat: int = 200, use_tool_cache: bool = False):
+    """Per-tool latency percentiles on a synthetic database"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db, _, _ = ingest_synthetic(tmp, innings)
+        db.close()
+        # cricket_tools opens cricket_stats.db in the working directory
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        os.environ["TOOL_CACHE_SIZE"] = os.getenv("TOOL_CACHE_SIZE", "256") if use_tool_cache else "0"
+        try:
+            import cricket_tools
+            names = [player_name(pid) for pid in range(1, 21)]
+            calls = {
+                'get_player_batting_stats': lambda i: cricket_tools.get_player_batting_stats(names[i % 20]),
+                'get_player_bowling_stats': lambda i: cricket_tools.get_player_bowling_stats(names[i % 20]),
+                'compare_players': lambda i: cricket_tools.compare_players(names[i % 20], names[(i + 1) % 20], 'runs'),
+                'get_top_performers': lambda i: cricket_tools.get_top_performers('batsmen', 10),
+                'get_match_summary': lambda i: cricket_tools.get_match_summary(),
+                'analyze_recent_form': lambda i: cricket_tools.analyze_recent_form(names[i % 20]),
+            }
+            results = {}
+            print(f"{'tool':>26} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+            for name, call in calls.items():
+                latency = LatencyStats()
+                for i in range(repeat):
+                    start = time.perf_counter()
+                    call(i)
+                    latency.record(time.perf_counter() - start)
+                results[name] = latency.summary()
+                print(f"{name:>26} {results[name]['p50_ms']:>10.3f} {results[name]['p99_ms']:>10.3f}")
+            if use_tool_cache:
+                print(json.dumps(cricket_tools.tool_cache.stats()['tools'], indent=2))
+            cricket_tools.db.close()
+        finally:
+            os.chdir(cwd)
+    return {'innings': innings, 'tool_cache': use_tool_cache, 'tools': results}
+
+CHAT_QUESTIONS = [
+    "What are {0}'s batting stats?",
+    "How is {1} bowling?",
+    "Compare {0} and {1}",
+    "Show the top batsmen and {2}'s recent form",
+    "Who are the best bowlers?",
+    # Mixed intents the router must leave to the agent rather than answer in part
+    "How many runs has {1} scored and who are the top bowlers?",
+    "Top 3 batsmen in the powerplay",
+    "Best bowlers at the death",
+]
+
+def bench_chat(innings: int, concurrency_levels, duration: float, llm_latency: float,
+               use_router: bool = False, use_cache: bool = False):
+    """End-to-end /chat throughput with the scripted model standing in for Gemini"""
+    import uvicorn
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, _, _ = ingest_synthetic(tmp, innings)
+        db.close()
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        os.environ["CRICKET_LLM"] = "scripted"
+        os.environ["SCRIPTED_LLM_LATENCY"] = str(llm_latency)
+        os.environ["ROUTER_ENABLED"] = "1" if use_router else "0"
+        os.environ["RESPONSE_CACHE_PATH"] = ""
+        if not use_cache:
+            os.environ["RESPONSE_CACHE_SIZE"] = "0"
+        try:
+            import server
+
+            names = [player_name(pid) for pid in range(1, 51)]
+            questions = [q.format(names[i % 50], names[(i + 7) % 50], names[(i + 13) % 50])
+                         for i in range(50) for q in CHAT_QUESTIONS]
+
+            config = uvicorn.Config(server.app, host="127.0.0.1", port=0, log_level="warning")
+            http = uvicorn.Server(config)
+            thread = threading.Thread(target=http.run, daemon=True)
+            thread.start()
+            while not http.started:
+                time.sleep(0.05)
+            port = http.servers[0].sockets[0].getsockname()[1]
+            wait_until_ok(f"http://127.0.0.1:{port}/ready", timeout=120)
+            try:
+                results = bench_load(f"http://127.0.0.1:{port}", questions, concurrency_levels, duration)
+            finally:
+                http.should_exit = True
+                thread.join()
+        finally:
+            os.chdir(cwd)
+    return {'innings': innings, 'llm_latency': llm_latency, 'router': use_router, 'cache': use_cache,
+            'levels': results}
+
+def bench_batch(innings: int, questions: int, llm_latency: float, concurrency: int):
+    """Sequential ask() vs ask_many() over a question list with repeats, cache disabled"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db, _, _ = ingest_synthetic(tmp, innings)
+        db.close()
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        os.environ["CRICKET_LLM"] = "scripted"
+        os.environ["SCRIPTED_LLM_LATENCY"] = str(llm_latency)
+        os.environ["RESPONSE_CACHE_PATH"] = ""
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+        try:
+            from agent import CricketAgent
+
+            agent = CricketAgent()
+            rng = random.Random(7)
+            names = [player_name(pid) for pid in range(1, 21)]
+            pool = [q.format(names[i % 20], names[(i + 7) % 20], names[(i + 13) % 20])
+                    for i in range(20) for q in CHAT_QUESTIONS]
+            batch = [rng.choice(pool) for _ in range(questions)]
+
+            results = {'questions': questions, 'distinct': len(set(batch))}
+            for mode in ('sequential', 'batch'):
+                start = time.perf_counter()
+                if mode == 'sequential':
+                    for question in batch:
+                        agent.ask(question)
+                else:
+                    list(agent.ask_many(batch, concurrency))
+                seconds = time.perf_counter() - start
+                results[mode] = {'seconds': seconds, 'questions_per_sec': questions / seconds}
+                print(f"{mode:>10}: {seconds:.2f}s ({questions / seconds:.1f} questions/sec)")
+        finally:
+            os.chdir(cwd)
+    return {'innings': innings, 'llm_latency': llm_latency, 'concurrency': concurrency, **results}
+
+def bench_tokens(innings: int, questions: int):
+    """LLM input/output tokens per question with the full and the compact prompt, tools and outputs"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db, _, _ = ingest_synthetic(tmp, innings)
+        db.close()
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        # Every question goes to the (scripted) model
+        os.environ["CRICKET_LLM"] = "scripted"
+        os.environ["ROUTER_ENABLED"] = "0"
+        os.environ["RESPONSE_CACHE_PATH"] = ""
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+        try:
+            from agent import CricketAgent
+
+            names = [player_name(pid) for pid in range(1, 21)]
+            batch = [q.format(names[i % 20], names[(i + 7) % 20], names[(i + 13) % 20])
+                     for i in range(20) for q in CHAT_QUESTIONS][:questions]
+
+            results = {}
+            print(f"{'mode':>8} {'input/question':>15} {'output/question':>16} {'seconds':>8}")
+            for mode in ('full', 'compact'):
+                os.environ["AGENT_COMPACT"] = "1" if mode == 'compact' else "0"
+                agent = CricketAgent()
+                start = time.perf_counter()
+                for question in batch:
+                    agent.ask(question)
+                tokens = agent.token_stats.summary()
+                results[mode] = {**tokens, 'seconds': time.perf_counter() - start}
+                print(f"{mode:>8} {tokens['avg_input_tokens']:>15.0f} {tokens['avg_output_tokens']:>16.0f} "
+                      f"{results[mode]['seconds']:>8.2f}")
+        finally:
+            os.environ.pop("AGENT_COMPACT", None)
+            os.chdir(cwd)
+    return {'innings': innings, 'questions': len(batch), **results}
+
+RESILIENCE_MODES = {
+    # mode: environment for the agent's LLM wrapper and the scripted model
+    'unprotected': {"LLM_RESILIENCE": "0"},
+    'deadline': {"LLM_RESILIENCE": "1"},
+    'hedged': {"LLM_RESILIENCE": "1", "LLM_HEDGE_AFTER": "p95"},
+    'outage': {"LLM_RESILIENCE": "1", "SCRIPTED_LLM_ERROR_RATE": "1"},
+}
+
+def bench_resilience(innings: int, questions: int, llm_latency: float, slow_rate: float, slow_latency: float,
+                     attempt_timeout: float):
+    """Per-question latency against a scripted model with a slow tail, with and without the resilience layer"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db, _, _ = ingest_synthetic(tmp, innings)
+        db.close()
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        # Every question goes to the (scripted) model
+        base_env = {
+            "CRICKET_LLM": "scripted",
+            "ROUTER_ENABLED": "0",
+            "RESPONSE_CACHE_PATH": "",
+            "RESPONSE_CACHE_SIZE": "0",
+            "TOOL_CACHE_SIZE": "0",
+            "SCRIPTED_LLM_LATENCY": str(llm_latency),
+            "SCRIPTED_LLM_SLOW_RATE": str(slow_rate),
+            "SCRIPTED_LLM_SLOW_LATENCY": str(slow_latency),
+            "LLM_ATTEMPT_TIMEOUT": str(attempt_timeout),
+            "LLM_TIMEOUT": str(attempt_timeout * 4),
+            "LLM_BACKOFF": "0.05",
+        }
+        touched = set(base_env) | {key for env in RESILIENCE_MODES.values() for key in env}
+        saved = {key: os.environ.get(key) for key in touched}
+        try:
+            from agent import CricketAgent
+
+            names = [player_name(pid) for pid in range(1, 21)]
+            pool = [q.format(names[i % 20], names[(i + 7) % 20], names[(i + 13) % 20])
+                    for i in range(20) for q in CHAT_QUESTIONS]
+            batch = [pool[i % len(pool)] for i in range(questions)]
+
+            results = {}
+            print(f"{'mode':>12} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'degraded':>9} {'failed':>7}")
+            for mode, env in RESILIENCE_MODES.items():
+                for key in touched:
+                    os.environ.pop(key, None)
+                os.environ.update({**base_env, **env})
+                agent = CricketAgent()
+                latency = LatencyStats()
+                degraded = failed = 0
+                for question in batch:
+                    start = time.perf_counter()
+                    result = agent.ask(question)
+                    latency.record(time.perf_counter() - start)
+                    degraded += bool(result.get("degraded"))
+                    failed += not result["success"]
+                summary = {f'p{pct}': latency.percentile(pct) for pct in (50, 95, 99, 100)}
+                results[mode] = {**summary, 'degraded': degraded, 'failed': failed,
+                                 'llm': agent.stats()["llm"]}
+                print(f"{mode:>12} {summary['p50']:>8.3f} {summary['p95']:>8.3f} {summary['p99']:>8.3f} "
+                      f"{summary['p100']:>8.3f} {degraded:>9} {failed:>7}")
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            os.chdir(cwd)
+    return {'innings': innings, 'questions': questions, 'llm_latency': llm_latency, 'slow_rate': slow_rate,
+            'slow_latency': slow_latency, 'attempt_timeout': attempt_timeout, **results}
+
+DEFAULT_QUESTIONS = [
+    "Who are the top 5 batsmen?",
+    "Who are the top 5 bowlers?",
+    "Give me a match summary",
+    "What are Amit Pardeshi's batting stats?",
+    "Show me Ram Charan's recent form",
+]
+
+def wait_until_ok(url: str, timeout: float = 60.0) -> float:
+    """Poll a URL until it answers 200 and return the seconds waited"""
+    import requests
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} not ready after {timeout:.0f}s")
+
+def bench_startup(repeat: int = 5):
+    """Cold import time of server.py and time until a fresh process is live (/health) and ready (/ready)"""
+    import socket
+
+    backend = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "CRICKET_LLM": "scripted", "RESPONSE_CACHE_PATH": ""}
+    samples = {'import_s': [], 'health_s': [], 'ready_s': []}
+    with tempfile.TemporaryDirectory() as tmp:
+        db, _, _ = ingest_synthetic(tmp, 10000)
+        db.close()
+        for _ in range(repeat):
+            out = subprocess.run(
+                [sys.executable, "-c", "import time; t = time.perf_counter(); import server; "
+                 "print(time.perf_counter() - t)"],
+                cwd=tmp, env={**env, "PYTHONPATH": backend}, capture_output=True, text=True, check=True
+            )
+            samples['import_s'].append(float(out.stdout.strip().splitlines()[-1]))
+
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+            start = time.perf_counter()
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "server:app", "--app-dir", backend,
+                 "--port", str(port), "--log-level", "warning"],
+                cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_until_ok(f"http://127.0.0.1:{port}/health")
+                samples['health_s'].append(time.perf_counter() - start)
+                wait_until_ok(f"http://127.0.0.1:{port}/ready")
+                samples['ready_s'].append(time.perf_counter() - start)
+            finally:
+                proc.terminate()
+                proc.wait()
+
+    results = {name: statistics.median(values) for name, values in samples.items()}
+    print(f"import server: {results['import_s'] * 1000:.0f} ms")
+    print(f"process start to /health: {results['health_s'] * 1000:.0f} ms")
+    print(f"process start to /ready: {results['ready_s'] * 1000:.0f} ms")
+    return results
+
+TOOL_QUESTIONS = [
+    "What are {0}'s batting stats?",
+    "{0} bowling stats",
+    "Show me {0}'s recent form",
+    "Who are the top 5 batsmen?",
+    "Who are the top 5 bowlers?",
+]
+
+def bench_workers(innings: int, worker_counts, clients: int, duration: float):
+    """Tool-only /chat throughput for N uvicorn worker processes serving a read-only snapshot"""
+    import socket
+
+    backend = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        ingest_dir = os.path.join(tmp, "ingest")
+        os.mkdir(ingest_dir)
+        db, _, _ = ingest_synthetic(ingest_dir, innings)
+        snapshot = db.publish_snapshot(os.path.join(tmp, "cricket_stats.db"))
+        db.close()
+        env = {
+            **os.environ, "CRICKET_DB_PATH": snapshot, "DB_READ_ONLY": "1", "CRICKET_LLM": "scripted",
+            "ROUTER_ENABLED": "1", "RESPONSE_CACHE_SIZE": "0", "RESPONSE_CACHE_PATH": "",
+        }
+        questions = [q.format(player_name(pid)) for pid in range(1, 101) for q in TOOL_QUESTIONS]
+        for workers in worker_counts:
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "server:app", "--app-dir", backend, "--port", str(port),
+                 "--workers", str(workers), "--log-level", "warning"],
+                cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                url = f"http://127.0.0.1:{port}"
+                wait_until_ok(f"{url}/ready", timeout=120)
+                # Every worker builds its agent independently; let them all finish warming up
+                bench_load(url, questions, [clients], duration=2, quiet=True)
+                print(f"workers={workers}")
+                level = bench_load(url, questions, [clients], duration)[0]
+                results.append({'workers': workers, **level})
+            finally:
+                proc.terminate()
+                proc.wait()
+    return {'innings': innings, 'cpus': os.cpu_count(), 'levels': results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Cricket chatbot backend benchmarks")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    names = subparsers.add_parser("names", help="Player name resolution vs LIKE scans")
+    names.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    names.add_argument("--repeat", type=int, default=20)
+
+    rows = subparsers.add_parser("rows", help="DataFrame vs sqlite3.Row per-call overhead")
+    rows.add_argument("--innings", type=int, default=50000)
+    rows.add_argument("--repeat", type=int, default=200)
+
+    load = subparsers.add_parser("load", help="Concurrent /chat load test against a running server")
+    load.add_argument("--url", default="http://localhost:8000")
+    load.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    load.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    load.add_argument("--question", action="append", help="Question to send (repeatable)")
+
+    ingest = subparsers.add_parser("ingest", help="Streaming ingest rate on synthetic match JSON")
+    ingest.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Innings to generate")
+    ingest.add_argument("--format", choices=["jsonl", "array"], default="jsonl")
+    ingest.add_argument("--batch-size", type=int, default=5000)
+    ingest.add_argument("--ball-by-ball", action="store_true", help="Include per-ball data for both innings")
+
+    tools = subparsers.add_parser("tools", help="Per-tool latency on a synthetic database")
+    tools.add_argument("--innings", type=int, default=100000)
+    tools.add_argument("--repeat", type=int, default=200)
+    tools.add_argument("--tool-cache", action="store_true", help="Keep the tool result cache enabled")
+
+    chat = subparsers.add_parser("chat", help="End-to-end /chat throughput with the scripted model")
+    chat.add_argument("--innings", type=int, default=20000)
+    chat.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    chat.add_argument("--duration", type=float, default=5.0, help="Seconds per concurrency level")
+    chat.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per scripted model call")
+    chat.add_argument("--router", action="store_true", help="Let the fast-path router answer")
+    chat.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+
+    batch = subparsers.add_parser("batch", help="Sequential ask() vs ask_many() with the scripted model")
+    batch.add_argument("--innings", type=int, default=20000)
+    batch.add_argument("--questions", type=int, default=200)
+    batch.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per scripted model call")
+    batch.add_argument("--concurrency", type=int, default=4)
+
+    tokens = subparsers.add_parser("tokens", help="LLM tokens per question, full vs compact prompt and tools")
+    tokens.add_argument("--innings", type=int, default=20000)
+    tokens.add_argument("--questions", type=int, default=50)
+
+    resilience = subparsers.add_parser("resilience", help="Tail latency under a slow scripted model, "
+                                       "with deadlines, hedging and an outage")
+    resilience.add_argument("--innings", type=int, default=20000)
+    resilience.add_argument("--questions", type=int, default=100)
+    resilience.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per normal model call")
+    resilience.add_argument("--slow-rate", type=float, default=0.05, help="Fraction of calls in the slow tail")
+    resilience.add_argument("--slow-latency", type=float, default=3.0, help="Seconds per slow model call")
+    resilience.add_argument("--attempt-timeout", type=float, default=0.5, help="LLM_ATTEMPT_TIMEOUT to test")
+
+    startup = subparsers.add_parser("startup", help="Server import time and time to /health and /ready")
+    startup.add_argument("--repeat", type=int, default=5)
+
+    workers = subparsers.add_parser("workers", help="Tool-only throughput vs uvicorn worker processes")
+    workers.add_argument("--innings", type=int, default=50000)
+    workers.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    workers.add_argument("--clients", type=int, default=16)
+    workers.add_argument("--duration", type=float, default=5.0)
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("--output", help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+    if args.scenario == "names":
+        results = bench_names(args.sizes, args.repeat)
+    elif args.scenario == "rows":
+        results = bench_rows(args.innings, args.repeat)
+    elif args.scenario == "load":
+        results = bench_load(args.url, args.question or DEFAULT_QUESTIONS, args.clients, args.duration)
+    elif args.scenario == "ingest":
+        results = bench_ingest(args.sizes, args.format, args.batch_size, args.ball_by_ball)
+    elif args.scenario == "tools":
+        results = bench_tools(args.innings, args.repeat, args.tool_cache)
+    elif args.scenario == "chat":
+        results = bench_chat(args.innings, args.clients, args.duration, args.llm_latency, args.router, args.cache)
+    elif args.scenario == "batch":
+        results = bench_batch(args.innings, args.questions, args.llm_latency, args.concurrency)
+    elif args.scenario == "tokens":
+        results = bench_tokens(args.innings, args.questions)
+    elif args.scenario == "resilience":
+        results = bench_resilience(args.innings, args.questions, args.llm_latency, args.slow_rate,
+                                   args.slow_latency, args.attempt_timeout)
+    elif args.scenario == "startup":
+        results = bench_startup(args.repeat)
+    elif args.scenario == "workers":
+        results = bench_workers(args.innings, args.workers, args.clients, args.duration)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                'scenario': args.scenario,
+                'args': {k: v for k, v in vars(args).items() if k not in ('scenario', 'output')},
+                'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                'python': platform.python_version(),
+                'results': results,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
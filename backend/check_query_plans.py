@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for the cricket tools
+Runs every tool against a scratch database, checks every statement in the
+query registry and exits non-zero if EXPLAIN QUERY PLAN shows any scan (of a
+table or of a whole index) not on the allow-list, or a temporary sort for ORDER BY
+"""
+import os
+import sys
+import tempfile
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def sample_match(match_no: int) -> dict:
+    """A minimal match in the loader's JSON shape"""
+    players = [(101, "Amit", "Pardeshi"), (102, "Ram", "Charan"), (103, "Sharath", "Vadla")]
+    return {
+        "_id": {"$oid": f"{match_no:024x}"},
+        "latestBatting": {
+            str(i): {"playerID": pid, "firstName": first, "lastName": last,
+                     "runsScored": 10 * (i + match_no), "ballsFaced": 12, "fours": 1,
+                     "sixers": 0, "isOut": "1", "howOut": "b"}
+            for i, (pid, first, last) in enumerate(players)
+        },
+        "latestBowling": {
+            str(i): {"playerID": pid, "firstName": first, "lastName": last, "matchID": match_no,
+                     "overs": "4.0", "balls": 24, "runs": 30, "wickets": i, "maidens": 0,
+                     "dotBalls": 8, "wides": 0, "noBalls": 0}
+            for i, (pid, first, last) in enumerate(players)
+        },
+        "innings1Balls": {"runs": 150 + match_no, "overs": "20.0", "teamName": "Warriors", "balls": [
+            {"over": over, "ball": 1, "batsmanID": 101, "bowlerID": 103, "runs": over % 7}
+            for over in range(20)
+        ]},
+    }
+
+# Scans that are intended: leaderboards walk their ordered index and stop at
+# LIMIT, and the match summary aggregates every match from a covering index
+INTENTIONAL_SCANS = {
+    'top_batsmen': {"SCAN player_batting_summary USING COVERING INDEX idx_batting_summary_leaders"},
+    'top_bowlers': {"SCAN player_bowling_summary USING COVERING INDEX idx_bowling_summary_leaders"},
+    'match_summary': {"SCAN matches USING COVERING INDEX idx_matches_runs"},
+}
+
+def plan_regressions(conn, query: str, params: tuple, allowed=frozenset()):
+    """Plan steps that scan a table or index (unless `allowed`) or sort into a temp b-tree"""
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [
+        row[-1] for row in plan
+        if (row[-1].startswith("SCAN") and row[-1] not in allowed)
+        or row[-1].startswith("USE TEMP B-TREE FOR ORDER BY")
+    ]
+
+# Every tool call needed to exercise each registered statement, against the sample matches
+TOOL_CALLS = [
+    ("get_player_batting_stats", ("Amit Pardeshi",)),
+    ("get_player_bowling_stats", ("Sharath Vadla",)),
+    ("compare_players", ("Amit Pardeshi", "Ram Charan", "runs")),
+    ("compare_players", ("Amit Pardeshi", "Ram Charan", "wickets")),
+    ("get_top_performers", ("batsmen", 5)),
+    ("get_top_performers", ("bowlers", 5)),
+    ("get_match_summary", ()),
+    ("analyze_recent_form", ("Ram Charan",)),
+    ("get_phase_stats", ("Amit Pardeshi",)),
+    ("get_phase_stats", ("Sharath Vadla",)),
+    ("get_matchup", ("Amit Pardeshi", "Sharath Vadla")),
+]
+
+def load_sample_matches(db):
+    for match_no in range(3):
+        db.process_match_data(sample_match(match_no))
+
+def check_plans() -> Dict[str, List[str]]:
+    """Problems per registered statement (empty when its plan is fine), running the tools on the open database"""
+    import cricket_tools
+
+    registry = cricket_tools.get_queries()
+    captured = {}
+    run = registry.run
+
+    def recording_run(name, params=()):
+        captured.setdefault(name, tuple(params))
+        return run(name, params)
+
+    # Cached tool outputs would skip the statements
+    cricket_tools.tool_cache.clear()
+    registry.run = recording_run
+    try:
+        for name, args in TOOL_CALLS:
+            getattr(cricket_tools, name)(*args)
+    finally:
+        registry.run = run
+
+    conn = cricket_tools.get_db().reader()
+    problems = {}
+    for name, query in registry.queries.items():
+        if name not in captured:
+            problems[name] = ["not exercised by any tool call in this check"]
+        else:
+            problems[name] = plan_regressions(conn, query, captured[name], INTENTIONAL_SCANS.get(name, frozenset()))
+    return problems
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        # A scratch database, and SQL rather than the in-memory stats engine
+        os.environ["CRICKET_DB_PATH"] = os.path.join(tmp, "cricket_stats.db")
+        os.environ["STATS_ENGINE"] = "0"
+        import cricket_tools
+
+        db = cricket_tools.get_db()
+        load_sample_matches(db)
+        cricket_tools.get_player_index().refresh()
+
+        problems = check_plans()
+        registry = cricket_tools.get_queries()
+        failures = 0
+        for name, scans in problems.items():
+            status = "❌" if scans else "✅"
+            print(f"{status} {name}: {' '.join(registry.queries[name].split())[:70]}")
+            for scan in scans:
+                print(f"     {scan}")
+            failures += bool(scans)
+
+        print(f"\n{len(problems)} queries checked, {failures} with plan regressions")
+        db.close()
+        return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Shared pytest fixtures for the cricket chatbot backend
+Tests run offline against a small synthetic database and the scripted model
+"""
+import os
+import tempfile
+
+import pytest
+
+# Set before cricket_tools opens its database, which happens on first use
+_TMP = tempfile.mkdtemp(prefix="cricket-tests-")
+os.environ.update({
+    "CRICKET_DB_PATH": os.path.join(_TMP, "cricket_stats.db"),
+    "CRICKET_LLM": "scripted",
+    "RESPONSE_CACHE_PATH": "",
+    "STATS_ENGINE": "0",
+    "LLM_BACKOFF": "0.01",
+})
+
+@pytest.fixture(scope="session")
+def cricket_db():
+    """The tools' database, loaded with synthetic matches and the query-plan check's sample matches"""
+    import cricket_tools
+    from check_query_plans import sample_match
+    from synthetic_data import write_matches
+
+    db = cricket_tools.get_db()
+    if not db.fetch_all("SELECT 1 FROM players LIMIT 1"):
+        feed = os.path.join(_TMP, "matches.jsonl")
+        write_matches(feed, 300, players=40, ball_by_ball=True)
+        db.load_json_stream(feed)
+        for match_no in range(3):
+            db.process_match_data(sample_match(match_no))
+        cricket_tools.get_player_index().refresh()
+    return db
+
+@pytest.fixture
+def agent(cricket_db):
+    """A fresh agent on the scripted model with empty caches and sessions"""
+    from agent import CricketAgent
+    import cricket_tools
+
+    cricket_tools.tool_cache.clear()
+    return CricketAgent()
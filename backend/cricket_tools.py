@@ -1,16 +1,79 @@
 """
 Tools for the cricket chatbot
 Customized for your data structure
+The database and the LangChain tool objects are created on first use
 """
-from langchain.tools import Tool, StructuredTool
-from pydantic import BaseModel, Field
-from typing import Optional, List
-import pandas as pd
+from pydantic import BaseModel, Field, create_model
+from typing import Optional, List, Tuple
+import functools
+import os
+import sqlite3
+import textwrap
+import threading
 from database import CricketDatabase
+from deliveries import phase_label
+from player_index import PlayerIndex
+from queries import QueryRegistry
+from tool_cache import ToolCache, parse_ttls
 import json
 
-# Initialize database
-db = CricketDatabase()
+_lock = threading.Lock()
+_db = None
+_player_index = None
+_queries = None
+_tools = None
+_compact_tools = None
+_stats_engine = None
+
+# Tool outputs memoized per data version; TOOL_CACHE_SIZE=0 turns this off
+tool_cache = ToolCache(
+    version=lambda: get_db().data_version,
+    max_entries=int(os.getenv("TOOL_CACHE_SIZE", "256")),
+    default_ttl=float(os.getenv("TOOL_CACHE_TTL", "300")),
+    ttls={'get_top_performers': 600, 'get_match_summary': 600, **parse_ttls(os.getenv("TOOL_CACHE_TTLS"))}
+)
+
+def get_db() -> CricketDatabase:
+    """Open the database (running its DDL and migrations) on first use"""
+    global _db, _player_index, _queries
+    if _db is None:
+        with _lock:
+            if _db is None:
+                db = CricketDatabase(
+                    os.getenv("CRICKET_DB_PATH", "cricket_stats.db"),
+                    read_only=os.getenv("DB_READ_ONLY") == "1",
+                    immutable=os.getenv("DB_IMMUTABLE") == "1",
+                    mmap_size=int(os.getenv("DB_MMAP_SIZE", "0"))
+                )
+                _player_index = PlayerIndex(db)
+                _queries = QueryRegistry(db)
+                _db = db
+    return _db
+
+def get_player_index() -> PlayerIndex:
+    get_db()
+    return _player_index
+
+def get_queries() -> QueryRegistry:
+    get_db()
+    return _queries
+
+def get_stats_engine():
+    """The in-memory columnar engine when STATS_ENGINE=1, loaded on first use; otherwise None"""
+    global _stats_engine
+    if os.getenv("STATS_ENGINE") != "1":
+        return None
+    if _stats_engine is None:
+        db = get_db()
+        with _lock:
+            if _stats_engine is None:
+                from stats_engine import StatsEngine
+                engine = StatsEngine(db)
+                engine.refresh()
+                # Append new rows as soon as an ingest in this process commits
+                db.add_listener(lambda version: engine.refresh())
+                _stats_engine = engine
+    return _stats_engine
 
 class PlayerStatsInput(BaseModel):
     player_name: str = Field(description="Name of the cricket player")
@@ -20,30 +83,67 @@ class ComparePlayersInput(BaseModel):
     player2: str = Field(description="Second player name")
     metric: str = Field(description="Metric to compare: runs, wickets, average, economy")
 
+class TopPerformersInput(BaseModel):
+    category: str = Field(default="batsmen", description="'batsmen' or 'bowlers'")
+    limit: int = Field(default=5, description="How many players to list (1-50)")
+
+class MatchupInput(BaseModel):
+    batter: str = Field(description="Batter's name")
+    bowler: str = Field(description="Bowler's name")
+
+def _player_key(player_name: str) -> tuple:
+    """Cache key part for a player argument: the resolved candidates, or the text itself if none resolve"""
+    candidates = tuple(get_player_index().resolve_all(player_name))
+    return candidates if candidates else ('?', player_name)
+
+def _display_name(player_name: str, player_id: Optional[int] = None) -> str:
+    """Stored name for a resolved player (or its best candidate), else the text as given"""
+    player_index = get_player_index()
+    if player_id is None:
+        player_id = player_index.resolve(player_name)
+    return player_index.name(player_id) if player_id is not None else player_name
+
+def _metric_group(metric: str) -> Optional[str]:
+    if metric.lower() in ['runs', 'batting', 'average']:
+        return 'batting'
+    if metric.lower() in ['wickets', 'bowling', 'economy']:
+        return 'bowling'
+    return None
+
+def _category_group(category: str) -> Optional[str]:
+    if category.lower() in ['batsmen', 'batting', 'runs']:
+        return 'batsmen'
+    if category.lower() in ['bowlers', 'bowling', 'wickets']:
+        return 'bowlers'
+    return None
+
+def _clamp_limit(limit) -> int:
+    try:
+        return max(1, min(int(limit), 50))
+    except (TypeError, ValueError):
+        return 5
+
+def _query_first_match(player_name: str, query: str) -> Tuple[str, List[sqlite3.Row]]:
+    """Run a player_id-filtered query for the best resolved candidate that has rows
+    
+    Returns that player's stored name with the rows, so answers read the
+    same however the name was spelled.
+    """
+    for player_id in get_player_index().resolve_all(player_name):
+        rows = get_queries().run(query, (player_id,))
+        if rows:
+            return _display_name(player_name, player_id), rows
+    return _display_name(player_name), []
+
+@tool_cache.memoize('get_player_batting_stats', lambda player_name: _player_key(player_name))
 def get_player_batting_stats(player_name: str) -> str:
     """Get batting statistics for a player"""
-    query = f"""
-    SELECT 
-        player_name,
-        COUNT(*) as innings,
-        SUM(runs_scored) as total_runs,
-        AVG(runs_scored) as average_runs,
-        MAX(runs_scored) as highest_score,
-        AVG(strike_rate) as avg_strike_rate,
-        SUM(fours) as total_fours,
-        SUM(sixes) as total_sixes,
-        SUM(balls_faced) as total_balls
-    FROM batting_performances
-    WHERE LOWER(player_name) LIKE LOWER('%{player_name}%')
-    GROUP BY player_name
-    """
+    name, result = _query_first_match(player_name, 'batting_stats')
     
-    result = db.execute_query(query)
+    if not result:
+        return f"No batting data found for {name}"
     
-    if result.empty:
-        return f"No batting data found for {player_name}"
-    
-    stats = result.iloc[0]
+    stats = result[0]
     return f"""
     Batting Statistics for {stats['player_name']}:
     - Innings: {int(stats['innings'])}
@@ -56,29 +156,15 @@ def get_player_batting_stats(player_name: str) -> str:
     - Balls Faced: {int(stats['total_balls'])}
     """
 
+@tool_cache.memoize('get_player_bowling_stats', lambda player_name: _player_key(player_name))
 def get_player_bowling_stats(player_name: str) -> str:
     """Get bowling statistics for a player"""
-    query = f"""
-    SELECT 
-        player_name,
-        COUNT(*) as matches,
-        SUM(wickets) as total_wickets,
-        SUM(runs_conceded) as total_runs,
-        AVG(economy) as avg_economy,
-        SUM(maidens) as total_maidens,
-        SUM(dot_balls) as total_dots,
-        SUM(balls) as total_balls
-    FROM bowling_performances
-    WHERE LOWER(player_name) LIKE LOWER('%{player_name}%')
-    GROUP BY player_name
-    """
-    
-    result = db.execute_query(query)
+    name, result = _query_first_match(player_name, 'bowling_stats')
     
-    if result.empty:
-        return f"No bowling data found for {player_name}"
+    if not result:
+        return f"No bowling data found for {name}"
     
-    stats = result.iloc[0]
+    stats = result[0]
     
     # Calculate bowling average
     bowling_avg = 0
@@ -97,44 +183,32 @@ def get_player_bowling_stats(player_name: str) -> str:
     - Total Balls: {int(stats['total_balls'])}
     """
 
+@tool_cache.memoize('compare_players', lambda player1, player2, metric: (
+    _player_key(player1), _player_key(player2), _metric_group(metric)))
 def compare_players(player1: str, player2: str, metric: str) -> str:
     """Compare two players on a specific metric"""
+    player_index = get_player_index()
+    player_ids = [player_index.resolve(player1), player_index.resolve(player2)]
+    name1, name2 = _display_name(player1, player_ids[0]), _display_name(player2, player_ids[1])
+    if None in player_ids:
+        return f"Could not find data for both {name1} and {name2}"
     
-    if metric.lower() in ['runs', 'batting', 'average']:
-        query = f"""
-        SELECT 
-            player_name,
-            SUM(runs_scored) as total_runs,
-            AVG(runs_scored) as average,
-            AVG(strike_rate) as strike_rate
-        FROM batting_performances
-        WHERE LOWER(player_name) LIKE LOWER('%{player1}%')
-           OR LOWER(player_name) LIKE LOWER('%{player2}%')
-        GROUP BY player_name
-        """
-    elif metric.lower() in ['wickets', 'bowling', 'economy']:
-        query = f"""
-        SELECT 
-            player_name,
-            SUM(wickets) as total_wickets,
-            AVG(economy) as economy,
-            SUM(runs_conceded) as runs_conceded
-        FROM bowling_performances
-        WHERE LOWER(player_name) LIKE LOWER('%{player1}%')
-           OR LOWER(player_name) LIKE LOWER('%{player2}%')
-        GROUP BY player_name
-        """
-    else:
+    group = _metric_group(metric)
+    if group is None:
         return f"Invalid metric. Choose from: runs, wickets, average, economy"
+    query = 'compare_batting' if group == 'batting' else 'compare_bowling'
     
-    result = db.execute_query(query)
+    result = get_queries().run(query, tuple(player_ids))
     
     if len(result) < 2:
-        return f"Could not find data for both {player1} and {player2}"
+        return f"Could not find data for both {name1} and {name2}"
+    
+    # Keep the order the players were asked about
+    result = sorted(result, key=lambda row: player_ids.index(row['player_id']))
     
-    comparison = f"Comparison of {player1} vs {player2}:\n\n"
-    for _, row in result.iterrows():
-        if metric.lower() in ['runs', 'batting', 'average']:
+    comparison = f"Comparison of {name1} vs {name2}:\n\n"
+    for row in result:
+        if group == 'batting':
             comparison += f"{row['player_name']}:\n"
             comparison += f"  - Total Runs: {int(row['total_runs'])}\n"
             comparison += f"  - Average: {row['average']:.2f}\n"
@@ -146,71 +220,49 @@ def compare_players(player1: str, player2: str, metric: str) -> str:
     
     return comparison
 
+@tool_cache.memoize('get_top_performers', lambda category="batsmen", limit=5: (
+    _category_group(category), _clamp_limit(limit)))
 def get_top_performers(category: str = "batsmen", limit: int = 5) -> str:
     """Get top performers in batting or bowling"""
+    limit = _clamp_limit(limit)
+    category = _category_group(category)
     
-    if category.lower() in ['batsmen', 'batting', 'runs']:
-        query = f"""
-        SELECT 
-            player_name,
-            SUM(runs_scored) as total_runs,
-            AVG(runs_scored) as average,
-            COUNT(*) as innings
-        FROM batting_performances
-        GROUP BY player_name
-        HAVING innings >= 2
-        ORDER BY total_runs DESC
-        LIMIT {limit}
-        """
+    if category == 'batsmen':
+        query = 'top_batsmen'
         title = "Top Batsmen"
-    elif category.lower() in ['bowlers', 'bowling', 'wickets']:
-        query = f"""
-        SELECT 
-            player_name,
-            SUM(wickets) as total_wickets,
-            AVG(economy) as economy,
-            COUNT(*) as matches
-        FROM bowling_performances
-        GROUP BY player_name
-        HAVING matches >= 2
-        ORDER BY total_wickets DESC
-        LIMIT {limit}
-        """
+    elif category == 'bowlers':
+        query = 'top_bowlers'
         title = "Top Bowlers"
     else:
         return "Invalid category. Choose 'batsmen' or 'bowlers'"
     
-    result = db.execute_query(query)
+    engine = get_stats_engine()
+    if engine is not None:
+        result = engine.top_batsmen(limit) if query == 'top_batsmen' else engine.top_bowlers(limit)
+    else:
+        result = get_queries().run(query, (limit,))
     
-    if result.empty:
+    if not result:
         return f"No data found for {category}"
     
     response = f"{title} (Top {limit}):\n\n"
-    for i, row in result.iterrows():
-        if category.lower() in ['batsmen', 'batting', 'runs']:
+    for i, row in enumerate(result):
+        if category == 'batsmen':
             response += f"{i+1}. {row['player_name']}: {int(row['total_runs'])} runs (Avg: {row['average']:.2f})\n"
         else:
             response += f"{i+1}. {row['player_name']}: {int(row['total_wickets'])} wickets (Eco: {row['economy']:.2f})\n"
     
     return response
 
+@tool_cache.memoize('get_match_summary', lambda: ())
 def get_match_summary() -> str:
     """Get summary of matches in database"""
-    query = """
-    SELECT 
-        COUNT(*) as total_matches,
-        AVG(total_runs) as avg_runs,
-        MAX(total_runs) as highest_score,
-        MIN(total_runs) as lowest_score
-    FROM matches
-    """
+    engine = get_stats_engine()
+    stats = engine.match_summary() if engine is not None else get_queries().run_one('match_summary')
     
-    result = db.execute_query(query)
-    
-    if result.empty or result.iloc[0]['total_matches'] == 0:
+    if stats is None or stats['total_matches'] == 0:
         return "No match data available"
-    
-    stats = result.iloc[0]
+
     return f"""
     Match Summary:
     - Total Matches: {int(stats['total_matches'])}
@@ -219,82 +271,214 @@ def get_match_summary() -> str:
     - Lowest Team Score: {int(stats['lowest_score'])}
     """
 
+@tool_cache.memoize('analyze_recent_form', lambda player_name: _player_key(player_name))
 def analyze_recent_form(player_name: str) -> str:
     """Analyze recent form of a player"""
-    query = f"""
-    SELECT 
-        runs_scored,
-        balls_faced,
-        strike_rate,
-        fours,
-        sixes
-    FROM batting_performances
-    WHERE LOWER(player_name) LIKE LOWER('%{player_name}%')
-    ORDER BY id DESC
-    LIMIT 5
-    """
-    
-    result = db.execute_query(query)
+    name, result = _query_first_match(player_name, 'recent_form')
     
-    if result.empty:
-        return f"No recent data found for {player_name}"
+    if not result:
+        return f"No recent data found for {name}"
     
-    recent_runs = result['runs_scored'].tolist()
+    recent_runs = [row['runs_scored'] for row in result]
     avg_recent = sum(recent_runs) / len(recent_runs)
     
     form = "🔥 HOT" if avg_recent > 30 else "📈 GOOD" if avg_recent > 15 else "📉 NEEDS IMPROVEMENT"
     
     return f"""
-    Recent Form for {player_name} (Last {len(recent_runs)} innings):
+    Recent Form for {name} (Last {len(recent_runs)} innings):
     - Recent Scores: {', '.join(map(str, recent_runs))}
     - Average in Recent Games: {avg_recent:.1f}
     - Form: {form}
     """
 
-# Create LangChain tools
-player_batting_tool = Tool(
-    name="get_player_batting_stats",
-    func=get_player_batting_stats,
-    description="Get batting statistics for a specific player"
-)
+@tool_cache.memoize('get_phase_stats', lambda player_name: _player_key(player_name))
+def get_phase_stats(player_name: str) -> str:
+    """Get powerplay, middle-overs and death-overs statistics for a player from ball-by-ball data"""
+    batting = bowling = []
+    name = _display_name(player_name)
+    for player_id in get_player_index().resolve_all(player_name):
+        batting = get_queries().run('phase_batting', (player_id,))
+        bowling = get_queries().run('phase_bowling', (player_id,))
+        if batting or bowling:
+            name = _display_name(player_name, player_id)
+            break
+    
+    if not batting and not bowling:
+        return f"No ball-by-ball data found for {name}"
+    
+    summary = f"Phase-wise Statistics for {name}:\n"
+    if batting:
+        summary += "\nBatting:\n"
+        for row in batting:
+            strike_rate = row['runs'] * 100 / row['balls'] if row['balls'] else 0
+            summary += (f"  - {phase_label(row['phase'])}: {row['runs']} runs off {row['balls']} balls, "
+                        f"SR {strike_rate:.2f}, {row['dismissals']} outs, "
+                        f"{row['fours']} fours, {row['sixes']} sixes, {row['dots']} dots\n")
+    if bowling:
+        summary += "\nBowling:\n"
+        for row in bowling:
+            economy = row['runs'] * 6 / row['balls'] if row['balls'] else 0
+            summary += (f"  - {phase_label(row['phase'])}: {row['wickets']} wickets, "
+                        f"{row['runs']} runs off {row['balls']} balls, economy {economy:.2f}, "
+                        f"{row['dots']} dots\n")
+    return summary
 
-player_bowling_tool = Tool(
-    name="get_player_bowling_stats",
-    func=get_player_bowling_stats,
-    description="Get bowling statistics for a specific player"
-)
+@tool_cache.memoize('get_matchup', lambda batter, bowler: (_player_key(batter), _player_key(bowler)))
+def get_matchup(batter: str, bowler: str) -> str:
+    """Get head-to-head figures for a batter against a bowler from ball-by-ball data"""
+    player_index = get_player_index()
+    batter_id, bowler_id = player_index.resolve(batter), player_index.resolve(bowler)
+    batter, bowler = _display_name(batter, batter_id), _display_name(bowler, bowler_id)
+    if None in (batter_id, bowler_id):
+        return f"Could not find both {batter} and {bowler}"
+    
+    stats = get_queries().run_one('matchup', (batter_id, bowler_id))
+    if stats is None or not stats['balls']:
+        return f"No balls from {bowler} to {batter} in the ball-by-ball data"
+    
+    strike_rate = stats['runs'] * 100 / stats['balls']
+    return f"""
+    {batter} vs {bowler}:
+    - Balls: {stats['balls']}
+    - Runs: {stats['runs']}
+    - Strike Rate: {strike_rate:.2f}
+    - Dismissals: {stats['dismissals']}
+    - Dot Balls: {stats['dots']}
+    - Fours: {stats['fours']}
+    - Sixes: {stats['sixes']}
+    """
 
-comparison_tool = StructuredTool.from_function(
-    func=compare_players,
-    name="compare_players",
-    description="Compare two players on batting or bowling metrics",
-    args_schema=ComparePlayersInput
-)
+def get_tools() -> list:
+    """LangChain tool objects for the agent, built (and langchain imported) on first use"""
+    global _tools
+    if _tools is None:
+        from langchain.tools import Tool, StructuredTool
+        
+        # Create LangChain tools
+        player_batting_tool = Tool(
+            name="get_player_batting_stats",
+            func=get_player_batting_stats,
+            description="Get batting statistics for a specific player"
+        )
+        
+        player_bowling_tool = Tool(
+            name="get_player_bowling_stats",
+            func=get_player_bowling_stats,
+            description="Get bowling statistics for a specific player"
+        )
+        
+        comparison_tool = StructuredTool.from_function(
+            func=compare_players,
+            name="compare_players",
+            description="Compare two players on batting or bowling metrics",
+            args_schema=ComparePlayersInput
+        )
+        
+        top_performers_tool = StructuredTool.from_function(
+            func=get_top_performers,
+            name="get_top_performers",
+            description="Get top batsmen or bowlers",
+            args_schema=TopPerformersInput
+        )
+        
+        # Structured so the model can call it with no arguments
+        match_summary_tool = StructuredTool.from_function(
+            func=get_match_summary,
+            name="get_match_summary",
+            description="Get summary of all matches"
+        )
+        
+        form_analysis_tool = Tool(
+            name="analyze_recent_form",
+            func=analyze_recent_form,
+            description="Analyze recent form of a player"
+        )
+        
+        phase_tool = Tool(
+            name="get_phase_stats",
+            func=get_phase_stats,
+            description="Get a player's powerplay, middle-overs and death-overs batting and bowling"
+        )
+        
+        matchup_tool = StructuredTool.from_function(
+            func=get_matchup,
+            name="get_matchup",
+            description="Get head-to-head figures for a batter against a bowler",
+            args_schema=MatchupInput
+        )
+        
+        # List of all tools
+        _tools = [
+            player_batting_tool,
+            player_bowling_tool,
+            comparison_tool,
+            top_performers_tool,
+            match_summary_tool,
+            form_analysis_tool,
+            phase_tool,
+            matchup_tool
+        ]
+    return _tools
 
-top_performers_tool = Tool(
-    name="get_top_performers",
-    func=get_top_performers,
-    description="Get top batsmen or bowlers"
-)
+# One-line descriptions for the compact tool set; argument names carry the rest
+COMPACT_DESCRIPTIONS = {
+    'get_player_batting_stats': "Player batting totals",
+    'get_player_bowling_stats': "Player bowling totals",
+    'compare_players': "Compare 2 players; metric runs|wickets|average|economy",
+    'get_top_performers': "Leaderboard; category batsmen|bowlers",
+    'get_match_summary': "All-match totals",
+    'analyze_recent_form': "Player's recent scores",
+    'get_phase_stats': "Player powerplay/middle/death splits",
+    'get_matchup': "Batter vs bowler record",
+}
 
-match_summary_tool = Tool(
-    name="get_match_summary",
-    func=get_match_summary,
-    description="Get summary of all matches"
-)
+def compact_output(text: str) -> str:
+    """One-line `key=value; ...` form of a tool's human-readable output, for the model"""
+    parts = []
+    for line in textwrap.dedent(text).splitlines():
+        line = line.strip().lstrip('-').strip()
+        if not line:
+            continue
+        key, sep, value = line.partition(': ')
+        parts.append(f"{key}={value}" if sep and value else line.rstrip(':'))
+    return '; '.join(parts)
 
-form_analysis_tool = Tool(
-    name="analyze_recent_form",
-    func=analyze_recent_form,
-    description="Analyze recent form of a player"
-)
+def _compacted(func):
+    def wrapper(*args, **kwargs):
+        return compact_output(func(*args, **kwargs))
+    return functools.wraps(func)(wrapper)
+
+def _bare_schema(schema):
+    """Copy of an args schema without field descriptions"""
+    fields = {name: (field.annotation, ... if field.is_required() else field.default)
+              for name, field in schema.model_fields.items()}
+    return create_model(schema.__name__, **fields)
+
+def get_compact_tools() -> list:
+    """The agent's tools with minimal descriptions and schemas, returning compact_output text
+    
+    Used when AGENT_COMPACT=1 to cut the tokens sent to the model each
+    turn; the router keeps the human-readable tools from get_tools().
+    """
+    global _compact_tools
+    if _compact_tools is None:
+        from langchain.tools import StructuredTool
+        
+        # Single-input tools become structured too, so the schema names the player argument
+        _compact_tools = [
+            StructuredTool.from_function(
+                func=_compacted(tool.func),
+                name=tool.name,
+                description=COMPACT_DESCRIPTIONS[tool.name],
+                args_schema=_bare_schema(tool.args_schema if isinstance(tool, StructuredTool) else PlayerStatsInput)
+            )
+            for tool in get_tools()
+        ]
+    return _compact_tools
 
-# List of all tools
-ALL_TOOLS = [
-    player_batting_tool,
-    player_bowling_tool,
-    comparison_tool,
-    top_performers_tool,
-    match_summary_tool,
-    form_analysis_tool
-]
\ No newline at end of file
+def __getattr__(name):
+    # Module-level db, player_index, queries and ALL_TOOLS resolve lazily
+    lazy = {'db': get_db, 'player_index': get_player_index, 'queries': get_queries, 'ALL_TOOLS': get_tools}
+    if name in lazy:
+        return lazy[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
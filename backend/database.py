@@ -2,21 +2,360 @@
 Cricket Database Manager for JSON Data
 Handles your specific JSON structure
 """
+import hashlib
 import json
+import os
 import sqlite3
-import pandas as pd
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 import logging
 
+from deliveries import match_date, match_innings, overs_to_balls, parse_innings, run_rate, summarize
+from metrics import span
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Insert statements keyed by batch name, in the order they are written
+INSERT_SQL = {
+    'batting_players': '''
+    INSERT OR IGNORE INTO players (player_id, first_name, last_name, full_name, batting_style)
+    VALUES (?, ?, ?, ?, ?)
+    ''',
+    'batting': '''
+    INSERT INTO batting_performances 
+    (match_id, player_id, player_name, runs_scored, balls_faced, fours, sixes, strike_rate, is_out, how_out)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'bowling_players': '''
+    INSERT OR IGNORE INTO players (player_id, first_name, last_name, full_name, bowling_style)
+    VALUES (?, ?, ?, ?, ?)
+    ''',
+    'bowling': '''
+    INSERT INTO bowling_performances
+    (match_id, player_id, player_name, overs, balls, runs_conceded, wickets, 
+     maidens, dot_balls, wides, no_balls, economy)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'matches': '''
+    INSERT OR IGNORE INTO matches (match_id, team_name, total_runs, total_overs, total_wickets, run_rate, match_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+}
+
+# Written with each batch but not counted as data rows
+INGESTED_SQL = '''
+INSERT INTO ingested_matches (match_id, content_hash, ingested_at) VALUES (?, ?, ?)
+ON CONFLICT (match_id) DO UPDATE SET
+    content_hash = excluded.content_hash,
+    ingested_at = excluded.ingested_at
+'''
+
+# Innings are inserted one at a time so their ids can key the delivery rows
+INNINGS_SQL = '''
+INSERT OR IGNORE INTO innings (match_id, innings_no, team_name, runs, wickets, balls, overs, run_rate)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+DELIVERY_SQL = '''
+INSERT INTO deliveries
+(innings_id, seq, over_no, ball_no, phase, batter_id, bowler_id, runs, extras, extra_type, wicket, dismissed_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Career aggregates, folded into the summary tables as innings are inserted
+UPSERT_SUMMARY_SQL = {
+    'batting': '''
+    INSERT INTO player_batting_summary
+    (player_id, player_name, innings, total_runs, highest_score, total_fours, total_sixes,
+     total_balls, strike_rate_sum)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (player_id) DO UPDATE SET
+        innings = innings + excluded.innings,
+        total_runs = total_runs + excluded.total_runs,
+        highest_score = MAX(highest_score, excluded.highest_score),
+        total_fours = total_fours + excluded.total_fours,
+        total_sixes = total_sixes + excluded.total_sixes,
+        total_balls = total_balls + excluded.total_balls,
+        strike_rate_sum = strike_rate_sum + excluded.strike_rate_sum
+    ''',
+    'bowling': '''
+    INSERT INTO player_bowling_summary
+    (player_id, player_name, matches, total_wickets, total_runs, total_maidens, total_dots,
+     total_balls, economy_sum)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (player_id) DO UPDATE SET
+        matches = matches + excluded.matches,
+        total_wickets = total_wickets + excluded.total_wickets,
+        total_runs = total_runs + excluded.total_runs,
+        total_maidens = total_maidens + excluded.total_maidens,
+        total_dots = total_dots + excluded.total_dots,
+        total_balls = total_balls + excluded.total_balls,
+        economy_sum = economy_sum + excluded.economy_sum
+    ''',
+    'innings_phases': '''
+    INSERT INTO innings_phases (innings_id, phase, runs, balls, wickets, boundaries, dots)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'phase_batting': '''
+    INSERT INTO player_phase_batting (player_id, phase, balls, runs, fours, sixes, dots, dismissals)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (player_id, phase) DO UPDATE SET
+        balls = balls + excluded.balls,
+        runs = runs + excluded.runs,
+        fours = fours + excluded.fours,
+        sixes = sixes + excluded.sixes,
+        dots = dots + excluded.dots,
+        dismissals = dismissals + excluded.dismissals
+    ''',
+    'phase_bowling': '''
+    INSERT INTO player_phase_bowling (player_id, phase, balls, runs, wickets, dots)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (player_id, phase) DO UPDATE SET
+        balls = balls + excluded.balls,
+        runs = runs + excluded.runs,
+        wickets = wickets + excluded.wickets,
+        dots = dots + excluded.dots
+    ''',
+    'matchups': '''
+    INSERT INTO matchups (batter_id, bowler_id, balls, runs, dismissals, dots, fours, sixes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (batter_id, bowler_id) DO UPDATE SET
+        balls = balls + excluded.balls,
+        runs = runs + excluded.runs,
+        dismissals = dismissals + excluded.dismissals,
+        dots = dots + excluded.dots,
+        fours = fours + excluded.fours,
+        sixes = sixes + excluded.sixes
+    ''',
+}
+
+REBUILD_SUMMARY_SQL = {
+    'batting': '''
+    INSERT INTO player_batting_summary
+    (player_id, player_name, innings, total_runs, highest_score, total_fours, total_sixes,
+     total_balls, strike_rate_sum)
+    SELECT player_id, player_name, COUNT(*), SUM(runs_scored), MAX(runs_scored), SUM(fours),
+           SUM(sixes), SUM(balls_faced), SUM(strike_rate)
+    FROM batting_performances {where}
+    GROUP BY player_id
+    ''',
+    'bowling': '''
+    INSERT INTO player_bowling_summary
+    (player_id, player_name, matches, total_wickets, total_runs, total_maidens, total_dots,
+     total_balls, economy_sum)
+    SELECT player_id, player_name, COUNT(*), SUM(wickets), SUM(runs_conceded), SUM(maidens),
+           SUM(dot_balls), SUM(balls), SUM(economy)
+    FROM bowling_performances {where}
+    GROUP BY player_id
+    ''',
+}
+
+# Additive aggregates left empty once a replaced match is subtracted back out
+PRUNE_SUMMARY_SQL = {
+    'phase_batting': '''
+    DELETE FROM player_phase_batting
+    WHERE player_id = ? AND phase = ? AND balls = 0 AND runs = 0 AND dismissals = 0
+    ''',
+    'phase_bowling': '''
+    DELETE FROM player_phase_bowling
+    WHERE player_id = ? AND phase = ? AND balls = 0 AND runs = 0 AND wickets = 0
+    ''',
+    'matchups': '''
+    DELETE FROM matchups
+    WHERE batter_id = ? AND bowler_id = ? AND balls = 0 AND runs = 0 AND dismissals = 0
+    ''',
+}
+
+def _backfill_matches(cursor: sqlite3.Cursor):
+    """Fix run_rate, fill match_date and add a first-innings row for matches loaded before innings existed"""
+    matches = cursor.execute(
+        'SELECT match_id, team_name, total_runs, total_overs, total_wickets FROM matches'
+    ).fetchall()
+    updates, innings = [], []
+    for match_id, team_name, runs, overs, wickets in matches:
+        balls = overs_to_balls(overs)
+        rate = run_rate(runs or 0, balls)
+        updates.append((rate, match_date({'_id': {'$oid': match_id}}), match_id))
+        innings.append((match_id, 1, team_name, runs, wickets, balls, overs, rate))
+    cursor.executemany('UPDATE matches SET run_rate = ?, match_date = COALESCE(match_date, ?) WHERE match_id = ?',
+                       updates)
+    cursor.executemany(INNINGS_SQL, innings)
+
+# Schema migrations applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    # 1: player_id lookups and leaderboard ordering
+    [
+        'CREATE INDEX IF NOT EXISTS idx_batting_player ON batting_performances (player_id)',
+        'CREATE INDEX IF NOT EXISTS idx_bowling_player ON bowling_performances (player_id)',
+        'CREATE INDEX IF NOT EXISTS idx_batting_summary_runs ON player_batting_summary (total_runs DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_bowling_summary_wickets ON player_bowling_summary (total_wickets DESC)',
+    ],
+    # 2: covering indexes for recent form, leaderboards and match summary; match_id lookups
+    [
+        '''CREATE INDEX IF NOT EXISTS idx_batting_recent
+           ON batting_performances (player_id, id, runs_scored, balls_faced, strike_rate, fours, sixes)''',
+        'CREATE INDEX IF NOT EXISTS idx_batting_match ON batting_performances (match_id)',
+        'CREATE INDEX IF NOT EXISTS idx_bowling_match ON bowling_performances (match_id)',
+        'DROP INDEX IF EXISTS idx_batting_summary_runs',
+        'DROP INDEX IF EXISTS idx_bowling_summary_wickets',
+        '''CREATE INDEX IF NOT EXISTS idx_batting_summary_leaders
+           ON player_batting_summary (total_runs DESC, innings, player_name)''',
+        '''CREATE INDEX IF NOT EXISTS idx_bowling_summary_leaders
+           ON player_bowling_summary (total_wickets DESC, matches, economy_sum, player_name)''',
+        'CREATE INDEX IF NOT EXISTS idx_matches_runs ON matches (total_runs)',
+    ],
+    # 3: ball-by-ball tables (created in create_tables); fill the match columns older loads left empty
+    [
+        _backfill_matches,
+    ],
+    # 4: leaderboard ties by fewer matches, then name, as the stats engine breaks them
+    [
+        'DROP INDEX IF EXISTS idx_bowling_summary_leaders',
+        '''CREATE INDEX IF NOT EXISTS idx_bowling_summary_leaders
+           ON player_bowling_summary (total_wickets DESC, matches, player_name, economy_sum)''',
+    ],
+]
+
+def match_identity(match_data: Dict) -> Tuple[str, str]:
+    """(match_id, content hash) for a match object
+    
+    The id is `_id.$oid`; matches without one are keyed by their hash, so an
+    exact duplicate is still recognised. The hash is over canonical JSON,
+    so key order and whitespace in the export do not matter.
+    """
+    canonical = json.dumps(match_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    content_hash = hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+    oid = match_data.get('_id', {})
+    oid = oid.get('$oid') if isinstance(oid, dict) else oid
+    return (str(oid) if oid else f"sha1:{content_hash}"), content_hash
+
+def is_json_lines(json_path: str) -> bool:
+    """True if the file's first non-blank line is a complete JSON object"""
+    with open(json_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                try:
+                    return isinstance(json.loads(line), dict)
+                except json.JSONDecodeError:
+                    return False
+    return False
+
+def _feed_fingerprint(json_path: str, offset: int) -> str:
+    """Hash of a feed's first 64KB and the 4KB before `offset`, to tell an appended file from a rewritten one"""
+    digest = hashlib.sha1()
+    with open(json_path, 'rb') as f:
+        digest.update(f.read(min(offset, 1 << 16)))
+        f.seek(max(0, offset - 4096))
+        digest.update(f.read(min(offset, 4096)))
+    return digest.hexdigest()
+
+def iter_json_lines(json_path: str, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """Yield (match, byte offset just past it) from a JSON-lines file, starting at `offset`
+    
+    A last line that is still being written (no newline yet and not valid
+    JSON) is left for the next run rather than treated as an error.
+    """
+    with open(json_path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            end = offset + len(line)
+            if line.strip():
+                try:
+                    match_data = json.loads(line)
+                except json.JSONDecodeError:
+                    if not line.endswith(b'\n'):
+                        return
+                    raise
+                if isinstance(match_data, dict):
+                    yield match_data, end
+            offset = end
+
+def iter_json_matches(json_path: str, chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """Yield match objects one at a time from a JSON array, JSON-lines file or single object
+    
+    Only the object currently being decoded is held in memory, so large
+    exports can be ingested without loading the whole document.
+    """
+    decoder = json.JSONDecoder()
+    with open(json_path, 'r') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        read_size = chunk_size
+        while True:
+            # Skip whitespace, commas and the enclosing array brackets
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,[]':
+                pos += 1
+            if pos >= len(buffer):
+                if eof:
+                    return
+                buffer = f.read(read_size)
+                pos = 0
+                eof = not buffer
+                continue
+            
+            try:
+                match_data, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Object spans the chunk boundary - read more and retry
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                read_size *= 2
+                continue
+            
+            if isinstance(match_data, dict):
+                yield match_data
+            pos = end
+            read_size = chunk_size
+
 class CricketDatabase:
-    def __init__(self, db_path: str = "cricket_stats.db"):
+    def __init__(self, db_path: str = "cricket_stats.db", read_only: bool = False,
+                 immutable: bool = False, mmap_size: int = 0, snapshot_check_interval: float = 1.0):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.create_tables()
+        self.read_only = read_only
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.snapshot_check_interval = snapshot_check_interval
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        # Called after a commit that changed the data version
+        self._listeners = []
+        self._changed = False
+        self._pending_version = 0
+        # Snapshot swaps (os.replace of db_path) bump the generation so readers reopen
+        self._generation = 0
+        self._inode = self._stat_inode()
+        self._last_check = time.monotonic()
+        if read_only:
+            # Serving a published snapshot: no DDL, no WAL, every connection read-only
+            self.conn = self._open_reader()
+        else:
+            # Single writer connection for ingest; queries use per-thread readers
+            self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self.conn.row_factory = sqlite3.Row
+            if db_path != ":memory:":
+                # WAL lets readers keep querying while a load is writing
+                self.conn.execute("PRAGMA journal_mode = WAL")
+            self.create_tables()
+        # Bumped on every ingest so derived indexes and caches know to refresh
+        self._data_version = self._read_data_version()
+    
+    @property
+    def data_version(self) -> int:
+        """Current data version; read-only servers first check for a newly published snapshot"""
+        if self.read_only and self.db_path != ":memory:":
+            self._check_snapshot()
+        return self._data_version
     
     def create_tables(self):
         """Create tables for players, batting, bowling, and matches"""
@@ -83,39 +422,541 @@ class CricketDatabase:
             match_date TEXT
         )''')
         
+        # Database-wide settings such as the data version stamp
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        )''')
+        
+        # Alternative spellings and nicknames for player name resolution
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_aliases (
+            alias TEXT PRIMARY KEY,
+            player_id INTEGER,
+            FOREIGN KEY (player_id) REFERENCES players (player_id)
+        )''')
+        
+        # Per-player career aggregates, kept up to date on ingest
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_batting_summary (
+            player_id INTEGER PRIMARY KEY,
+            player_name TEXT,
+            innings INTEGER,
+            total_runs INTEGER,
+            highest_score INTEGER,
+            total_fours INTEGER,
+            total_sixes INTEGER,
+            total_balls INTEGER,
+            strike_rate_sum REAL
+        )''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_bowling_summary (
+            player_id INTEGER PRIMARY KEY,
+            player_name TEXT,
+            matches INTEGER,
+            total_wickets INTEGER,
+            total_runs INTEGER,
+            total_maidens INTEGER,
+            total_dots INTEGER,
+            total_balls INTEGER,
+            economy_sum REAL
+        )''')
+        
+        # One row per innings (both innings of a match) and one per delivery
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS innings (
+            id INTEGER PRIMARY KEY,
+            match_id TEXT,
+            innings_no INTEGER,
+            team_name TEXT,
+            runs INTEGER,
+            wickets INTEGER,
+            balls INTEGER,
+            overs TEXT,
+            run_rate REAL,
+            UNIQUE (match_id, innings_no)
+        )''')
+        
+        # Integer-coded; see deliveries.PHASES, EXTRA_TYPES and DISMISSALS for the codes
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS deliveries (
+            innings_id INTEGER,
+            seq INTEGER,
+            over_no INTEGER,
+            ball_no INTEGER,
+            phase INTEGER,
+            batter_id INTEGER,
+            bowler_id INTEGER,
+            runs INTEGER,
+            extras INTEGER,
+            extra_type INTEGER,
+            wicket INTEGER,
+            dismissed_id INTEGER,
+            PRIMARY KEY (innings_id, seq)
+        ) WITHOUT ROWID''')
+        
+        # Phase-wise and batter-vs-bowler aggregates, folded in as deliveries are inserted
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS innings_phases (
+            innings_id INTEGER,
+            phase INTEGER,
+            runs INTEGER,
+            balls INTEGER,
+            wickets INTEGER,
+            boundaries INTEGER,
+            dots INTEGER,
+            PRIMARY KEY (innings_id, phase)
+        ) WITHOUT ROWID''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_phase_batting (
+            player_id INTEGER,
+            phase INTEGER,
+            balls INTEGER,
+            runs INTEGER,
+            fours INTEGER,
+            sixes INTEGER,
+            dots INTEGER,
+            dismissals INTEGER,
+            PRIMARY KEY (player_id, phase)
+        ) WITHOUT ROWID''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_phase_bowling (
+            player_id INTEGER,
+            phase INTEGER,
+            balls INTEGER,
+            runs INTEGER,
+            wickets INTEGER,
+            dots INTEGER,
+            PRIMARY KEY (player_id, phase)
+        ) WITHOUT ROWID''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS matchups (
+            batter_id INTEGER,
+            bowler_id INTEGER,
+            balls INTEGER,
+            runs INTEGER,
+            dismissals INTEGER,
+            dots INTEGER,
+            fours INTEGER,
+            sixes INTEGER,
+            PRIMARY KEY (batter_id, bowler_id)
+        ) WITHOUT ROWID''')
+        
+        # Content hash of every loaded match, so reloading a feed skips or replaces instead of duplicating
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingested_matches (
+            match_id TEXT PRIMARY KEY,
+            content_hash TEXT,
+            ingested_at REAL
+        )''')
+        
+        # How far into each JSON-lines feed the last load got, to resume from there
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_files (
+            path TEXT PRIMARY KEY,
+            offset INTEGER,
+            head_hash TEXT
+        )''')
+        
         self.conn.commit()
+        self.migrate()
+        
+        # Databases loaded before the summaries existed need a one-off backfill
+        summarized = cursor.execute('SELECT EXISTS (SELECT 1 FROM player_batting_summary)').fetchone()[0]
+        has_innings = cursor.execute('SELECT EXISTS (SELECT 1 FROM batting_performances)').fetchone()[0]
+        if has_innings and not summarized:
+            self.rebuild_summaries()
+    
+    def migrate(self):
+        """Apply pending schema migrations, tracked in PRAGMA user_version"""
+        with self._write_lock:
+            current = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            for version, statements in enumerate(MIGRATIONS[current:], start=current + 1):
+                with self.transaction() as cursor:
+                    for statement in statements:
+                        # Data migrations are functions of the cursor; the rest are SQL
+                        if callable(statement):
+                            statement(cursor)
+                        else:
+                            cursor.execute(statement)
+                    cursor.execute(f"PRAGMA user_version = {version}")
+                logger.info(f"Applied schema migration {version}")
+    
+    @contextmanager
+    def transaction(self):
+        """Serialize writers and commit (or roll back) one write transaction"""
+        with self._write_lock:
+            cursor = self.conn.cursor()
+            try:
+                yield cursor
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                self._changed = False
+                raise
+            self._notify_listeners()
     
-    def load_json_data(self, json_path: str):
+    def add_listener(self, callback):
+        """Call `callback(data_version)` after each committed ingest, e.g. to extend in-memory indexes"""
+        self._listeners.append(callback)
+    
+    def _notify_listeners(self):
+        """After a commit: publish the bumped data version, then tell the listeners"""
+        if not self._changed:
+            return
+        self._changed = False
+        self._data_version = self._pending_version
+        for callback in self._listeners:
+            try:
+                callback(self.data_version)
+            except Exception as e:
+                logger.error(f"Ingest listener failed: {e}")
+    
+    def reader(self) -> sqlite3.Connection:
+        """Read-only connection owned by the calling thread"""
+        if self.db_path == ":memory:":
+            return self.conn
+        if self.read_only:
+            self._check_snapshot()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.generation != self._generation:
+            # The file was swapped for a new snapshot; drop the handle on the old one
+            with self._readers_lock:
+                if conn in self._readers:
+                    self._readers.remove(conn)
+            conn.close()
+            conn = None
+        if conn is None:
+            conn = self._open_reader()
+            self._local.conn = conn
+            self._local.generation = self._generation
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+    
+    def _open_reader(self) -> sqlite3.Connection:
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        if self.immutable:
+            # No locking or change detection; only safe for files that are never modified in place
+            uri += "&immutable=1"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA query_only = 1")
+        if self.mmap_size:
+            conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def _stat_inode(self) -> Optional[int]:
+        try:
+            return os.stat(self.db_path).st_ino
+        except OSError:
+            return None
+    
+    def _check_snapshot(self):
+        """Notice, at most once per interval, that a new snapshot was published over db_path"""
+        now = time.monotonic()
+        if now - self._last_check < self.snapshot_check_interval:
+            return
+        self._last_check = now
+        inode = self._stat_inode()
+        if inode is None or inode == self._inode:
+            return
+        with self._readers_lock:
+            if inode == self._inode:
+                return
+            old = self.conn
+            self.conn = self._open_reader()
+            self._inode = inode
+            self._data_version = self._read_data_version()
+            self._generation += 1
+        old.close()
+        logger.info(f"Switched to new database snapshot (data version {self._data_version})")
+    
+    def publish_snapshot(self, target_path: str) -> str:
+        """Atomically replace `target_path` with a consistent copy of this database
+        
+        The copy is written with the backup API beside the target, switched
+        to a rollback journal so it is one self-contained file, fsynced and
+        renamed over the target. Read-only servers keep using the old file
+        until they notice the new inode, then reopen.
+        """
+        target = Path(target_path).resolve()
+        if self.db_path != ":memory:" and target == Path(self.db_path).resolve():
+            raise ValueError("Snapshot target must differ from the database being copied")
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        start = time.perf_counter()
+        with self._write_lock:
+            dest = sqlite3.connect(str(tmp))
+            try:
+                self.conn.backup(dest)
+                dest.execute("PRAGMA journal_mode = DELETE")
+                dest.commit()
+            finally:
+                dest.close()
+        with open(tmp, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
+        dir_fd = os.open(target.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        logger.info(f"Published snapshot {target} in {time.perf_counter() - start:.2f}s")
+        return str(target)
+    
+    def close(self):
+        """Close the writer and every reader connection"""
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self.conn.close()
+    
+    def rebuild_summaries(self):
+        """Recompute the career summary tables from the performance tables in one pass"""
+        with self.transaction() as cursor:
+            cursor.execute('DELETE FROM player_batting_summary')
+            cursor.execute('DELETE FROM player_bowling_summary')
+            cursor.execute(REBUILD_SUMMARY_SQL['batting'].format(where=''))
+            cursor.execute(REBUILD_SUMMARY_SQL['bowling'].format(where=''))
+            self._bump_data_version(cursor)
+        logger.info("Rebuilt player career summaries")
+    
+    def load_json_data(self, json_path: str) -> Dict[str, float]:
         """Load your specific JSON format into database"""
+        start = time.perf_counter()
         with open(json_path, 'r') as f:
             data = json.load(f)
         
-        if isinstance(data, list):
-            for match_data in data:
-                self.process_match_data(match_data)
-        else:
-            self.process_match_data(data)
+        matches = data if isinstance(data, list) else [data]
+        rows = 0
+        for match_data in matches:
+            rows += self.process_match_data(match_data)
         
-        logger.info(f"Data loaded successfully from {json_path}")
+        stats = self._load_stats(len(matches), rows, time.perf_counter() - start)
+        logger.info(f"Data loaded successfully from {json_path} "
+                    f"({stats['rows']} rows, {stats['rows_per_sec']:.0f} rows/sec)")
+        return stats
     
-    def process_match_data(self, match_data: Dict):
-        """Process a single match data object"""
-        cursor = self.conn.cursor()
+    def load_json_stream(self, json_path: str, batch_size: int = 5000,
+                         commit_every: Optional[int] = None) -> Dict[str, float]:
+        """Stream matches from a JSON array or JSON-lines file using batched inserts
+        
+        Rows are buffered until `batch_size` rows are pending and written with
+        executemany. Everything is committed once at the end unless
+        `commit_every` (in matches) is given. Matches already loaded with the
+        same content are skipped and changed ones replace their own rows, so
+        re-running on a growing feed only writes the delta; JSON-lines files
+        also resume from the byte offset the previous load reached.
+        """
+        start = time.perf_counter()
+        pending = self._empty_batch()
+        pending_hashes = {}
+        pending_rows = 0
+        counts = {'new': 0, 'replaced': 0, 'skipped': 0}
+        match_count = 0
+        rows = 0
+        
+        with self.bulk_load_pragmas(), self.transaction() as cursor:
+            self._warn_unkeyed_rows(cursor)
+            records, offset = self._open_feed(cursor, json_path)
+            for match_data, end in records:
+                match_count += 1
+                offset = end if end is not None else offset
+                match_id, content_hash = match_identity(match_data)
+                stored = pending_hashes.get(match_id) or self._stored_hash(cursor, match_id)
+                if stored == content_hash:
+                    counts['skipped'] += 1
+                else:
+                    if stored is not None:
+                        # Flush first so an older copy still pending in this batch is replaced too
+                        rows += self._write_rows(cursor, pending)
+                        pending, pending_hashes, pending_rows = self._empty_batch(), {}, 0
+                        self._delete_match(cursor, match_id)
+                        counts['replaced'] += 1
+                    else:
+                        counts['new'] += 1
+                    match_rows = self._match_rows(match_data, match_id)
+                    match_rows['ingested'].append((match_id, content_hash, time.time()))
+                    for table, table_rows in match_rows.items():
+                        pending[table].extend(table_rows)
+                    pending_rows += sum(len(r) for r in match_rows.values())
+                    pending_hashes[match_id] = content_hash
+                
+                if pending_rows >= batch_size:
+                    rows += self._write_rows(cursor, pending)
+                    pending, pending_hashes, pending_rows = self._empty_batch(), {}, 0
+                
+                if commit_every and match_count % commit_every == 0:
+                    rows += self._write_rows(cursor, pending)
+                    pending, pending_hashes, pending_rows = self._empty_batch(), {}, 0
+                    self._save_offset(cursor, json_path, offset)
+                    if counts['new'] or counts['replaced']:
+                        self._bump_data_version(cursor)
+                    self.conn.commit()
+                    self._notify_listeners()
+            
+            rows += self._write_rows(cursor, pending)
+            self._save_offset(cursor, json_path, offset)
+            if counts['new'] or counts['replaced']:
+                self._bump_data_version(cursor)
+        
+        stats = self._load_stats(match_count, rows, time.perf_counter() - start)
+        stats.update(counts)
+        logger.info(f"Streamed {match_count} matches from {json_path}: {counts['new']} new, "
+                    f"{counts['replaced']} replaced, {counts['skipped']} unchanged "
+                    f"({stats['rows']} rows, {stats['rows_per_sec']:.0f} rows/sec)")
+        return stats
+    
+    def _open_feed(self, cursor: sqlite3.Cursor, json_path: str):
+        """(match, end offset) records to load, resuming a JSON-lines feed where the last load stopped"""
+        if not is_json_lines(json_path):
+            return ((match_data, None) for match_data in iter_json_matches(json_path)), None
+        offset = 0
+        saved = cursor.execute('SELECT offset, head_hash FROM ingest_files WHERE path = ?',
+                               (os.path.abspath(json_path),)).fetchone()
+        if saved and saved[0] <= os.path.getsize(json_path) \
+                and _feed_fingerprint(json_path, saved[0]) == saved[1]:
+            offset = saved[0]
+            logger.info(f"Resuming {json_path} at byte {offset}")
+        return iter_json_lines(json_path, offset), offset
+    
+    @staticmethod
+    def _save_offset(cursor: sqlite3.Cursor, json_path: str, offset: Optional[int]):
+        if offset is None:
+            return
+        cursor.execute('''
+        INSERT INTO ingest_files (path, offset, head_hash) VALUES (?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET offset = excluded.offset, head_hash = excluded.head_hash
+        ''', (os.path.abspath(json_path), offset, _feed_fingerprint(json_path, offset)))
+    
+    @staticmethod
+    def _stored_hash(cursor: sqlite3.Cursor, match_id: str) -> Optional[str]:
+        row = cursor.execute('SELECT content_hash FROM ingested_matches WHERE match_id = ?', (match_id,)).fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def _warn_unkeyed_rows(cursor: sqlite3.Cursor):
+        unkeyed = cursor.execute('SELECT COUNT(*) FROM batting_performances WHERE match_id IS NULL').fetchone()[0]
+        if unkeyed:
+            logger.warning(f"{unkeyed} batting rows were loaded before matches were keyed and cannot be "
+                           f"replaced on reload; run setup_database.py --rebuild to reload cleanly")
+    
+    def _delete_match(self, cursor: sqlite3.Cursor, match_id: str):
+        """Remove one match's rows and take them back out of every summary table"""
+        batters = [row[0] for row in cursor.execute(
+            'SELECT DISTINCT player_id FROM batting_performances WHERE match_id = ?', (match_id,)).fetchall()]
+        bowlers = [row[0] for row in cursor.execute(
+            'SELECT DISTINCT player_id FROM bowling_performances WHERE match_id = ?', (match_id,)).fetchall()]
+        cursor.execute('DELETE FROM batting_performances WHERE match_id = ?', (match_id,))
+        cursor.execute('DELETE FROM bowling_performances WHERE match_id = ?', (match_id,))
+        cursor.execute('DELETE FROM matches WHERE match_id = ?', (match_id,))
+        
+        # Phase and matchup totals are sums, so the old deliveries are subtracted back out
+        innings_ids = [(row[0],) for row in cursor.execute(
+            'SELECT id FROM innings WHERE match_id = ?', (match_id,)).fetchall()]
+        deliveries = []
+        for innings_id in innings_ids:
+            deliveries.extend(tuple(row) for row in cursor.execute('''
+            SELECT innings_id, seq, over_no, ball_no, phase, batter_id, bowler_id, runs, extras,
+                   extra_type, wicket, dismissed_id
+            FROM deliveries WHERE innings_id = ?
+            ''', innings_id).fetchall())
+        for table, table_rows in summarize(deliveries).items():
+            if table in PRUNE_SUMMARY_SQL:
+                cursor.executemany(UPSERT_SUMMARY_SQL[table],
+                                   [row[:2] + [-value for value in row[2:]] for row in table_rows])
+                cursor.executemany(PRUNE_SUMMARY_SQL[table], [row[:2] for row in table_rows])
+        cursor.executemany('DELETE FROM deliveries WHERE innings_id = ?', innings_ids)
+        cursor.executemany('DELETE FROM innings_phases WHERE innings_id = ?', innings_ids)
+        cursor.execute('DELETE FROM innings WHERE match_id = ?', (match_id,))
+        
+        # Career summaries hold maxima, so the affected players are recomputed instead
+        for table, players in (('batting', batters), ('bowling', bowlers)):
+            cursor.executemany(f'DELETE FROM player_{table}_summary WHERE player_id = ?',
+                               [(player_id,) for player_id in players])
+            cursor.executemany(REBUILD_SUMMARY_SQL[table].format(where='WHERE player_id = ?'),
+                               [(player_id,) for player_id in players])
+    
+    def clear_data(self):
+        """Delete every loaded match, its derived tables and the ingest bookkeeping; players are kept"""
+        with self.transaction() as cursor:
+            for table in ('batting_performances', 'bowling_performances', 'matches', 'innings', 'deliveries',
+                          'innings_phases', 'player_phase_batting', 'player_phase_bowling', 'matchups',
+                          'player_batting_summary', 'player_bowling_summary', 'ingested_matches',
+                          'ingest_files'):
+                cursor.execute(f'DELETE FROM {table}')
+            self._bump_data_version(cursor)
+        logger.info("Cleared all match data")
+    
+    @contextmanager
+    def bulk_load_pragmas(self):
+        """Relax durability and enlarge the page cache for the duration of a load"""
+        with self._write_lock:
+            cursor = self.conn.cursor()
+            synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+            cache_size = cursor.execute("PRAGMA cache_size").fetchone()[0]
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.execute("PRAGMA temp_store = MEMORY")
+            cursor.execute("PRAGMA cache_size = -65536")
+            try:
+                yield
+            finally:
+                cursor.execute(f"PRAGMA synchronous = {int(synchronous)}")
+                cursor.execute(f"PRAGMA cache_size = {int(cache_size)}")
+    
+    def process_match_data(self, match_data: Dict) -> int:
+        """Process a single match data object; unchanged matches are skipped and changed ones replaced"""
+        match_id, content_hash = match_identity(match_data)
+        with self.transaction() as cursor:
+            stored = self._stored_hash(cursor, match_id)
+            if stored == content_hash:
+                return 0
+            if stored is not None:
+                self._delete_match(cursor, match_id)
+            match_rows = self._match_rows(match_data, match_id)
+            match_rows['ingested'].append((match_id, content_hash, time.time()))
+            rows = self._write_rows(cursor, match_rows)
+            self._bump_data_version(cursor)
+        return rows
+    
+    def _read_data_version(self) -> int:
+        row = self.conn.execute("SELECT value FROM metadata WHERE key = 'data_version'").fetchone()
+        return row[0] if row else 0
+    
+    def _bump_data_version(self, cursor: sqlite3.Cursor):
+        """Advance the persisted data version inside the current write transaction
+
+        Readers and caches keep seeing the old version until the commit, in
+        _notify_listeners, so nothing is cached against uncommitted data.
+        """
+        cursor.execute('''
+        INSERT INTO metadata (key, value) VALUES ('data_version', 1)
+        ON CONFLICT (key) DO UPDATE SET value = value + 1
+        ''')
+        self._pending_version = cursor.execute("SELECT value FROM metadata WHERE key = 'data_version'").fetchone()[0]
+        self._changed = True
+    
+    def _match_rows(self, match_data: Dict, match_id: str) -> Dict[str, List[tuple]]:
+        """Build the insert rows for a single match object, keyed by `match_id`"""
+        rows = self._empty_batch()
         
         # Process batting data
         if 'latestBatting' in match_data:
             batting = match_data['latestBatting']
             for key, batsman in batting.items():
                 if isinstance(batsman, dict) and 'playerID' in batsman:
-                    # Insert player
-                    cursor.execute('''
-                    INSERT OR IGNORE INTO players (player_id, first_name, last_name, full_name, batting_style)
-                    VALUES (?, ?, ?, ?, ?)
-                    ''', (
+                    full_name = f"{batsman.get('firstName', '')} {batsman.get('lastName', '')}"
+                    rows['batting_players'].append((
                         batsman['playerID'],
                         batsman.get('firstName', ''),
                         batsman.get('lastName', ''),
-                        f"{batsman.get('firstName', '')} {batsman.get('lastName', '')}",
+                        full_name,
                         batsman.get('battingStyle', '')
                     ))
                     
@@ -124,14 +965,10 @@ class CricketDatabase:
                     if batsman.get('ballsFaced', 0) > 0:
                         strike_rate = (batsman.get('runsScored', 0) / batsman.get('ballsFaced', 0)) * 100
                     
-                    # Insert batting performance
-                    cursor.execute('''
-                    INSERT INTO batting_performances 
-                    (player_id, player_name, runs_scored, balls_faced, fours, sixes, strike_rate, is_out, how_out)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
+                    rows['batting'].append((
+                        match_id,
                         batsman['playerID'],
-                        f"{batsman.get('firstName', '')} {batsman.get('lastName', '')}",
+                        full_name,
                         batsman.get('runsScored', 0),
                         batsman.get('ballsFaced', 0),
                         batsman.get('fours', 0),
@@ -146,15 +983,12 @@ class CricketDatabase:
             bowling = match_data['latestBowling']
             for key, bowler in bowling.items():
                 if isinstance(bowler, dict) and 'playerID' in bowler:
-                    # Insert player
-                    cursor.execute('''
-                    INSERT OR IGNORE INTO players (player_id, first_name, last_name, full_name, bowling_style)
-                    VALUES (?, ?, ?, ?, ?)
-                    ''', (
+                    full_name = f"{bowler.get('firstName', '')} {bowler.get('lastName', '')}"
+                    rows['bowling_players'].append((
                         bowler['playerID'],
                         bowler.get('firstName', ''),
                         bowler.get('lastName', ''),
-                        f"{bowler.get('firstName', '')} {bowler.get('lastName', '')}",
+                        full_name,
                         bowler.get('bowlingStyle', '')
                     ))
                     
@@ -163,16 +997,10 @@ class CricketDatabase:
                     if bowler.get('balls', 0) > 0:
                         economy = (bowler.get('runs', 0) * 6) / bowler.get('balls', 0)
                     
-                    # Insert bowling performance
-                    cursor.execute('''
-                    INSERT INTO bowling_performances
-                    (match_id, player_id, player_name, overs, balls, runs_conceded, wickets, 
-                     maidens, dot_balls, wides, no_balls, economy)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        str(bowler.get('matchID', '')),
+                    rows['bowling'].append((
+                        match_id,
                         bowler['playerID'],
-                        f"{bowler.get('firstName', '')} {bowler.get('lastName', '')}",
+                        full_name,
                         bowler.get('overs', '0'),
                         bowler.get('balls', 0),
                         bowler.get('runs', 0),
@@ -184,29 +1012,112 @@ class CricketDatabase:
                         economy
                     ))
         
-        # Process match/innings data
-        if 'innings1Balls' in match_data:
-            innings = match_data['innings1Balls']
-            
-            # Extract run rate
-            run_rate = 0
-            if '/' in innings.get('overs', '0'):
-                overs_decimal = self.overs_to_decimal(innings.get('overs', '0.0'))
-                if overs_decimal > 0:
-                    run_rate = innings.get('runs', 0) / overs_decimal
-            
-            cursor.execute('''
-            INSERT OR IGNORE INTO matches (match_id, team_name, total_runs, total_overs, run_rate)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (
-                match_data.get('_id', {}).get('$oid', 'unknown'),
-                innings.get('teamName', ''),
-                innings.get('runs', 0),
-                innings.get('overs', '0'),
-                run_rate
+        # Process match/innings data: every inningsNBalls object, ball by ball when the export has balls
+        for innings_no, innings in match_innings(match_data):
+            summary, balls = parse_innings(innings)
+            rows['innings'].append((
+                match_id, innings_no, summary['team_name'], summary['runs'], summary['wickets'],
+                summary['balls'], summary['overs'], summary['run_rate']
             ))
+            rows['deliveries'].extend((match_id, innings_no) + ball for ball in balls)
+            
+            # The matches row keeps describing the first innings
+            if innings_no == 1:
+                rows['matches'].append((
+                    match_id,
+                    summary['team_name'],
+                    summary['runs'],
+                    summary['overs'],
+                    summary['wickets'],
+                    summary['run_rate'],
+                    match_date(match_data)
+                ))
         
-        self.conn.commit()
+        return rows
+    
+    @staticmethod
+    def _empty_batch() -> Dict[str, List[tuple]]:
+        return {table: [] for table in list(INSERT_SQL) + ['innings', 'deliveries', 'ingested']}
+    
+    @staticmethod
+    def _write_rows(cursor: sqlite3.Cursor, rows: Dict[str, List[tuple]]) -> int:
+        """Write a batch of rows with one executemany per statement"""
+        written = 0
+        for table, sql in INSERT_SQL.items():
+            if rows[table]:
+                cursor.executemany(sql, rows[table])
+                written += len(rows[table])
+        
+        # Fold the batch into the career summaries, one upsert per player
+        batting = {}
+        for (_, player_id, name, runs, balls, fours, sixes, strike_rate, _, _) in rows['batting']:
+            current = batting.get(player_id)
+            if current is None:
+                batting[player_id] = [player_id, name, 1, runs, runs, fours, sixes, balls, strike_rate]
+            else:
+                current[2] += 1
+                current[3] += runs
+                current[4] = max(current[4], runs)
+                current[5] += fours
+                current[6] += sixes
+                current[7] += balls
+                current[8] += strike_rate
+        
+        bowling = {}
+        for (_, player_id, name, _, balls, runs, wickets, maidens, dots, _, _, economy) in rows['bowling']:
+            current = bowling.get(player_id)
+            if current is None:
+                bowling[player_id] = [player_id, name, 1, wickets, runs, maidens, dots, balls, economy]
+            else:
+                current[2] += 1
+                current[3] += wickets
+                current[4] += runs
+                current[5] += maidens
+                current[6] += dots
+                current[7] += balls
+                current[8] += economy
+        
+        if batting:
+            cursor.executemany(UPSERT_SUMMARY_SQL['batting'], list(batting.values()))
+        if bowling:
+            cursor.executemany(UPSERT_SUMMARY_SQL['bowling'], list(bowling.values()))
+        if rows['ingested']:
+            cursor.executemany(INGESTED_SQL, rows['ingested'])
+        return written + CricketDatabase._write_innings(cursor, rows['innings'], rows['deliveries'])
+    
+    @staticmethod
+    def _write_innings(cursor: sqlite3.Cursor, innings: List[tuple], deliveries: List[tuple]) -> int:
+        """Insert innings and their deliveries, then fold the deliveries into the phase and matchup tables
+        
+        An innings that is already stored is skipped along with its
+        deliveries, so the aggregates never count a ball twice.
+        """
+        ids = {}
+        for row in innings:
+            cursor.execute(INNINGS_SQL, row)
+            if cursor.rowcount:
+                ids[row[:2]] = cursor.lastrowid
+        rows, seen = [], set()
+        for ball in deliveries:
+            innings_id = ids.get(ball[:2])
+            # A match repeated within one batch shares the first copy's innings id
+            if innings_id is not None and (innings_id, ball[2]) not in seen:
+                seen.add((innings_id, ball[2]))
+                rows.append((innings_id,) + ball[2:])
+        if rows:
+            cursor.executemany(DELIVERY_SQL, rows)
+            for table, table_rows in summarize(rows).items():
+                cursor.executemany(UPSERT_SUMMARY_SQL[table], table_rows)
+        return len(ids) + len(rows)
+    
+    @staticmethod
+    def _load_stats(matches: int, rows: int, seconds: float) -> Dict[str, float]:
+        return {
+            'matches': matches,
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_sec': rows / seconds if seconds > 0 else 0.0
+        }
     
     def overs_to_decimal(self, overs_str: str) -> float:
         """Convert overs like '20.3' to decimal 20.5"""
@@ -215,10 +1126,26 @@ class CricketDatabase:
             return float(overs) + (float(balls) / 6)
         return float(overs_str)
     
-    def execute_query(self, query: str) -> pd.DataFrame:
-        """Execute SQL query and return DataFrame"""
+    def fetch_all(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Execute a parameterized query and return rows addressable by column name"""
+        try:
+            with span("sql"):
+                return self.reader().execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Query error: {e}")
+            return []
+    
+    def fetch_one(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        """Execute a parameterized query and return its first row, if any"""
+        rows = self.fetch_all(query, params)
+        return rows[0] if rows else None
+    
+    def execute_query(self, query: str, params: tuple = ()) -> "pd.DataFrame":
+        """Execute SQL query and return DataFrame (for analytical exports; tools use fetch_all)"""
+        import pandas as pd
         try:
-            return pd.read_sql_query(query, self.conn)
+            with span("sql"):
+                return pd.read_sql_query(query, self.reader(), params=params)
         except Exception as e:
             logger.error(f"Query error: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
@@ -0,0 +1,294 @@
+"""
+Ball-by-ball parsing for innings1Balls / innings2Balls
+Turns each innings object into a summary plus integer-coded delivery rows and
+folds deliveries into the phase and batter-vs-bowler aggregates kept at ingest
+"""
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# innings1Balls, innings2Balls, ...
+INNINGS_KEY = re.compile(r'^innings(\d+)Balls$')
+
+# Phases by 0-based over: powerplay is overs 1-6, middle 7-15, death 16 onwards
+PHASES = ('powerplay', 'middle', 'death')
+PHASE_START_OVERS = (0, 6, 15)
+
+# Integer codes stored in deliveries.extra_type and deliveries.wicket (0 = none)
+EXTRA_TYPES = ('', 'wide', 'noball', 'bye', 'legbye', 'penalty')
+DISMISSALS = ('', 'b', 'c', 'lbw', 'ro', 'st', 'ctw', 'hw', 'other')
+# Dismissals credited to the bowler; run outs and the rest are not
+BOWLER_WICKETS = {DISMISSALS.index(code) for code in ('b', 'c', 'lbw', 'st', 'ctw', 'hw')}
+
+EXTRA_ALIASES = {
+    'wd': 'wide', 'w': 'wide', 'wide': 'wide', 'wides': 'wide',
+    'nb': 'noball', 'noball': 'noball', 'no ball': 'noball', 'no-ball': 'noball', 'noballs': 'noball',
+    'b': 'bye', 'bye': 'bye', 'byes': 'bye',
+    'lb': 'legbye', 'legbye': 'legbye', 'leg bye': 'legbye', 'legbyes': 'legbye', 'leg byes': 'legbye',
+    'p': 'penalty', 'pen': 'penalty', 'penalty': 'penalty',
+}
+# Per-ball flag or count fields that mark an extra when the export has no extraType
+EXTRA_FLAGS = {
+    'wide': ('isWide', 'wide', 'wides'),
+    'noball': ('isNoBall', 'noBall', 'noball', 'noBalls'),
+    'bye': ('byes', 'bye'),
+    'legbye': ('legByes', 'legbyes', 'legBye'),
+}
+DISMISSAL_ALIASES = {
+    'bowled': 'b', 'caught': 'c', 'run out': 'ro', 'runout': 'ro', 'stumped': 'st',
+    'hit wicket': 'hw', 'caught behind': 'ctw',
+}
+
+# Alternative spellings of each per-ball field, in order of preference
+BALL_FIELDS = {
+    'batter': ('batsmanID', 'batterID', 'strikerID', 'batsmanId', 'batterId', 'strikerId', 'playerID'),
+    'bowler': ('bowlerID', 'bowlerId'),
+    'dismissed': ('dismissedID', 'outPlayerID', 'playerOutID', 'dismissedId'),
+    'runs': ('batRuns', 'runsOffBat', 'runs', 'runsScored'),
+    'wicket': ('isWicket', 'wicket', 'isOut', 'out'),
+    'how_out': ('howOut', 'dismissal', 'wicketType', 'dismissalType'),
+    'extras': ('extras', 'extraRuns'),
+    'extra_type': ('extraType', 'extrasType', 'extra'),
+    'over': ('over', 'overNumber', 'overNo', 'overs', 'overBall'),
+    'ball': ('ball', 'ballNumber', 'ballNo'),
+}
+
+def _first(item: Dict, keys: Iterable[str], default: Any = None) -> Any:
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, ''):
+            return value
+    return default
+
+def _int(value: Any, default: int = 0) -> int:
+    if type(value) is int:
+        return value
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+def _player_id(value: Any) -> Optional[int]:
+    return _int(value, None) if value not in (None, '') else None
+
+def _flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+def phase_of(over: int) -> int:
+    """Phase code (index into PHASES) for a 0-based over number"""
+    phase = 0
+    for code, start in enumerate(PHASE_START_OVERS):
+        if over >= start:
+            phase = code
+    return phase
+
+def overs_to_balls(overs: Any) -> int:
+    """Legal balls in an overs figure such as '19.4' or 20; 0 if it cannot be read"""
+    text = str(overs or '0').strip()
+    whole, _, part = text.partition('.')
+    return _int(whole) * 6 + _int(part or 0)
+
+def balls_to_overs(balls: int) -> str:
+    return f"{balls // 6}.{balls % 6}"
+
+def run_rate(runs: int, balls: int) -> float:
+    return runs * 6 / balls if balls > 0 else 0.0
+
+def match_date(match_data: Dict) -> Optional[str]:
+    """Date the match was played, falling back to the creation time in its ObjectId"""
+    explicit = _first(match_data, ('matchDate', 'date', 'startDate'))
+    if isinstance(explicit, str):
+        return explicit[:10]
+    oid = match_data.get('_id', {})
+    oid = oid.get('$oid') if isinstance(oid, dict) else oid
+    try:
+        seconds = int(str(oid)[:8], 16)
+    except ValueError:
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).date().isoformat()
+
+def ball_list(innings: Any) -> List[Dict]:
+    """Per-ball entries of an innings, whichever of the known shapes the export uses
+
+    Accepts a list of balls, a `balls`/`deliveries` list or numbered dict, or
+    balls stored under numeric keys beside the summary fields (the shape
+    latestBatting uses). Summary-only innings have no balls.
+    """
+    if isinstance(innings, list):
+        return [ball for ball in innings if isinstance(ball, dict)]
+    if not isinstance(innings, dict):
+        return []
+    for key in ('balls', 'deliveries', 'ballByBall'):
+        nested = innings.get(key)
+        if isinstance(nested, (list, dict)):
+            return ball_list(nested)
+    numbered = [(int(key), ball) for key, ball in innings.items()
+                if str(key).isdigit() and isinstance(ball, dict)]
+    return [ball for _, ball in sorted(numbered, key=lambda item: item[0])]
+
+def _present(balls: List[Dict]) -> Dict[str, Tuple[str, ...]]:
+    """The spellings of each field this innings actually uses, so each ball checks only those"""
+    keys = set().union(*balls) if balls else set()
+    fields = {name: tuple(key for key in aliases if key in keys) for name, aliases in BALL_FIELDS.items()}
+    fields.update((f'flag_{name}', tuple(key for key in aliases if key in keys))
+                  for name, aliases in EXTRA_FLAGS.items())
+    return fields
+
+def _extra(ball: Dict, fields: Dict[str, Tuple[str, ...]]) -> Tuple[int, int]:
+    """(extra runs, extra type code) for one ball"""
+    extras = _int(_first(ball, fields['extras']))
+    kind = _first(ball, fields['extra_type'])
+    if isinstance(kind, str):
+        name = EXTRA_ALIASES.get(kind.strip().lower(), '')
+        if name:
+            return max(extras, 1 if name in ('wide', 'noball') else 0), EXTRA_TYPES.index(name)
+    for name in EXTRA_FLAGS:
+        value = _first(ball, fields[f'flag_{name}'])
+        if value is None or not _flag(value):
+            continue
+        count = _int(value) if not isinstance(value, bool) else 0
+        if name in ('wide', 'noball'):
+            # A wide or no-ball is at least one run; a count above 1 includes runs taken
+            return max(extras, count, 1), EXTRA_TYPES.index(name)
+        return max(extras, count), EXTRA_TYPES.index(name)
+    return extras, 0
+
+def _dismissal(ball: Dict, fields: Dict[str, Tuple[str, ...]]) -> int:
+    how_out = _first(ball, fields['how_out'])
+    wicket = _first(ball, fields['wicket'])
+    if wicket is not None and not _flag(wicket):
+        return 0
+    if isinstance(how_out, str):
+        code = how_out.strip().lower()
+        code = DISMISSAL_ALIASES.get(code, code)
+        return DISMISSALS.index(code) if code in DISMISSALS else DISMISSALS.index('other')
+    return DISMISSALS.index('other') if wicket is not None else 0
+
+def _position(ball: Dict, fields: Dict[str, Tuple[str, ...]], legal_balls: int) -> Tuple[int, int]:
+    """0-based over and ball-in-over from the ball's own fields, else from the running count"""
+    over = _first(ball, fields['over'])
+    number = _first(ball, fields['ball'])
+    if over is not None and number is None and '.' in str(over):
+        # "3.4": the fourth ball of the fourth over
+        whole, _, part = str(over).partition('.')
+        return _int(whole), _int(part)
+    if over is not None:
+        return _int(over), _int(number, legal_balls % 6 + 1)
+    return legal_balls // 6, legal_balls % 6 + 1
+
+def parse_innings(innings: Any) -> Tuple[Dict, List[tuple]]:
+    """Summary fields and delivery rows for one innings object
+
+    Delivery rows are (seq, over_no, ball_no, phase, batter_id, bowler_id,
+    runs, extras, extra_type, wicket, dismissed_id). Summary fields given
+    by the export win over totals counted from the balls.
+    """
+    balls = ball_list(innings)
+    fields = _present(balls)
+    rows = []
+    legal = runs = wickets = 0
+    for seq, ball in enumerate(balls, start=1):
+        extras, extra_type = _extra(ball, fields)
+        over, number = _position(ball, fields, legal)
+        wicket = _dismissal(ball, fields)
+        batter = _player_id(_first(ball, fields['batter']))
+        bat_runs = _int(_first(ball, fields['runs']))
+        if EXTRA_TYPES[extra_type] in ('bye', 'legbye') and not extras:
+            # Byes flagged without an extras count are carried in the ball's runs
+            bat_runs, extras = 0, bat_runs
+        rows.append((
+            seq, over, number, phase_of(over), batter,
+            _player_id(_first(ball, fields['bowler'])), bat_runs, extras, extra_type, wicket,
+            _player_id(_first(ball, fields['dismissed'], batter)) if wicket else None,
+        ))
+        legal += EXTRA_TYPES[extra_type] not in ('wide', 'noball')
+        runs += bat_runs + extras
+        wickets += bool(wicket)
+
+    summary_fields = innings if isinstance(innings, dict) else {}
+    overs = summary_fields.get('overs')
+    total_balls = legal if rows else overs_to_balls(overs)
+    declared_wickets = _first(summary_fields, ('wickets', 'wkts'))
+    summary = {
+        'team_name': summary_fields.get('teamName', ''),
+        'runs': _int(summary_fields['runs']) if 'runs' in summary_fields else runs,
+        'wickets': _int(declared_wickets) if declared_wickets is not None else wickets if rows else None,
+        'balls': total_balls,
+        'overs': str(overs) if overs is not None else balls_to_overs(total_balls),
+    }
+    summary['run_rate'] = run_rate(summary['runs'], overs_to_balls(summary['overs']) or total_balls)
+    return summary, rows
+
+def match_innings(match_data: Dict) -> List[Tuple[int, Any]]:
+    """(innings number, innings object) for every inningsNBalls key, in order"""
+    found = []
+    for key, innings in match_data.items():
+        numbered = INNINGS_KEY.match(key)
+        if numbered and isinstance(innings, (dict, list)):
+            found.append((int(numbered.group(1)), innings))
+    return sorted(found, key=lambda item: item[0])
+
+def summarize(deliveries: List[tuple]) -> Dict[str, List[list]]:
+    """Fold delivery rows (innings_id first) into the rows of each aggregate table
+
+    Returns rows for innings_phases, player_phase_batting,
+    player_phase_bowling and matchups, one per key, ready to upsert.
+    """
+    innings_phases, batting, bowling, matchups = {}, {}, {}, {}
+    for (innings_id, _, _, _, phase, batter, bowler, runs, extras, extra_type, wicket, dismissed) in deliveries:
+        kind = EXTRA_TYPES[extra_type]
+        legal = kind not in ('wide', 'noball')
+        faced = kind != 'wide'
+        four, six = runs == 4, runs == 6
+        # Byes and leg byes are not charged to the bowler
+        conceded = runs + (extras if kind in ('wide', 'noball') else 0)
+        bowler_wicket = wicket in BOWLER_WICKETS
+        batter_out = bool(wicket) and dismissed == batter
+
+        team = innings_phases.setdefault((innings_id, phase), [innings_id, phase, 0, 0, 0, 0, 0])
+        team[2] += runs + extras
+        team[3] += legal
+        team[4] += bool(wicket)
+        team[5] += four or six
+        team[6] += legal and runs + extras == 0
+
+        if batter is not None:
+            stats = batting.setdefault((batter, phase), [batter, phase, 0, 0, 0, 0, 0, 0])
+            stats[2] += faced
+            stats[3] += runs
+            stats[4] += four
+            stats[5] += six
+            stats[6] += faced and runs == 0
+            stats[7] += batter_out
+
+        if bowler is not None:
+            stats = bowling.setdefault((bowler, phase), [bowler, phase, 0, 0, 0, 0])
+            stats[2] += legal
+            stats[3] += conceded
+            stats[4] += bowler_wicket
+            stats[5] += legal and conceded == 0
+
+        if batter is not None and bowler is not None:
+            stats = matchups.setdefault((batter, bowler), [batter, bowler, 0, 0, 0, 0, 0, 0])
+            stats[2] += faced
+            stats[3] += runs
+            stats[4] += batter_out and bowler_wicket
+            stats[5] += faced and runs == 0
+            stats[6] += four
+            stats[7] += six
+
+    return {
+        'innings_phases': list(innings_phases.values()),
+        'phase_batting': list(batting.values()),
+        'phase_bowling': list(bowling.values()),
+        'matchups': list(matchups.values()),
+    }
+
+def phase_label(phase: int) -> str:
+    """'Powerplay (overs 1-6)' style label for a phase code"""
+    first = PHASE_START_OVERS[phase] + 1
+    if phase + 1 < len(PHASES):
+        return f"{PHASES[phase].title()} (overs {first}-{PHASE_START_OVERS[phase + 1]})"
+    return f"{PHASES[phase].title()} (overs {first}+)"
@@ -0,0 +1,137 @@
+"""
+Deterministic stand-in for the Gemini chat model
+Emits scripted tool calls so the agent, server and benchmarks can run
+offline without spending API quota
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that plans tool calls with simple rules instead of an LLM
+
+    With `script` set, the given messages are returned in turn (cycling).
+    Otherwise the latest question is planned from keywords: every known
+    player named in it gets a stats call (so multi-player questions
+    produce parallel tool calls), "top"/"best" asks for a ranking, and
+    once tool results are in, the final answer joins them. `latency` is
+    slept per call, `token_delay` per streamed word and `error_rate` makes
+    a seeded fraction of calls raise. `slow_rate` of calls sleep
+    `slow_latency` instead, to mimic a provider with a long latency tail.
+    """
+
+    script: Optional[List[AIMessage]] = None
+    player_names: List[str] = []
+    latency: float = 0.0
+    token_delay: float = 0.0
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    seed: int = 0
+
+    _calls: int = PrivateAttr(default=0)
+    _rng: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any):
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs):
+        # Calls are planned by name; the schemas are bound only so token counts include them, as with Gemini
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _delay(self) -> float:
+        if self.slow_rate and self._rng.random() < self.slow_rate:
+            return self.slow_latency
+        return self.latency
+
+    def _next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        self._calls += 1
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise RuntimeError(f"Scripted model failure on call {self._calls}")
+        if self.script:
+            return self.script[(self._calls - 1) % len(self.script)]
+        return self.plan(messages)
+
+    def plan(self, messages: List[BaseMessage]) -> AIMessage:
+        """Tool calls for the latest question, or a final answer once tool results are in"""
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        results = [m.content for m in messages[last_human + 1:] if isinstance(m, ToolMessage)]
+        if results:
+            return AIMessage(content="\n\n".join(str(result).strip() for result in results))
+
+        question = messages[last_human].content if last_human >= 0 else ""
+        if isinstance(question, list):
+            question = " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in question)
+        text = question.lower()
+        # In the order they are named, so "A against B" keeps A as the batter
+        players = sorted((name for name in self.player_names if name.lower() in text),
+                         key=lambda name: text.index(name.lower()))
+        tool = ("get_phase_stats" if re.search(r"powerplay|power play|death overs?|middle overs|phase", text)
+                else "get_player_bowling_stats" if "bowl" in text
+                else "analyze_recent_form" if "form" in text
+                else "get_player_batting_stats")
+
+        calls = []
+        if len(players) == 2 and "compare" in text:
+            metric = "wickets" if "bowl" in text or "wicket" in text else "runs"
+            calls.append(("compare_players", {"player1": players[0], "player2": players[1], "metric": metric}))
+        elif len(players) == 2 and "against" in text:
+            calls.append(("get_matchup", {"batter": players[0], "bowler": players[1]}))
+        else:
+            calls.extend((tool, {"player_name": name}) for name in players)
+        if re.search(r"\b(top|best|leading)\b", text):
+            calls.append(("get_top_performers", {"category": "bowlers" if "bowler" in text else "batsmen", "limit": 5}))
+
+        if not calls:
+            return AIMessage(content="I can only answer questions about the players and matches in the database.")
+        return AIMessage(content="", tool_calls=[
+            {"name": name, "args": args, "id": f"call_{self._calls}_{i}", "type": "tool_call"}
+            for i, (name, args) in enumerate(calls)
+        ])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs) -> ChatResult:
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        message = self._next_message(messages)
+        # Any text before the tool calls streams first, as Gemini's preambles do
+        for word in re.findall(r"\S+\s*", message.content):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ]))
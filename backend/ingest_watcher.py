@@ -0,0 +1,163 @@
+"""
+Background ingest for the cricket chatbot
+Polls a directory or a single JSON/JSON-lines file and loads new matches in
+micro-batches, so live data reaches chat answers without a restart
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from metrics import ERRORS, INGESTED
+
+logger = logging.getLogger(__name__)
+
+FEED_SUFFIXES = ('.json', '.jsonl', '.ndjson')
+
+class IngestWatcher:
+    """Poll `path` and stream changed files into `db`
+
+    JSON-lines files are loaded as soon as they grow; the loader resumes
+    from its saved offset and leaves a half-written last line for the next
+    poll. JSON arrays are only loaded once their size and mtime have held
+    still for one poll, so a file that is still being copied is not parsed.
+    Every `batch_matches` matches are committed, which bumps the data
+    version; caches keyed on it and the player index refresh on their own.
+    """
+
+    def __init__(self, db, path: str, interval: float = 1.0, batch_matches: int = 50,
+                 batch_size: int = 5000, snapshot: Optional[str] = None):
+        self.db = db
+        self.path = Path(path)
+        self.interval = interval
+        self.batch_matches = batch_matches
+        self.batch_size = batch_size
+        self.snapshot = snapshot
+        self._seen: Dict[Path, Tuple[int, int]] = {}
+        self._pending: Dict[Path, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.totals = {'polls': 0, 'files': 0, 'new': 0, 'replaced': 0, 'skipped': 0, 'errors': 0}
+        self.last_ingest: Optional[float] = None
+
+    def start(self):
+        """Run the poll loop on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="ingest-watcher", daemon=True)
+            self._thread.start()
+            logger.info(f"Watching {self.path} for new matches every {self.interval}s")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                ERRORS.inc(source="ingest")
+                logger.error(f"Ingest poll failed: {e}")
+            self._stop.wait(self.interval)
+
+    def poll(self) -> int:
+        """Ingest every changed file once; returns the number of new or replaced matches"""
+        changed = 0
+        for change in self._changed_files():
+            if self._stop.is_set():
+                break
+            changed += self._ingest(change)
+        with self._lock:
+            self.totals['polls'] += 1
+        if changed and self.snapshot:
+            self.db.publish_snapshot(self.snapshot)
+        return changed
+
+    def _files(self) -> List[Path]:
+        if self.path.is_dir():
+            return sorted(p for p in self.path.iterdir()
+                          if p.suffix in FEED_SUFFIXES and p.is_file() and not p.name.startswith('.'))
+        return [self.path] if self.path.is_file() else []
+
+    def _changed_files(self) -> List[Tuple[Path, Tuple[int, int]]]:
+        changed = []
+        for feed in self._files():
+            try:
+                stat = feed.stat()
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._seen.get(feed) == signature:
+                continue
+            if feed.suffix == '.json' and self._pending.get(feed) != signature:
+                # Wait one more poll in case the file is still being written
+                self._pending[feed] = signature
+                continue
+            self._pending.pop(feed, None)
+            changed.append((feed, signature))
+        return changed
+
+    def _ingest(self, change: Tuple[Path, Tuple[int, int]]) -> int:
+        feed, signature = change
+        try:
+            stats = self.db.load_json_stream(str(feed), batch_size=self.batch_size,
+                                             commit_every=self.batch_matches)
+        except Exception as e:
+            # Left unmarked so the file is retried once it changes again
+            ERRORS.inc(source="ingest")
+            with self._lock:
+                self.totals['errors'] += 1
+            logger.error(f"Ingest of {feed} failed: {e}")
+            return 0
+        self._seen[feed] = signature
+        with self._lock:
+            self.totals['files'] += 1
+            for outcome in ('new', 'replaced', 'skipped'):
+                self.totals[outcome] += stats[outcome]
+                INGESTED.inc(stats[outcome], outcome=outcome)
+            if stats['new'] or stats['replaced']:
+                self.last_ingest = time.time()
+        return stats['new'] + stats['replaced']
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.totals, 'path': str(self.path), 'last_ingest': self.last_ingest,
+                    'data_version': self.db.data_version}
+
+def watcher_from_env(db) -> Optional[IngestWatcher]:
+    """An IngestWatcher for INGEST_WATCH_DIR, or None when it is unset"""
+    path = os.getenv("INGEST_WATCH_DIR")
+    if not path:
+        return None
+    return IngestWatcher(
+        db, path,
+        interval=float(os.getenv("INGEST_POLL_INTERVAL", "1")),
+        batch_matches=int(os.getenv("INGEST_BATCH_MATCHES", "50"))
+    )
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from database import CricketDatabase
+
+    parser = argparse.ArgumentParser(description="Watch a directory or feed file and ingest new matches")
+    parser.add_argument("path", help="Directory of .json/.jsonl files, or a single feed file")
+    parser.add_argument("--db", default="cricket_stats.db", help="Database file to load into")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polls")
+    parser.add_argument("--batch-matches", type=int, default=50, help="Commit every N matches")
+    parser.add_argument("--snapshot", help="Publish a copy here after each poll that changed data")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    watcher = IngestWatcher(CricketDatabase(args.db), args.path, interval=args.interval,
+                            batch_matches=args.batch_matches, snapshot=args.snapshot)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,37 @@
+"""
+Lightweight latency tracking for request paths
+Keeps a bounded window of samples and reports count and percentiles
+"""
+import math
+import threading
+from collections import deque
+from typing import Dict
+
+class LatencyStats:
+    """Rolling window of latency samples in seconds"""
+
+    def __init__(self, window: int = 10000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile of the current window, in seconds"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        rank = max(0, math.ceil(pct / 100 * len(samples)) - 1)
+        return samples[rank]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "p50_ms": self.percentile(50) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+        }
@@ -0,0 +1,316 @@
+"""
+Resilience wrapper for the agent's chat model
+Bounds each LLM call with deadlines, jittered retries, optional hedged
+requests and a circuit breaker, so a slow or failing provider cannot hold
+a chat request indefinitely
+"""
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from latency import LatencyStats
+from metrics import LLM_CALLS
+
+logger = logging.getLogger(__name__)
+
+# End-of-response marker on a request's event queue
+_DONE = object()
+
+class LLMUnavailable(Exception):
+    """The model could not answer in time; callers should degrade rather than fail"""
+
+class LLMTimeout(LLMUnavailable):
+    """An LLM call ran past its deadline"""
+
+class CircuitOpen(LLMUnavailable):
+    """The circuit breaker is open, so the call was not attempted"""
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failed attempts
+
+    While open, calls fail fast. After `reset_timeout` seconds one probe
+    call is let through (half-open); its success closes the breaker and its
+    failure opens it again. A probe that ends without either (an abandoned
+    stream) must be released so the next call can probe instead.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        # The call holding the half-open probe, or None
+        self._probing = None
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._probing is not None or time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow(self, call: object = None) -> bool:
+        """Whether `call` may go ahead; in half-open state only the first caller does, as the probe"""
+        with self._lock:
+            if self._opened_at is None or (call is not None and self._probing is call):
+                return True
+            if self._probing is not None or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._probing = call if call is not None else object()
+            return True
+
+    def release(self, call: object):
+        """Give up the probe held by `call` without judging it, leaving the breaker open"""
+        with self._lock:
+            if call is not None and self._probing is call:
+                self._probing = None
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("LLM circuit breaker closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing is not None or (self._opened_at is None and self._failures >= self.failure_threshold):
+                if self._probing is None:
+                    self.opened += 1
+                    logger.warning(f"LLM circuit breaker opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+                self._probing = None
+
+class _ResilienceState:
+    """Breaker, worker threads and counters shared by a model and its tool-bound copies"""
+
+    def __init__(self, breaker: CircuitBreaker, max_inflight: int):
+        self.breaker = breaker
+        self.executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="llm-call")
+        self.latency = LatencyStats(window=1000)
+        self._lock = threading.Lock()
+        self.counts = {'calls': 0, 'attempts': 0, 'retries': 0, 'timeouts': 0, 'errors': 0,
+                       'hedges': 0, 'hedge_wins': 0, 'rejected': 0}
+
+    def count(self, key: str, outcome: Optional[str] = None):
+        with self._lock:
+            self.counts[key] += 1
+        if outcome:
+            LLM_CALLS.inc(outcome=outcome)
+
+class ResilientChatModel(BaseChatModel):
+    """Chat model wrapper adding deadlines, retries, hedging and a circuit breaker
+
+    Each attempt runs on a worker thread and is abandoned (left to finish
+    in the background) if it has not produced its response, or its first
+    streamed chunk, within `attempt_timeout`; the whole call gives up after
+    `timeout`. Failed attempts are retried with full-jitter exponential
+    backoff. With `hedge_after` set (seconds, or 'p95' to use the recent
+    95th percentile), a second identical request is started if the first
+    has produced nothing by then, and whichever answers first wins. Every
+    failure raises a subclass of LLMUnavailable.
+    """
+
+    inner: Any
+    timeout: float = 30.0
+    attempt_timeout: float = 10.0
+    max_retries: int = 2
+    backoff: float = 0.5
+    hedge_after: Optional[str] = None
+    min_hedge_delay: float = 0.05
+    state: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{getattr(self.inner, '_llm_type', 'chat')}"
+
+    def bind_tools(self, tools, **kwargs):
+        # Bind the provider's formatted tool kwargs on the wrapper so every call passes them through
+        bound = self.inner.bind_tools(tools, **kwargs)
+        return self.bind(**getattr(bound, 'kwargs', {}))
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_after:
+            return None
+        if self.hedge_after == 'p95':
+            if self.state.latency.count < 20:
+                return None
+            return max(self.min_hedge_delay, self.state.latency.percentile(95))
+        return float(self.hedge_after)
+
+    @staticmethod
+    def _produce(source: Callable[[], Iterable], tag: int, events: Queue):
+        """Run one request on a worker thread, putting (tag, item) events on the queue"""
+        try:
+            for item in source():
+                events.put((tag, item))
+            events.put((tag, _DONE))
+        except Exception as e:
+            events.put((tag, e))
+
+    def _attempt(self, source: Callable[[], Iterable], events: Queue, tags: Iterator[int],
+                 timeout: float) -> Tuple[int, Any]:
+        """Start a request, hedging it if it runs long, and return (tag, first item) of whichever answers first"""
+        state = self.state
+        start = time.monotonic()
+        mine = set()
+
+        def launch():
+            tag = next(tags)
+            mine.add(tag)
+            state.executor.submit(self._produce, source, tag, events)
+
+        launch()
+        hedge_delay = self._hedge_delay()
+        failed = 0
+        while True:
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout:
+                state.count('timeouts', 'timeout')
+                raise LLMTimeout(f"LLM call exceeded {timeout:.1f}s")
+            window = timeout - elapsed
+            if hedge_delay is not None:
+                window = min(window, max(0.0, hedge_delay - elapsed))
+            try:
+                tag, item = events.get(timeout=window)
+            except Empty:
+                if hedge_delay is not None and time.monotonic() - start >= hedge_delay:
+                    state.count('hedges', 'hedged')
+                    launch()
+                    hedge_delay = None
+                continue
+            if tag not in mine:
+                # Late output of an attempt that already timed out
+                continue
+            if isinstance(item, Exception):
+                failed += 1
+                if failed == len(mine):
+                    raise item
+                continue
+            state.latency.record(time.monotonic() - start)
+            if tag != min(mine):
+                state.count('hedge_wins', 'hedge_win')
+            return tag, item
+
+    def _next(self, events: Queue, tag: int, deadline: float):
+        """The winning request's next item, within the overall deadline"""
+        while True:
+            try:
+                item_tag, item = events.get(timeout=max(0.0, deadline - time.monotonic()))
+            except Empty:
+                self.state.count('timeouts', 'timeout')
+                raise LLMTimeout(f"LLM call exceeded {self.timeout:.1f}s")
+            if item_tag == tag:
+                return item
+
+    def _run(self, source: Callable[[], Iterable]) -> Iterator:
+        """Yield the items of one model request, retrying until an attempt produces its first item
+
+        Once items have been yielded a failure can no longer be retried,
+        so later items are only bounded by the overall deadline.
+        """
+        state = self.state
+        state.count('calls')
+        # Identifies this call to the breaker, in case it is the half-open probe
+        call = object()
+        if not state.breaker.allow(call):
+            state.count('rejected', 'rejected')
+            raise CircuitOpen("LLM circuit breaker is open")
+        try:
+            events: Queue = Queue()
+            tags = itertools.count()
+            deadline = time.monotonic() + self.timeout
+            for attempt in range(self.max_retries + 1):
+                state.count('attempts')
+                try:
+                    tag, item = self._attempt(source, events, tags,
+                                              min(self.attempt_timeout, deadline - time.monotonic()))
+                    break
+                except Exception as e:
+                    self._failed(e)
+                    logger.warning(f"LLM attempt {attempt + 1} failed: {e}")
+                    delay = random.uniform(0, self.backoff * 2 ** attempt)
+                    if attempt == self.max_retries or deadline - time.monotonic() <= delay \
+                            or not state.breaker.allow(call):
+                        if isinstance(e, LLMUnavailable):
+                            raise
+                        raise LLMUnavailable(f"LLM call failed after {attempt + 1} attempts: {e}") from e
+                    state.count('retries', 'retry')
+                    time.sleep(delay)
+            try:
+                while item is not _DONE:
+                    yield item
+                    item = self._next(events, tag, deadline)
+                    if isinstance(item, Exception):
+                        raise LLMUnavailable(f"LLM response failed part way: {item}") from item
+            except Exception as e:
+                self._failed(e)
+                raise
+            state.breaker.record_success()
+            LLM_CALLS.inc(outcome="ok")
+        finally:
+            # A stream the consumer abandoned (GeneratorExit) settles nothing; free the probe for the next call
+            state.breaker.release(call)
+
+    def _failed(self, error: Exception):
+        if not isinstance(error, LLMTimeout):
+            self.state.count('errors', 'error')
+        self.state.breaker.record_failure()
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        messages_out = list(self._run(lambda: [self.inner.invoke(messages, stop=stop, **kwargs)]))
+        if not messages_out:
+            raise LLMUnavailable("LLM returned no response")
+        return ChatResult(generations=[ChatGeneration(message=messages_out[0])])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        # Closing this stream closes the request at once, so an abandoned probe is released
+        with closing(self._run(lambda: self.inner.stream(messages, stop=stop, **kwargs))) as chunks:
+            for chunk in chunks:
+                yield ChatGenerationChunk(message=chunk)
+
+    def stats(self) -> Dict:
+        with self.state._lock:
+            counts = dict(self.state.counts)
+        return {
+            **counts,
+            'breaker': self.state.breaker.state,
+            'breaker_opened': self.state.breaker.opened,
+            'latency': self.state.latency.summary(),
+        }
+
+def resilient(llm, **overrides) -> ResilientChatModel:
+    """Wrap a chat model using LLM_* environment settings, overridable by keyword"""
+    settings = dict(
+        timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+        attempt_timeout=float(os.getenv("LLM_ATTEMPT_TIMEOUT", "10")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        backoff=float(os.getenv("LLM_BACKOFF", "0.5")),
+        hedge_after=os.getenv("LLM_HEDGE_AFTER") or None,
+    )
+    breaker = CircuitBreaker(
+        failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30"))
+    )
+    settings.update(overrides)
+    state = _ResilienceState(breaker, max_inflight=int(os.getenv("LLM_MAX_INFLIGHT", "32")))
+    return ResilientChatModel(inner=llm, state=state, **settings)
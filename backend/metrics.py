@@ -0,0 +1,210 @@
+"""
+Request tracing and Prometheus-style metrics for the cricket chatbot
+Spans time the LLM calls, tools, SQL and formatting of each request under a
+trace id; counters and histograms are rendered in the Prometheus text format
+"""
+import atexit
+import bisect
+import contextvars
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans from sub-millisecond SQL up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels.get(label, '')) for label in self.labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value:g}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    labels = _label_text(self.labels, key, 'le="' + le + '"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total:.6f}")
+                lines.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Named counters and histograms rendered together for /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter('cricket_requests_total', 'Chat requests by endpoint and outcome', ('endpoint', 'status'))
+REQUEST_SECONDS = registry.histogram('cricket_request_seconds', 'Chat request duration', ('endpoint',))
+SPAN_SECONDS = registry.histogram('cricket_span_seconds', 'Duration of traced work by span kind', ('span',))
+TOOL_CALLS = registry.counter('cricket_tool_calls_total', 'Tool invocations by tool and outcome', ('tool', 'status'))
+CACHE_LOOKUPS = registry.counter('cricket_cache_lookups_total', 'Response cache lookups by result', ('result',))
+TOOL_CACHE_LOOKUPS = registry.counter('cricket_tool_cache_lookups_total', 'Tool result cache lookups by tool and result',
+                                      ('tool', 'result'))
+LLM_TOKENS = registry.counter('cricket_llm_tokens_total', 'LLM tokens by direction (provider counts or estimates)',
+                              ('direction',))
+LLM_CALLS = registry.counter('cricket_llm_calls_total', 'LLM call outcomes (ok, retry, timeout, error, hedged, rejected)',
+                             ('outcome',))
+ROUTES = registry.counter('cricket_route_total', 'Questions answered by the router or the agent', ('path',))
+ERRORS = registry.counter('cricket_errors_total', 'Errors by where they happened', ('source',))
+INGESTED = registry.counter('cricket_ingested_matches_total', 'Matches seen by the ingest watcher by outcome',
+                            ('outcome',))
+
+class Trace:
+    """Spans recorded while serving one request"""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.start = time.perf_counter()
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, started: float, seconds: float, **attrs):
+        with self._lock:
+            self.spans.append({
+                'name': name,
+                'start_ms': round((started - self.start) * 1000, 3),
+                'duration_ms': round(seconds * 1000, 3),
+                **attrs,
+            })
+
+    def summary(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'duration_ms': round((time.perf_counter() - self.start) * 1000, 3),
+            'spans': sorted(self.spans, key=lambda span: span['start_ms']),
+        }
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar('cricket_trace', default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def trace(trace_id: Optional[str] = None):
+    """Start a trace for the current request and log its spans when it ends"""
+    current = Trace(trace_id)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+        summary = current.summary()
+        logger.info(f"trace {summary['trace_id']} {summary['duration_ms']:.1f}ms "
+                    + ' '.join(f"{span['name']}={span['duration_ms']:.1f}ms" for span in summary['spans']))
+
+def record_span(kind: str, started: float, seconds: float, **attrs):
+    """Record a finished span on the histogram and, inside a trace, on the trace"""
+    SPAN_SECONDS.observe(seconds, span=kind)
+    current = _current_trace.get()
+    if current is not None:
+        current.add(kind, started, seconds, **attrs)
+
+@contextmanager
+def span(kind: str, **attrs):
+    """Time a block of work as a span of the given kind"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(kind, started, time.perf_counter() - started, **attrs)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_async_logging():
+    """Move the root logger's handlers behind a queue so logging never blocks a request thread"""
+    global _listener
+    if _listener is not None:
+        return
+    root = logging.getLogger()
+    handlers = [handler for handler in root.handlers if not isinstance(handler, logging.handlers.QueueHandler)]
+    if not handlers:
+        handlers = [logging.StreamHandler()]
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_async_logging)
+
+def stop_async_logging():
+    """Flush queued log records and stop the background logging thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
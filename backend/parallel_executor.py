@@ -0,0 +1,66 @@
+"""
+Agent executor that runs independent tool calls concurrently
+When one LLM turn asks for several tools, they run on a thread pool and
+their results are returned in the order the model asked for them
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction
+
+# Actions planned in the current step and their running futures, per calling thread
+_step = threading.local()
+
+class ParallelAgentExecutor(AgentExecutor):
+    """AgentExecutor whose synchronous path runs one turn's tool calls in parallel
+
+    The base class yields every planned action and then performs them one by
+    one. The first perform call of a step starts all of that step's actions
+    together, and each later call waits for its own result, so the step
+    takes about as long as its slowest tool. The async path (astream_events)
+    already runs actions with asyncio.gather.
+    """
+
+    max_parallel_tools: int = 4
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        _step.actions = []
+        _step.futures = None
+        try:
+            for step in super()._iter_next_step(
+                name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+            ):
+                if isinstance(step, AgentAction):
+                    _step.actions.append(step)
+                yield step
+        finally:
+            _step.actions = []
+            _step.futures = None
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        actions = getattr(_step, 'actions', [])
+        if len(actions) < 2 or self.max_parallel_tools < 2:
+            return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+        if _step.futures is None:
+            pool = ThreadPoolExecutor(
+                max_workers=min(len(actions), self.max_parallel_tools),
+                thread_name_prefix="agent-tool"
+            )
+            perform = super()._perform_agent_action
+            _step.futures = {
+                id(action): pool.submit(
+                    contextvars.copy_context().run,
+                    perform, name_to_tool_map, color_mapping, action, run_manager
+                )
+                for action in actions
+            }
+            # Submitted calls still finish; this only stops the pool taking new work
+            pool.shutdown(wait=False)
+
+        future = _step.futures.pop(id(agent_action), None)
+        if future is None:
+            return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        return future.result()
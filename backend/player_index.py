@@ -0,0 +1,153 @@
+"""
+Player name resolution for the cricket tools
+Maps free-text player names to player_id using an in-memory index
+"""
+import difflib
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+def normalize_name(text: str) -> str:
+    """Lowercase a name and strip punctuation so 'R. Sharma' and 'r sharma' compare equal"""
+    return ' '.join(re.sub(r"[^a-z0-9]+", ' ', str(text).lower()).split())
+
+class PlayerIndex:
+    """In-memory index over players.full_name and player_aliases
+
+    Resolution order: exact full name, alias, whole-token match,
+    substring match (the old LIKE '%name%' behaviour) and finally
+    fuzzy matching for misspellings. The index is rebuilt whenever the
+    database reports a new data_version.
+    """
+
+    def __init__(self, db, fuzzy_cutoff: float = 0.8):
+        self.db = db
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._lock = threading.Lock()
+        self._version = None
+        self._names: Dict[int, str] = {}
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_token: Dict[str, Set[int]] = {}
+        self._aliases: Dict[str, int] = {}
+
+    def refresh(self):
+        """Rebuild the index from the players and player_aliases tables"""
+        version = self.db.data_version
+        players = self.db.fetch_all("SELECT player_id, full_name FROM players")
+        aliases = self.db.fetch_all("SELECT alias, player_id FROM player_aliases")
+
+        names = {}
+        by_name = defaultdict(list)
+        by_token = defaultdict(set)
+        for player_id, full_name in players:
+            key = normalize_name(full_name)
+            if not key or key == 'none none':
+                continue
+            player_id = int(player_id)
+            names[player_id] = full_name
+            by_name[key].append(player_id)
+            for token in key.split():
+                by_token[token].add(player_id)
+
+        alias_map = {normalize_name(alias): int(player_id) for alias, player_id in aliases}
+
+        with self._lock:
+            self._names = names
+            self._by_name = dict(by_name)
+            self._by_token = dict(by_token)
+            self._aliases = alias_map
+            self._version = version
+
+    def _ensure_fresh(self):
+        if self._version != self.db.data_version:
+            self.refresh()
+
+    def resolve(self, text: str) -> Optional[int]:
+        """Return the best matching player_id for a name, or None"""
+        candidates = self.resolve_all(text)
+        return candidates[0] if candidates else None
+
+    def resolve_all(self, text: str, limit: int = 5) -> List[int]:
+        """Return up to `limit` candidate player_ids, best match first"""
+        self._ensure_fresh()
+        key = normalize_name(text)
+        if not key:
+            return []
+
+        if key in self._by_name:
+            return self._rank(self._by_name[key])[:limit]
+        if key in self._aliases:
+            return [self._aliases[key]]
+
+        # Every query token must appear as a whole token of the name
+        tokens = key.split()
+        token_sets = [self._by_token.get(token) for token in tokens]
+        if all(token_sets):
+            candidates = set.intersection(*token_sets)
+            if candidates:
+                return self._rank(candidates)[:limit]
+
+        # Substring match over distinct names, equivalent to LIKE '%name%'
+        candidates = [pid for name, ids in self._by_name.items() if key in name for pid in ids]
+        if candidates:
+            return self._rank(candidates)[:limit]
+
+        # Fuzzy match for misspellings against full names and aliases
+        choices = list(self._by_name) + list(self._aliases)
+        matches = difflib.get_close_matches(key, choices, n=limit, cutoff=self.fuzzy_cutoff)
+        candidates = []
+        for match in matches:
+            ids = self._by_name.get(match) or [self._aliases[match]]
+            candidates.extend(pid for pid in ids if pid not in candidates)
+        return candidates[:limit]
+
+    def name_tokens(self, words: Iterable[str]) -> Set[str]:
+        """The words that are part of some player's name, such as a bare surname"""
+        self._ensure_fresh()
+        return {word for word in words if word in self._by_token}
+
+    def canonicalize(self, text: str, max_words: int = 4) -> str:
+        """Normalize text and replace player names it mentions with `player:<id>` tokens
+
+        Only full names and aliases are replaced (longest match wins); bare
+        first or last names are left alone since they collide with common
+        words and other players.
+        """
+        self._ensure_fresh()
+        words = normalize_name(text).split()
+        out = []
+        i = 0
+        while i < len(words):
+            for n in range(min(max_words, len(words) - i), 0, -1):
+                phrase = ' '.join(words[i:i + n])
+                ids = self._by_name.get(phrase)
+                if not ids and phrase in self._aliases:
+                    ids = [self._aliases[phrase]]
+                if ids and len(set(ids)) == 1:
+                    out.append(f"player:{ids[0]}")
+                    i += n
+                    break
+            else:
+                out.append(words[i])
+                i += 1
+        return ' '.join(out)
+
+    def name(self, player_id: int) -> str:
+        """Display name for a player_id"""
+        self._ensure_fresh()
+        return self._names.get(player_id, str(player_id))
+
+    def add_alias(self, alias: str, player_id: int):
+        """Register an alternative name (nickname, initials) for a player"""
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                "INSERT OR REPLACE INTO player_aliases (alias, player_id) VALUES (?, ?)",
+                (alias, player_id)
+            )
+        with self._lock:
+            self._aliases[normalize_name(alias)] = player_id
+
+    def _rank(self, player_ids) -> List[int]:
+        # Alphabetical by name, matching the old GROUP BY player_name ordering
+        return sorted(set(player_ids), key=lambda pid: (self._names.get(pid, ''), pid))
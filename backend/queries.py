@@ -0,0 +1,175 @@
+"""
+Named, parameterized SQL for the cricket tools
+Each statement is defined once, executed by name through a per-thread cached
+cursor and timed per statement
+"""
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from latency import LatencyStats
+from metrics import record_span
+
+logger = logging.getLogger(__name__)
+
+QUERIES = {
+    'batting_stats': """
+    SELECT
+        player_name,
+        innings,
+        total_runs,
+        total_runs * 1.0 / innings as average_runs,
+        highest_score,
+        strike_rate_sum / innings as avg_strike_rate,
+        total_fours,
+        total_sixes,
+        total_balls
+    FROM player_batting_summary
+    WHERE player_id = ?
+    """,
+    'bowling_stats': """
+    SELECT
+        player_name,
+        matches,
+        total_wickets,
+        total_runs,
+        economy_sum / matches as avg_economy,
+        total_maidens,
+        total_dots,
+        total_balls
+    FROM player_bowling_summary
+    WHERE player_id = ?
+    """,
+    'compare_batting': """
+    SELECT
+        player_id,
+        player_name,
+        total_runs,
+        total_runs * 1.0 / innings as average,
+        strike_rate_sum / innings as strike_rate
+    FROM player_batting_summary
+    WHERE player_id IN (?, ?)
+    """,
+    'compare_bowling': """
+    SELECT
+        player_id,
+        player_name,
+        total_wickets,
+        economy_sum / matches as economy,
+        total_runs as runs_conceded
+    FROM player_bowling_summary
+    WHERE player_id IN (?, ?)
+    """,
+    'top_batsmen': """
+    SELECT
+        player_name,
+        total_runs,
+        total_runs * 1.0 / innings as average,
+        innings
+    FROM player_batting_summary
+    WHERE innings >= 2
+    ORDER BY total_runs DESC, innings, player_name
+    LIMIT ?
+    """,
+    'top_bowlers': """
+    SELECT
+        player_name,
+        total_wickets,
+        economy_sum / matches as economy,
+        matches
+    FROM player_bowling_summary
+    WHERE matches >= 2
+    ORDER BY total_wickets DESC, matches, player_name
+    LIMIT ?
+    """,
+    'match_summary': """
+    SELECT
+        COUNT(*) as total_matches,
+        AVG(total_runs) as avg_runs,
+        MAX(total_runs) as highest_score,
+        MIN(total_runs) as lowest_score
+    FROM matches
+    """,
+    'phase_batting': """
+    SELECT phase, balls, runs, fours, sixes, dots, dismissals
+    FROM player_phase_batting
+    WHERE player_id = ?
+    ORDER BY phase
+    """,
+    'phase_bowling': """
+    SELECT phase, balls, runs, wickets, dots
+    FROM player_phase_bowling
+    WHERE player_id = ?
+    ORDER BY phase
+    """,
+    'matchup': """
+    SELECT balls, runs, dismissals, dots, fours, sixes
+    FROM matchups
+    WHERE batter_id = ? AND bowler_id = ?
+    """,
+    'recent_form': """
+    SELECT
+        runs_scored,
+        balls_faced,
+        strike_rate,
+        fours,
+        sixes
+    FROM batting_performances
+    WHERE player_id = ?
+    ORDER BY id DESC
+    LIMIT 5
+    """,
+}
+
+class QueryRegistry:
+    """Executes registered statements by name with bound parameters only
+
+    SQL text never changes between calls, so sqlite3's per-connection
+    statement cache reuses the prepared statement; each reader thread also
+    keeps one cursor per statement name.
+    """
+
+    def __init__(self, db, queries: Optional[Dict[str, str]] = None):
+        self.db = db
+        self.queries = dict(QUERIES if queries is None else queries)
+        self.timings = {name: LatencyStats(window=2000) for name in self.queries}
+        self._local = threading.local()
+
+    def register(self, name: str, sql: str):
+        self.queries[name] = sql
+        self.timings[name] = LatencyStats(window=2000)
+
+    def run(self, name: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Execute a registered statement and return its rows"""
+        sql = self.queries[name]
+        start = time.perf_counter()
+        try:
+            return self._cursor(name).execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Query {name} failed: {e}")
+            return []
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name].record(elapsed)
+            record_span("sql", start, elapsed, query=name)
+
+    def run_one(self, name: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        rows = self.run(name, params)
+        return rows[0] if rows else None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Call count and p50/p99 latency per statement"""
+        return {name: timing.summary() for name, timing in self.timings.items() if timing.count}
+
+    def _cursor(self, name: str) -> sqlite3.Cursor:
+        conn = self.db.reader()
+        cache = getattr(self._local, 'cursors', None)
+        if cache is None or getattr(self._local, 'conn', None) is not conn:
+            cache = self._local.cursors = {}
+            self._local.conn = conn
+        cursor = cache.get(name)
+        if cursor is None:
+            cursor = cache[name] = conn.cursor()
+        return cursor
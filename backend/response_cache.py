@@ -0,0 +1,206 @@
+"""
+Response cache for the chat endpoint
+Keys answers on the normalized question and the database data version
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Words ignored when comparing paraphrased questions
+STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'what', 'whats', 'who', 'which', 'show', 'me',
+    'tell', 'give', 'please', 'of', 'for', 'in', 'on', 'about', 'can', 'you', 'i', 'want', 'to',
+    'know', 'list', 'get', 's',
+}
+
+# Category and stat words, by what they ask for; "top 5 batsmen" and "top 5 bowlers" differ only here
+SUBJECT_WORDS = {
+    'batsmen': 'batting', 'batsman': 'batting', 'batters': 'batting', 'batter': 'batting',
+    'batting': 'batting', 'runs': 'runs', 'scorers': 'runs',
+    'bowlers': 'bowling', 'bowler': 'bowling', 'bowling': 'bowling', 'wickets': 'wickets',
+    'takers': 'wickets', 'economy': 'economy', 'average': 'average', 'strike': 'strike_rate',
+    'form': 'form', 'summary': 'summary', 'matchup': 'matchup', 'powerplay': 'powerplay',
+    'death': 'death', 'middle': 'middle', 'phase': 'phase', 'phases': 'phase', 'compare': 'compare',
+}
+
+def _anchors(words) -> set:
+    return {w for w in words if w.startswith('player:') or w.isdigit()} | \
+        {SUBJECT_WORDS[w] for w in words if w in SUBJECT_WORDS}
+
+class ResponseCache:
+    """LRU + TTL cache of chat responses, optionally persisted to a SQLite file
+
+    Entries are keyed on the canonical question (lowercased, punctuation
+    stripped, player names replaced by their player_id) together with the
+    data version, so an ingest implicitly invalidates everything cached
+    before it. With `similarity_threshold` set, a miss falls back to the
+    closest cached question by word overlap.
+    """
+
+    def __init__(self, player_index=None, max_entries: int = 1000, ttl: float = 3600,
+                 path: Optional[str] = None, similarity_threshold: Optional[float] = None):
+        self.player_index = player_index
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+        self._conn = None
+        if path:
+            try:
+                # A short busy timeout: a cache write never holds up an answer for long
+                self._conn = sqlite3.connect(path, timeout=0.5, check_same_thread=False)
+                self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    version INTEGER,
+                    created_at REAL,
+                    response TEXT
+                )''')
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache file {path} unavailable, caching in memory only: {e}")
+                self._conn = None
+
+    def normalize(self, question: str) -> str:
+        """Canonical form of a question used as the cache key"""
+        if self.player_index is not None:
+            return self.player_index.canonicalize(question)
+        return ' '.join(re.sub(r"[^a-z0-9]+", ' ', question.lower()).split())
+
+    def get(self, question: str, version: int) -> Optional[Dict]:
+        """Return a cached response for this question and data version, if fresh"""
+        key = self.normalize(question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((key, version))
+            if entry is None and self._conn is not None:
+                entry = self._persisted(self._load, key, version)
+            if entry is not None and now - entry[0] > self.ttl:
+                self._drop((key, version))
+                entry = None
+
+            if entry is not None:
+                self._entries[(key, version)] = entry
+                self._entries.move_to_end((key, version))
+                self.hits += 1
+                return dict(entry[1])
+
+            if self.similarity_threshold:
+                similar = self._similar(key, version, now)
+                if similar is not None:
+                    self.similar_hits += 1
+                    return dict(similar)
+
+            self.misses += 1
+            return None
+
+    def put(self, question: str, version: int, response: Dict):
+        """Store a response, evicting the least recently used entries past the size bound"""
+        key = self.normalize(question)
+        entry = (time.time(), dict(response))
+        with self._lock:
+            self._entries[(key, version)] = entry
+            self._entries.move_to_end((key, version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+            if self._conn is not None:
+                self._persisted(self._store, key, version, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._persisted(self._execute, "DELETE FROM response_cache")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.similar_hits + self.misses
+        return {
+            'hits': self.hits,
+            'similar_hits': self.similar_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.similar_hits) / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'evictions': self.evictions,
+            'errors': self.errors,
+        }
+
+    def _persisted(self, fn, *args):
+        """Run a cache-file operation; failures (such as another worker holding the lock) are only logged"""
+        try:
+            return fn(*args)
+        except sqlite3.Error as e:
+            self._conn.rollback()
+            self.errors += 1
+            logger.warning(f"Response cache file error: {e}")
+            return None
+
+    def _execute(self, sql: str, params=()):
+        self._conn.execute(sql, params)
+        self._conn.commit()
+
+    def _store(self, key: str, version: int, entry):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, version, created_at, response) VALUES (?, ?, ?, ?)",
+            (key, version, entry[0], json.dumps(entry[1]))
+        )
+        # Drop answers computed against older data and keep the file bounded
+        self._conn.execute("DELETE FROM response_cache WHERE version != ?", (version,))
+        self._conn.execute('''
+        DELETE FROM response_cache WHERE key NOT IN (
+            SELECT key FROM response_cache ORDER BY created_at DESC LIMIT ?
+        )''', (self.max_entries,))
+        self._conn.commit()
+
+    def _load(self, key: str, version: int):
+        row = self._conn.execute(
+            "SELECT created_at, response FROM response_cache WHERE key = ? AND version = ?",
+            (key, version)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _drop(self, cache_key):
+        self._entries.pop(cache_key, None)
+        if self._conn is not None:
+            self._persisted(self._execute, "DELETE FROM response_cache WHERE key = ? AND version = ?", cache_key)
+
+    def _anchors(self, words) -> set:
+        """Words two paraphrases must share; bare player names count, as only full names become ids"""
+        anchors = _anchors(words)
+        if self.player_index is not None:
+            anchors |= {f"name:{word}" for word in self.player_index.name_tokens(words)}
+        return anchors
+
+    def _similar(self, key: str, version: int, now: float) -> Optional[Dict]:
+        """Best cached answer whose question shares enough words with this one"""
+        words = set(key.split()) - STOPWORDS
+        if not words:
+            return None
+        anchors = self._anchors(words)
+        best, best_score = None, 0.0
+        for (other_key, other_version), (created_at, response) in self._entries.items():
+            if other_version != version or now - created_at > self.ttl:
+                continue
+            other_words = set(other_key.split()) - STOPWORDS
+            # Paraphrases must still be about the same players, numbers and stats
+            if anchors != self._anchors(other_words):
+                continue
+            score = len(words & other_words) / len(words | other_words) if other_words else 0.0
+            if score > best_score:
+                best, best_score = response, score
+        return best if best_score >= self.similarity_threshold else None
@@ -0,0 +1,212 @@
+"""
+Fast-path intent router for the cricket chatbot
+Answers questions with a single clear intent straight from the cricket tools,
+so only ambiguous questions pay for an LLM round trip
+"""
+import re
+import textwrap
+import threading
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from latency import LatencyStats
+from metrics import TOOL_CALLS, span
+
+class RoutePlan(NamedTuple):
+    """A tool call the router can make without the LLM"""
+    tool: str
+    args: Tuple
+
+# Words that carry intent or filler rather than part of a player's name
+FILLER_WORDS = {
+    'a', 'about', 'all', 'an', 'analyse', 'analysis', 'analyze', 'are', 'career', 'current',
+    'did', 'do', 'does', 'figures', 'for', 'form', 'get', 'give', 'has', 'have', 'how', 'in',
+    'is', 'many', 'me', 'numbers', 'of', 'please', 'record', 'recent', 'recently', 'runs',
+    'scored', 'show', 'stat', 'statistics', 'stats', 'taken', 'tell', 'the', 'total', 'what',
+    'whats', 'wickets', 'batting', 'bowling', 'player', 'players', 'his', 'her', 'their',
+    'and', 'with', 'on', 'by', 'been', 'performing', 'performance', 'doing',
+    'powerplay', 'power', 'play', 'middle', 'death', 'overs', 'phase', 'phases', 'wise', 'during',
+    'bat', 'bats', 'batted', 'bowl', 'bowls', 'bowled', 'fared', 'done', 'head', 'to', 'matchup',
+    # Metric and comparison words the intent patterns match
+    'average', 'averages', 'avg', 'economy', 'strike', 'rate', 'sr', 'compare', 'vs', 'versus',
+    'against', 'top', 'best', 'most', 'leading', 'highest', 'at',
+}
+
+PRONOUNS = re.compile(r"\b(he|him|his|she|her|they|them|their)\b")
+
+CATEGORY_WORDS = {
+    'batsmen': 'batsmen', 'batsman': 'batsmen', 'batters': 'batsmen', 'batter': 'batsmen',
+    'batting': 'batsmen', 'run scorers': 'batsmen', 'run-scorers': 'batsmen', 'runs': 'batsmen',
+    'bowlers': 'bowlers', 'bowler': 'bowlers', 'bowling': 'bowlers',
+    'wicket takers': 'bowlers', 'wicket-takers': 'bowlers', 'wickets': 'bowlers',
+}
+
+TOP_RE = re.compile(
+    r"\b(?:top|best|leading|highest)\s+(?:(?P<limit>\d+)\s+)?"
+    r"(?P<category>batsmen|batsman|batters|batter|batting|bowlers|bowler|bowling|"
+    r"run[- ]scorers|wicket[- ]takers)\b"
+)
+MOST_RE = re.compile(r"\bmost\s+(?P<category>runs|wickets)\b")
+LIMIT_RE = re.compile(r"\b(?:top|first)\s+(?P<limit>\d+)\b")
+SUMMARY_RE = re.compile(
+    r"\b(?:match(?:es)?\s+summary|summary\s+of\s+(?:all\s+)?(?:the\s+)?matches|"
+    r"how\s+many\s+matches|average\s+team\s+score|highest\s+team\s+score|lowest\s+team\s+score)\b"
+)
+COMPARE_RE = re.compile(
+    r"\bcompare\s+(?P<a>.+?)\s+(?:and|vs\.?|versus|with|to)\s+(?P<b>.+?)(?:'s)?"
+    r"(?:\s+(?:on|in|by|for))?(?:\s+(?P<metric>batting|bowling|runs|wickets|average|economy))?\s*$"
+)
+VERSUS_RE = re.compile(
+    r"^(?P<a>.+?)\s+(?:vs\.?|versus)\s+(?P<b>.+?)(?:'s)?"
+    r"(?:\s+(?:on|in|by|for))?(?:\s+(?P<metric>batting|bowling|runs|wickets|average|economy))?\s*$"
+)
+MATCHUP_RE = re.compile(
+    r"^(?P<a>.+?)\s+(?:against|head\s+to\s+head\s+(?:with|against)|matchup\s+(?:with|against))\s+(?P<b>.+?)$"
+)
+# Leaderboards rank players by runs or wickets only; other metrics and team rankings go to the agent
+OTHER_METRIC_RE = re.compile(r"\b(?:average|averages|avg|economy|strike[- ]rates?|sr|dot[- ]?balls?|dots)\b")
+TEAM_RE = re.compile(r"\bteams?\b")
+PHASE_RE = re.compile(r"\b(?:power\s*play|death(?:\s+overs?)?|middle\s+overs?|phases?|phase[- ]wise)\b")
+FORM_RE = re.compile(r"\bform\b")
+BATTING_RE = re.compile(r"\bbatting\b|\bruns\s+(?:has|have|did)\b|\bhow\s+many\s+runs\b")
+BOWLING_RE = re.compile(r"\bbowling\b|\bwickets\s+(?:has|have|did)\b|\bhow\s+many\s+wickets\b")
+
+class RouterStats:
+    """Hit rate and per-path latency for routed vs LLM answers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency = {'router': LatencyStats(), 'agent': LatencyStats()}
+
+    def record(self, path: str, seconds: float):
+        with self._lock:
+            if path == 'router':
+                self.hits += 1
+            else:
+                self.misses += 1
+        self.latency[path].record(seconds)
+
+    def summary(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'router': self.latency['router'].summary(),
+            'agent': self.latency['agent'].summary(),
+        }
+
+class IntentRouter:
+    """Keyword/pattern classifier that maps a question to a single tool call"""
+
+    def __init__(self, tools: Dict[str, Callable], player_index):
+        self.tools = tools
+        self.player_index = player_index
+        self.stats = RouterStats()
+
+    def plan(self, question: str, default_player: Optional[str] = None) -> Optional[RoutePlan]:
+        """Classify a question, returning None when it should go to the LLM
+
+        `default_player` stands in for pronouns ("and his bowling?") when
+        the caller knows who the conversation is about.
+        """
+        text = ' '.join(question.lower().replace('?', ' ').replace('!', ' ').split()).rstrip('.')
+        if not text:
+            return None
+
+        plans = []
+
+        compare = COMPARE_RE.search(text) or VERSUS_RE.search(text)
+        if compare:
+            metric = compare.group('metric')
+            players = [self._player(compare.group('a')), self._player(compare.group('b'))]
+            if metric and None not in players:
+                plans.append(RoutePlan('compare_players', (players[0], players[1], metric)))
+            else:
+                return None
+
+        matchup = None if compare else MATCHUP_RE.search(text)
+        if matchup:
+            batter, bowler = self._player(matchup.group('a')), self._player(matchup.group('b'))
+            if None in (batter, bowler):
+                return None
+            plans.append(RoutePlan('get_matchup', (batter, bowler)))
+
+        top = TOP_RE.search(text) or MOST_RE.search(text)
+        summary = SUMMARY_RE.search(text)
+        if (top or summary) and (PHASE_RE.search(text) or self._mentions_player(text, default_player)):
+            # Leaderboards are whole-career only, and a named player is a second intent
+            return None
+        if top and (OTHER_METRIC_RE.search(text) or TEAM_RE.search(text)):
+            return None
+        if top:
+            category = CATEGORY_WORDS.get(top.group('category').replace('-', ' '), 'batsmen')
+            limit = top.groupdict().get('limit')
+            if limit is None:
+                explicit = LIMIT_RE.search(text)
+                limit = explicit.group('limit') if explicit else 5
+            plans.append(RoutePlan('get_top_performers', (category, min(int(limit), 50))))
+
+        if summary:
+            plans.append(RoutePlan('get_match_summary', ()))
+
+        if not plans:
+            # Phase questions often say batting or bowling too; the phase tool answers both
+            intents = (('get_phase_stats', PHASE_RE),) if PHASE_RE.search(text) else (
+                ('analyze_recent_form', FORM_RE),
+                ('get_player_batting_stats', BATTING_RE),
+                ('get_player_bowling_stats', BOWLING_RE),
+            )
+            single = [(tool, pattern) for tool, pattern in intents if pattern.search(text)]
+            if len(single) == 1:
+                player = self._player(text, default_player)
+                if player is None:
+                    return None
+                plans.append(RoutePlan(single[0][0], (player,)))
+
+        # Multi-part or unrecognised questions are left to the agent
+        return plans[0] if len(plans) == 1 else None
+
+    def execute(self, plan: RoutePlan) -> str:
+        """Run a planned tool call and template the answer"""
+        with span("tool", tool=plan.tool):
+            try:
+                output = self.tools[plan.tool](*plan.args)
+            except Exception:
+                TOOL_CALLS.inc(tool=plan.tool, status="error")
+                raise
+        TOOL_CALLS.inc(tool=plan.tool, status="ok")
+        with span("format"):
+            return textwrap.dedent(output).strip()
+
+    def route(self, question: str, default_player: Optional[str] = None) -> Optional[Dict]:
+        """Answer a question directly, or return None to fall through to the LLM"""
+        plan = self.plan(question, default_player)
+        if plan is None:
+            return None
+        return {
+            "answer": self.execute(plan),
+            "tools_used": [plan.tool],
+            "success": True
+        }
+
+    def _mentions_player(self, text: str, default_player: Optional[str] = None) -> bool:
+        if default_player and PRONOUNS.search(text):
+            return True
+        return 'player:' in self.player_index.canonicalize(text)
+
+    def _player(self, text: str, default_player: Optional[str] = None) -> Optional[str]:
+        """Strip intent words from a phrase and return it if it names a known player
+
+        A name in the text wins; `default_player` only stands in for a
+        pronoun when nothing else resolves.
+        """
+        words = [w for w in re.sub(r"'s\b|[^a-z0-9' ]", ' ', text).split()
+                 if w not in FILLER_WORDS and not PRONOUNS.fullmatch(w)]
+        name = ' '.join(words).strip("' ")
+        if name and self.player_index.resolve_all(name):
+            return name.title()
+        if default_player and PRONOUNS.search(text):
+            return default_player
+        return None
@@ -1,14 +1,85 @@
 """
 FastAPI server for the cricket chatbot
+The agent (LLM client, tools and database) is built in the background at
+startup or on first use, so importing this module stays cheap
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List
-import uvicorn
-from agent import CricketAgent
+from typing import List, Optional
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from latency import LatencyStats
+from metrics import (ERRORS, REQUESTS, REQUEST_SECONDS, configure_async_logging, registry, span,
+                     stop_async_logging, trace)
+from worker_pool import BoundedWorkerPool, PoolSaturated
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+_agent = None
+_agent_lock = threading.Lock()
+_startup_error = None
+_watcher = None
+
+def get_agent():
+    """Build the agent on first use; importing it pulls in langchain and the LLM client"""
+    global _agent, _startup_error
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                try:
+                    from agent import CricketAgent
+                    _agent = CricketAgent()
+                    _startup_error = None
+                except Exception as e:
+                    _startup_error = str(e)
+                    raise
+    return _agent
+
+async def _warm_up():
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(get_agent)
+        logger.info(f"Agent ready in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.error(f"Agent warm-up failed: {e}")
+
+def _start_watcher():
+    """Live-ingest INGEST_WATCH_DIR into the served database, if set"""
+    global _watcher
+    if not os.getenv("INGEST_WATCH_DIR"):
+        return
+    if os.getenv("DB_READ_ONLY") == "1":
+        logger.warning("INGEST_WATCH_DIR ignored: the database is read-only; run ingest_watcher.py "
+                       "with --snapshot alongside the workers instead")
+        return
+    from cricket_tools import get_db
+    from ingest_watcher import watcher_from_env
+    _watcher = watcher_from_env(get_db())
+    _watcher.start()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Log records go through a queue so request threads never block on I/O
+    configure_async_logging()
+    # Serve /health immediately and build the agent in the background
+    warm_up = asyncio.create_task(_warm_up()) if os.getenv("WARM_START", "1") != "0" else None
+    await asyncio.to_thread(_start_watcher)
+    yield
+    if _watcher is not None:
+        await asyncio.to_thread(_watcher.stop)
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+    pool.shutdown()
+    stop_async_logging()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -19,29 +90,184 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize agent
-agent = CricketAgent()
+# Agent calls block on the LLM and SQLite, so they run off the event loop
+pool = BoundedWorkerPool(
+    max_workers=int(os.getenv("CHAT_WORKERS", "8")),
+    queue_depth=int(os.getenv("CHAT_QUEUE_DEPTH", "32"))
+)
+
+# Time to first event and total duration of streamed responses
+stream_latency = {"ttfb": LatencyStats(), "total": LatencyStats()}
 
 class ChatRequest(BaseModel):
     question: str
+    # Turns sharing a session id share conversation memory; omit for stateless questions
+    session_id: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    questions: List[str]
 
 class ChatResponse(BaseModel):
     answer: str
     tools_used: List[str]
     success: bool
+    degraded: bool = False
+    trace_id: Optional[str] = None
+
+def _ask(question: str, session_id: Optional[str] = None) -> dict:
+    return get_agent().ask(question, session_id)
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Main chat endpoint"""
+    start = time.perf_counter()
+    status = "error"
     try:
-        result = agent.ask(request.question)
-        return ChatResponse(**result)
+        with trace() as current:
+            result = await pool.run(_ask, request.question, request.session_id)
+            with span("format"):
+                response = ChatResponse(**result, trace_id=current.trace_id)
+        status = "ok" if result["success"] else "failed"
+        return response
+    except PoolSaturated as e:
+        status = "rejected"
+        raise HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"})
     except Exception as e:
+        ERRORS.inc(source="server")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        REQUESTS.inc(endpoint="chat", status=status)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="chat")
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Streaming chat endpoint using Server-Sent Events
+    
+    Emits `tool_start`, `tool_end` and `token` events while the answer is
+    produced and a final `done` event with the full ChatResponse fields.
+    """
+    try:
+        release = pool.reserve()
+    except PoolSaturated as e:
+        REQUESTS.inc(endpoint="chat_stream", status="rejected")
+        raise HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"})
+    
+    async def events():
+        start = time.perf_counter()
+        first = True
+        status = "error"
+        try:
+            with trace() as current:
+                agent = await asyncio.to_thread(get_agent)
+                async for event in agent.astream(request.question, request.session_id):
+                    if first:
+                        stream_latency["ttfb"].record(time.perf_counter() - start)
+                        first = False
+                    if event["event"] == "done":
+                        event["trace_id"] = current.trace_id
+                        status = "ok" if event["success"] else "failed"
+                    yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            ERRORS.inc(source="server")
+            yield f"event: error\ndata: {json.dumps({'event': 'error', 'detail': str(e)})}\n\n"
+        finally:
+            elapsed = time.perf_counter() - start
+            stream_latency["total"].record(elapsed)
+            REQUESTS.inc(endpoint="chat_stream", status=status)
+            REQUEST_SECONDS.observe(elapsed, endpoint="chat_stream")
+            release()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchRequest):
+    """Batch chat endpoint answering many questions in one request
+    
+    Streams one NDJSON line per question, in input order, with `index`,
+    `question` and the ChatResponse fields. Duplicates and questions that
+    map to the same tool call are answered once; the rest run on the
+    shared worker pool, at most BATCH_CONCURRENCY at a time, each taking a
+    pool slot like a /chat request.
+    """
+    limit = int(os.getenv("BATCH_MAX_QUESTIONS", "1000"))
+    if len(request.questions) > limit:
+        raise HTTPException(status_code=413, detail=f"At most {limit} questions per batch")
+    try:
+        release = pool.reserve()
+    except PoolSaturated as e:
+        REQUESTS.inc(endpoint="chat_batch", status="rejected")
+        raise HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"})
+    
+    async def lines():
+        start = time.perf_counter()
+        status = "error"
+        results = None
+        try:
+            with trace() as current:
+                agent = await asyncio.to_thread(get_agent)
+                results = agent.ask_many(request.questions, int(os.getenv("BATCH_CONCURRENCY", "4")), pool)
+                for index, question in enumerate(request.questions):
+                    result = await asyncio.to_thread(next, results)
+                    yield json.dumps({"index": index, "question": question, **result,
+                                      "trace_id": current.trace_id}) + "\n"
+            status = "ok"
+        except Exception as e:
+            ERRORS.inc(source="server")
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            if results is not None:
+                try:
+                    results.close()
+                except ValueError:
+                    # Still running in a worker thread after a client disconnect; it finishes on its own
+                    pass
+            REQUESTS.inc(endpoint="chat_batch", status=status)
+            REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="chat_batch")
+            release()
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/stats")
+async def stats():
+    """Cache hits/misses, router hit rate, latency percentiles and worker pool usage"""
+    return {
+        **(_agent.stats() if _agent is not None else {}),
+        "pool": pool.stats(),
+        "stream": {name: timing.summary() for name, timing in stream_latency.items()},
+        "ingest": _watcher.stats() if _watcher is not None else None,
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Request, tool, cache and error counters and latency histograms in Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up and serving requests"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness: the agent and database are built and can answer questions"""
+    if _agent is not None:
+        return {"status": "ready"}
+    detail = {"status": "failed", "error": _startup_error} if _startup_error else {"status": "starting"}
+    return JSONResponse(detail, status_code=503)
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    import uvicorn
+    workers = int(os.getenv("WEB_WORKERS", "1"))
+    if workers > 1:
+        # Each worker process serves the published snapshot read-only and
+        # reopens it when setup_database.py --snapshot replaces the file
+        os.environ.setdefault("DB_READ_ONLY", "1")
+        # Workers would contend for one response cache file, so each keeps its own in memory
+        os.environ.setdefault("RESPONSE_CACHE_PATH", "")
+        uvicorn.run("server:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Per-session conversation memory for the cricket chatbot
+Keeps a short window of recent turns plus a compact summary of the players
+and tool results discussed, trimmed to a token budget and evicted LRU
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count at about four characters per token, close enough for budgeting"""
+    return len(text) // 4 + 1
+
+def _clip(text: str, limit: int) -> str:
+    text = ' '.join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + '...'
+
+class Session:
+    """Recent turns and a structured summary of one conversation
+
+    Turns older than the window drop out, but the players and tool
+    results they mentioned stay in the summary.
+    """
+
+    def __init__(self, window: int = 4, max_players: int = 5, max_results: int = 3):
+        self.turns: deque = deque(maxlen=window)
+        self.players: List[Tuple[int, str]] = []
+        self.max_players = max_players
+        self.results: deque = deque(maxlen=max_results)
+        self.last_used = time.monotonic()
+
+    @property
+    def current_player(self) -> Optional[str]:
+        """The most recently discussed player, which pronouns refer to"""
+        return self.players[0][1] if self.players else None
+
+    def add_players(self, players: Iterable[Tuple[int, str]]):
+        # Last mentioned first, so "him" means the latest player
+        for player in reversed(list(dict.fromkeys(players))):
+            if player in self.players:
+                self.players.remove(player)
+            self.players.insert(0, player)
+        del self.players[self.max_players:]
+
+    def summary(self) -> str:
+        lines = []
+        if self.players:
+            lines.append("Players discussed (most recent first): "
+                         + ', '.join(f"{name} (id {player_id})" for player_id, name in self.players))
+        if self.results:
+            lines.append("Recent results: " + '; '.join(f"{tool}: {text}" for tool, text in self.results))
+        return '\n'.join(lines)
+
+class SessionStore:
+    """LRU of sessions keyed by session id, with an idle timeout
+
+    `context()` returns the summary and as many recent turns as fit in
+    `token_budget`, newest first, so the prompt stays bounded however long
+    the conversation runs.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 1800, window: int = 4,
+                 token_budget: int = 800, max_answer_chars: int = 600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.window = window
+        self.token_budget = token_budget
+        self.max_answer_chars = max_answer_chars
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def _get(self, session_id: str, create: bool) -> Optional[Session]:
+        now = time.monotonic()
+        with self._lock:
+            # Oldest sessions sit at the front, so expiry stops at the first live one
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if now - oldest.last_used <= self.ttl:
+                    break
+                self._sessions.popitem(last=False)
+                self.expired += 1
+            session = self._sessions.get(session_id)
+            if session is None:
+                if not create:
+                    return None
+                session = self._sessions[session_id] = Session(self.window)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def current_player(self, session_id: Optional[str]) -> Optional[str]:
+        session = self._get(session_id, create=False) if session_id else None
+        return session.current_player if session else None
+
+    def context(self, session_id: Optional[str]) -> Tuple[str, List[BaseMessage]]:
+        """(summary text, recent turns as messages) within the token budget"""
+        session = self._get(session_id, create=False) if session_id else None
+        if session is None:
+            return "", []
+        with self._lock:
+            summary = session.summary()
+            turns = list(session.turns)
+        budget = self.token_budget - estimate_tokens(summary)
+        messages: List[BaseMessage] = []
+        for question, answer in reversed(turns):
+            cost = estimate_tokens(question) + estimate_tokens(answer)
+            if cost > budget:
+                break
+            budget -= cost
+            messages[:0] = [HumanMessage(content=question), AIMessage(content=answer)]
+        return summary, messages
+
+    def record(self, session_id: Optional[str], question: str, result: Dict,
+               players: Iterable[Tuple[int, str]] = ()):
+        """Add a finished turn and the players it mentioned"""
+        if not session_id:
+            return
+        session = self._get(session_id, create=True)
+        answer = _clip(result.get("answer", ""), self.max_answer_chars)
+        with self._lock:
+            session.turns.append((question, answer))
+            session.add_players(players)
+            if result.get("success") and result.get("tools_used"):
+                session.results.append((', '.join(result["tools_used"]), _clip(answer, 160)))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'evicted': self.evicted,
+                'expired': self.expired,
+            }
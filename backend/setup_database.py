@@ -8,16 +8,19 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database import CricketDatabase
+import argparse
 import json
 
-def setup():
+def setup(json_path=None, stream=False, batch_size=5000, commit_every=None,
+          db_path="cricket_stats.db", snapshot=None, rebuild=False):
     print("🏏 Setting up Cricket Database...")
     
     # Initialize database
-    db = CricketDatabase()
+    db = CricketDatabase(db_path)
     
     # Path to your JSON file (relative to backend directory)
-    json_path = os.path.join(os.path.dirname(__file__), "..", "data", "cricket_data.json")
+    if json_path is None:
+        json_path = os.path.join(os.path.dirname(__file__), "..", "data", "cricket_data.json")
     
     # Check if file exists
     if not os.path.exists(json_path):
@@ -25,23 +28,48 @@ def setup():
         print("Please place your JSON file in the data folder")
         return
     
+    # Start from an empty database instead of loading incrementally
+    if rebuild:
+        db.clear_data()
+        print("🧹 Cleared existing match data")
+    
     # Load data
     print(f"📂 Loading data from {json_path}")
-    db.load_json_data(json_path)
+    if stream:
+        stats = db.load_json_stream(json_path, batch_size=batch_size, commit_every=commit_every)
+    else:
+        stats = db.load_json_data(json_path)
+    if 'new' in stats:
+        print(f"🔁 {stats['new']} new, {stats['replaced']} replaced, {stats['skipped']} unchanged matches")
+    print(f"⏱️  {stats['rows']} rows in {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/sec)")
     
     # Test query
-    result = db.execute_query("SELECT COUNT(*) as count FROM players")
-    player_count = result.iloc[0]['count'] if not result.empty else 0
+    result = db.fetch_one("SELECT COUNT(*) as count FROM players")
+    player_count = result['count'] if result else 0
     
     print(f"✅ Database setup complete!")
     print(f"📊 Loaded {player_count} players")
     
     # Show sample data
-    players = db.execute_query("SELECT * FROM players LIMIT 5")
-    if not players.empty:
+    players = db.fetch_all("SELECT * FROM players LIMIT 5")
+    if players:
         print("\n📋 Sample Players:")
-        for _, player in players.iterrows():
+        for player in players:
             print(f"  - {player['full_name']}")
+    
+    # Swap a fresh copy in for read-only server workers
+    if snapshot:
+        print(f"📸 Published snapshot to {db.publish_snapshot(snapshot)}")
 
 if __name__ == "__main__":
-    setup()
+    parser = argparse.ArgumentParser(description="Load cricket JSON data into the database")
+    parser.add_argument("json_path", nargs="?", help="JSON array or JSON-lines file (default: data/cricket_data.json)")
+    parser.add_argument("--stream", action="store_true", help="Use the streaming batched loader")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per executemany batch when streaming")
+    parser.add_argument("--commit-every", type=int, default=None, help="Commit every N matches when streaming")
+    parser.add_argument("--db", default="cricket_stats.db", help="Database file to load into")
+    parser.add_argument("--snapshot", help="After loading, atomically replace this file with a copy for read-only workers")
+    parser.add_argument("--rebuild", action="store_true", help="Delete all loaded matches before loading")
+    args = parser.parse_args()
+    setup(args.json_path, stream=args.stream, batch_size=args.batch_size, commit_every=args.commit_every,
+          db_path=args.db, snapshot=args.snapshot, rebuild=args.rebuild)
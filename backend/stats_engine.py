@@ -0,0 +1,307 @@
+"""
+In-memory columnar stats engine for leaderboard and aggregate tools
+Holds the performance tables as NumPy column arrays and answers leaderboards
+with bincount group-bys and argpartition top-k instead of SQL GROUP BY/ORDER BY
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Column name -> (SQL expression, dtype) per table; rows are appended in rowid order
+TABLES = {
+    'batting': ('batting_performances', 'id', {
+        'player_id': ('player_id', np.int64),
+        'runs': ('runs_scored', np.int64),
+        'balls': ('balls_faced', np.int64),
+        'fours': ('fours', np.int64),
+        'sixes': ('sixes', np.int64),
+        'strike_rate': ('strike_rate', np.float64),
+        'is_out': ('is_out', np.int64),
+    }),
+    'bowling': ('bowling_performances', 'id', {
+        'player_id': ('player_id', np.int64),
+        'balls': ('balls', np.int64),
+        'runs': ('runs_conceded', np.int64),
+        'wickets': ('wickets', np.int64),
+        'maidens': ('maidens', np.int64),
+        'dots': ('dot_balls', np.int64),
+        'economy': ('economy', np.float64),
+    }),
+    'matches': ('matches', 'rowid', {
+        'total_runs': ('total_runs', np.float64),
+    }),
+}
+
+# Per-player metrics that leaderboards can rank by
+METRICS = {
+    'batting': ('runs', 'average', 'strike_rate', 'fours', 'sixes', 'balls', 'highest', 'count'),
+    'bowling': ('wickets', 'economy', 'runs', 'maidens', 'dots', 'balls', 'count'),
+}
+
+class _Columns:
+    """Append-only column buffers with spare capacity
+
+    Appends write past the published size and then publish a new frame, so
+    readers holding an earlier frame never see a partially written row.
+    """
+
+    def __init__(self, spec: Dict[str, tuple]):
+        self.spec = spec
+        self.buffers = {name: np.empty(0, dtype=dtype) for name, (_, dtype) in spec.items()}
+        self.size = 0
+
+    def append(self, chunk: Dict[str, np.ndarray]):
+        n = len(next(iter(chunk.values())))
+        needed = self.size + n
+        for name, values in chunk.items():
+            buffer = self.buffers[name]
+            if needed > len(buffer):
+                grown = np.empty(max(needed, 2 * len(buffer), 1024), dtype=buffer.dtype)
+                grown[:self.size] = buffer[:self.size]
+                buffer = self.buffers[name] = grown
+            buffer[self.size:needed] = values
+        self.size = needed
+
+    def frame(self) -> Dict[str, np.ndarray]:
+        return {name: buffer[:self.size] for name, buffer in self.buffers.items()}
+
+class StatsEngine:
+    """Columnar copy of the performance tables kept in step with the database
+
+    Rows are loaded once, then only rows past the last loaded rowid are
+    appended whenever the database reports a new data version (ingest in
+    this process calls back immediately; snapshot swaps are noticed on the
+    next query). If rows were deleted or rewritten the engine reloads.
+    Per-player totals are computed with one bincount per column and cached
+    until the next append.
+    """
+
+    def __init__(self, db, chunk_size: int = 100000):
+        self.db = db
+        self.chunk_size = chunk_size
+        self._lock = threading.RLock()
+        self._version = None
+        self._reset()
+
+    def _reset(self):
+        self._columns = {table: _Columns(spec) for table, (_, _, spec) in TABLES.items()}
+        self._frames = {table: columns.frame() for table, columns in self._columns.items()}
+        self._last_rowid = {table: 0 for table in TABLES}
+        self._codes: Dict[int, int] = {}
+        self._player_ids = np.empty(0, dtype=np.int64)
+        self._names: List[str] = []
+        self._totals = {}
+
+    def refresh(self):
+        """Append rows added since the last refresh, or reload if rows were removed"""
+        with self._lock:
+            start = time.perf_counter()
+            conn = self.db.reader()
+            # Read the version first so rows committed after this point trigger another refresh
+            row = conn.execute("SELECT value FROM metadata WHERE key = 'data_version'").fetchone()
+            version = row[0] if row else 0
+            appended = {table: self._append_new(conn, table) for table in TABLES}
+            if any(self._row_count(conn, table) != self._columns[table].size for table in TABLES):
+                logger.info("Stats engine out of step with the database; reloading")
+                self._reset()
+                appended = {table: self._append_new(conn, table) for table in TABLES}
+            self._load_names(conn)
+            self._frames = {table: columns.frame() for table, columns in self._columns.items()}
+            self._totals = {}
+            self._version = version
+            if any(appended.values()):
+                logger.info(f"Stats engine loaded {sum(appended.values())} rows "
+                            f"in {time.perf_counter() - start:.2f}s (data version {version})")
+
+    def _append_new(self, conn, table: str) -> int:
+        name, rowid, spec = TABLES[table]
+        select = ', '.join([rowid] + [column for column, _ in spec.values()])
+        cursor = conn.execute(
+            f"SELECT {select} FROM {name} WHERE {rowid} > ? ORDER BY {rowid}", (self._last_rowid[table],)
+        )
+        loaded = 0
+        while True:
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                return loaded
+            # NULLs become NaN; only match totals keep them, since SQL aggregates skip NULLs there
+            data = np.array([tuple(row) for row in rows], dtype=np.float64)
+            if table != 'matches':
+                data = np.nan_to_num(data, nan=0.0)
+            chunk = {column: data[:, i].astype(dtype) for i, (column, (_, dtype)) in enumerate(spec.items(), start=1)}
+            if 'player_id' in chunk:
+                # Stored as dense player codes so bincount arrays stay small
+                chunk['player_id'] = self._encode(chunk['player_id'])
+            self._columns[table].append(chunk)
+            self._last_rowid[table] = int(data[-1, 0])
+            loaded += len(rows)
+
+    def _encode(self, player_ids: np.ndarray) -> np.ndarray:
+        """Dense codes 0..n-1 for player_ids, assigning new codes in order of first appearance"""
+        unique = np.unique(player_ids)
+        new = [int(pid) for pid in unique if int(pid) not in self._codes]
+        for pid in new:
+            self._codes[pid] = len(self._codes)
+        if new:
+            self._player_ids = np.concatenate([self._player_ids, np.array(new, dtype=np.int64)])
+        lookup = np.array([self._codes[int(pid)] for pid in unique], dtype=np.int64)
+        return lookup[np.searchsorted(unique, player_ids)]
+
+    def _row_count(self, conn, table: str) -> int:
+        return conn.execute(f"SELECT COUNT(*) FROM {TABLES[table][0]}").fetchone()[0]
+
+    def _load_names(self, conn):
+        if len(self._names) == len(self._player_ids):
+            return
+        names = dict(conn.execute("SELECT player_id, full_name FROM players").fetchall())
+        self._names = [names.get(int(pid), str(pid)) for pid in self._player_ids]
+
+    def _ensure_fresh(self):
+        if self._version != self.db.data_version:
+            self.refresh()
+
+    def _player_totals(self, table: str) -> Dict[str, np.ndarray]:
+        """Per-player count, sums and maxima for a table, cached until the next refresh"""
+        totals = self._totals.get(table)
+        if totals is not None:
+            return totals
+        frame = self._frames[table]
+        players = frame['player_id']
+        n = len(self._player_ids)
+        totals = {'count': np.bincount(players, minlength=n)}
+        for column, values in frame.items():
+            if column != 'player_id':
+                totals[column] = np.bincount(players, weights=values, minlength=n)
+        if table == 'batting':
+            highest = np.zeros(n)
+            np.maximum.at(highest, players, frame['runs'])
+            totals['highest'] = highest
+        self._totals[table] = totals
+        return totals
+
+    def _metric(self, table: str, metric: str) -> np.ndarray:
+        totals = self._player_totals(table)
+        count = np.maximum(totals['count'], 1)
+        if table == 'batting':
+            derived = {'average': totals['runs'] / count, 'strike_rate': totals['strike_rate'] / count}
+        else:
+            derived = {'economy': totals['economy'] / count}
+        return derived.get(metric, totals[metric])
+
+    def leaderboard(self, table: str, metric: str, limit: int = 5, min_count: int = 2,
+                    ascending: bool = False) -> List[Dict]:
+        """Top `limit` players by a per-player metric among players with at least `min_count` rows
+
+        Ties are broken by fewer rows, then name, the same ORDER BY as the SQL leaderboards.
+        """
+        if metric not in METRICS[table]:
+            raise ValueError(f"Unknown {table} metric {metric!r}; choose from {', '.join(METRICS[table])}")
+        with self._lock:
+            self._ensure_fresh()
+            return self._leaderboard(table, metric, limit, min_count, ascending)
+
+    def _leaderboard(self, table: str, metric: str, limit: int, min_count: int, ascending: bool) -> List[Dict]:
+        if len(self._player_ids) == 0:
+            return []
+        values = self._metric(table, metric)
+        counts = self._player_totals(table)['count']
+        eligible = np.flatnonzero(counts >= min_count)
+        if len(eligible) == 0:
+            return []
+        keys = values[eligible] if ascending else -values[eligible]
+        if len(eligible) > limit:
+            # Everything tied with the k-th value stays in so the tie-break below is exact
+            kth = np.partition(keys, limit - 1)[limit - 1]
+            eligible, keys = eligible[keys <= kth], keys[keys <= kth]
+        names = np.array([self._names[code] for code in eligible], dtype=object)
+        order = np.lexsort((names, counts[eligible], keys))[:limit]
+        return [self._player_row(table, int(code)) for code in eligible[order]]
+
+    def _player_row(self, table: str, code: int) -> Dict:
+        totals = self._player_totals(table)
+        count = int(totals['count'][code])
+        if table == 'batting':
+            return {
+                'player_id': int(self._player_ids[code]),
+                'player_name': self._names[code],
+                'innings': count,
+                'total_runs': int(totals['runs'][code]),
+                'average': float(totals['runs'][code] / count),
+                'highest_score': int(totals['highest'][code]),
+                'avg_strike_rate': float(totals['strike_rate'][code] / count),
+                'total_fours': int(totals['fours'][code]),
+                'total_sixes': int(totals['sixes'][code]),
+                'total_balls': int(totals['balls'][code]),
+            }
+        return {
+            'player_id': int(self._player_ids[code]),
+            'player_name': self._names[code],
+            'matches': count,
+            'total_wickets': int(totals['wickets'][code]),
+            'total_runs': int(totals['runs'][code]),
+            'economy': float(totals['economy'][code] / count),
+            'total_maidens': int(totals['maidens'][code]),
+            'total_dots': int(totals['dots'][code]),
+            'total_balls': int(totals['balls'][code]),
+        }
+
+    def top_batsmen(self, limit: int = 5) -> List[Dict]:
+        """Same rows, in the same order, as the top_batsmen query: most runs among players with 2+ innings"""
+        return self.leaderboard('batting', 'runs', limit)
+
+    def top_bowlers(self, limit: int = 5) -> List[Dict]:
+        """Same rows, in the same order, as the top_bowlers query: most wickets among players with 2+ matches"""
+        return self.leaderboard('bowling', 'wickets', limit)
+
+    def player(self, table: str, player_id: int) -> Optional[Dict]:
+        """Career totals for one player, or None if they have no rows in the table"""
+        with self._lock:
+            self._ensure_fresh()
+            code = self._codes.get(int(player_id))
+            if code is None or not self._player_totals(table)['count'][code]:
+                return None
+            return self._player_row(table, code)
+
+    def aggregate(self, table: str, column: str, player_ids=None, min_value=None, max_value=None) -> Dict:
+        """Count, sum, mean, min and max of a column, optionally filtered by players and value range"""
+        with self._lock:
+            self._ensure_fresh()
+            frame = self._frames[table]
+            values = frame[column]
+            mask = np.ones(len(values), dtype=bool)
+            if player_ids is not None:
+                codes = [self._codes[int(pid)] for pid in player_ids if int(pid) in self._codes]
+                mask &= np.isin(frame['player_id'], codes)
+            if table == 'matches':
+                mask &= ~np.isnan(values)
+            if min_value is not None:
+                mask &= values >= min_value
+            if max_value is not None:
+                mask &= values <= max_value
+            selected = values[mask]
+            if len(selected) == 0:
+                return {'count': 0, 'sum': 0, 'mean': None, 'min': None, 'max': None}
+            return {
+                'count': int(len(selected)),
+                'sum': float(selected.sum()),
+                'mean': float(selected.mean()),
+                'min': float(selected.min()),
+                'max': float(selected.max()),
+            }
+
+    def match_summary(self) -> Dict:
+        """Same fields as the match_summary query"""
+        with self._lock:
+            stats = self.aggregate('matches', 'total_runs')
+            total = len(self._frames['matches']['total_runs'])
+        return {
+            'total_matches': total,
+            'avg_runs': stats['mean'],
+            'highest_score': stats['max'],
+            'lowest_score': stats['min'],
+        }
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Synthetic match data in the loader's JSON shape
+Generates latestBatting / latestBowling / innings1Balls match objects at
+any scale for benchmarks, optionally with ball-by-ball innings; output is
+streamed, so 10M innings never sit in memory
+"""
+import argparse
+import json
+import random
+from typing import Dict, Iterator
+
+FIRST_NAMES = ["Amit", "Ram", "Sharath", "Shrawan", "Hemant", "Lalit", "Avinash", "Rohit", "Virat", "Ravi"]
+LAST_NAMES = ["Pardeshi", "Charan", "Vadla", "Vutharkar", "Makhija", "Varshney", "Reddy", "Sharma", "Kohli", "Kumar"]
+TEAMS = ["Warriors", "ATX Panthers", "Lagaan", "Alpha Bulls", "Nordic Knights", "Royal Strikers", "Thunder XI"]
+HOW_OUT = ["b", "c", "lbw", "ro", "st", "ctw"]
+# ObjectIds carry their creation time; synthetic matches are an hour apart from here
+BASE_TIME = 1_700_000_000
+# Runs off the bat per legal ball, by phase: powerplay, middle, death
+RUN_WEIGHTS = ([38, 34, 8, 1, 13, 6], [36, 42, 10, 1, 8, 3], [28, 34, 10, 1, 16, 11])
+
+def player_name(player_id: int, seed: int = 7) -> str:
+    """Full name of a synthetic player; unique because the player_id is part of the last name"""
+    first, last = _name_parts(player_id, seed)
+    return f"{first} {last}"
+
+def _name_parts(player_id: int, seed: int):
+    rng = random.Random(seed * 1_000_003 + player_id)
+    return rng.choice(FIRST_NAMES), f"{rng.choice(LAST_NAMES)}{player_id}"
+
+def _overs(balls: int) -> str:
+    return f"{balls // 6}.{balls % 6}"
+
+def generate_innings(rng: random.Random, batting_order, bowlers, team: str, max_overs: int = 20) -> Dict:
+    """Ball-by-ball innings in the innings1Balls shape: summary fields plus a `balls` list"""
+    balls = []
+    striker, non_striker, next_in = 0, 1, 2
+    runs = wickets = legal = 0
+    while legal < max_overs * 6:
+        over = legal // 6
+        phase = 0 if over < 6 else 1 if over < 15 else 2
+        ball = {"over": over, "ball": legal % 6 + 1, "batsmanID": batting_order[striker],
+                "bowlerID": bowlers[over % len(bowlers)]}
+        roll = rng.random()
+        if roll < 0.035:
+            ball.update(runs=0, extras=1, extraType="wd")
+        elif roll < 0.045:
+            ball.update(runs=rng.choice([0, 1, 4]), extras=1, extraType="nb")
+        elif roll < 0.055 + 0.015 * phase:
+            ball.update(runs=0, isWicket=True, howOut=rng.choice(HOW_OUT))
+        else:
+            ball["runs"] = rng.choices([0, 1, 2, 3, 4, 6], weights=RUN_WEIGHTS[phase])[0]
+        balls.append(ball)
+        runs += ball["runs"] + ball.get("extras", 0)
+
+        # Wides and no-balls are the only extras generated, and neither counts toward the over
+        if "extraType" not in ball:
+            legal += 1
+        if ball.get("isWicket"):
+            wickets += 1
+            if next_in == len(batting_order):
+                break
+            striker, next_in = next_in, next_in + 1
+        elif ball["runs"] % 2:
+            striker, non_striker = non_striker, striker
+        if legal % 6 == 0 and "extraType" not in ball:
+            striker, non_striker = non_striker, striker
+
+    return {"runs": runs, "wickets": wickets, "overs": _overs(legal), "teamName": team, "balls": balls}
+
+def generate_match(rng: random.Random, match_no: int, players: int, batters: int = 11,
+                   bowlers: int = 6, seed: int = 7, ball_by_ball: bool = False) -> Dict:
+    """One match object with `batters` batting and `bowlers` bowling entries
+
+    With `ball_by_ball`, both innings get a `balls` list. They are simulated
+    independently of the scorecard entries, which keep their own figures.
+    """
+    lineup = rng.sample(range(1, players + 1), batters + bowlers)
+    batting = {}
+    team_runs = 0
+    for slot, player_id in enumerate(lineup[:batters]):
+        first, last = _name_parts(player_id, seed)
+        # Top order bats longer; most innings are short
+        balls = int(rng.expovariate(1 / max(4, 30 - 2 * slot)))
+        runs = int(balls * rng.uniform(0.6, 2.0))
+        fours, sixes = runs // 9, runs // 25
+        team_runs += runs
+        batting[str(slot)] = {
+            "playerID": player_id, "firstName": first, "lastName": last,
+            "runsScored": runs, "ballsFaced": balls, "fours": fours, "sixers": sixes,
+            "isOut": "1" if rng.random() < 0.7 else "0", "howOut": rng.choice(HOW_OUT),
+            "battingStyle": rng.choice(["RHB", "LHB"]),
+        }
+
+    bowling = {}
+    total_balls = 0
+    for slot, player_id in enumerate(lineup[batters:]):
+        first, last = _name_parts(player_id, seed)
+        balls = rng.choice([6, 12, 18, 24, 24, 24])
+        runs = int(balls * rng.uniform(0.7, 2.0))
+        total_balls += balls
+        bowling[str(slot)] = {
+            "playerID": player_id, "firstName": first, "lastName": last, "matchID": match_no,
+            "overs": _overs(balls), "balls": balls, "runs": runs, "wickets": min(5, int(rng.expovariate(1.0))),
+            "maidens": 1 if rng.random() < 0.05 else 0, "dotBalls": int(balls * rng.uniform(0.2, 0.5)),
+            "wides": rng.randint(0, 2), "noBalls": 1 if rng.random() < 0.1 else 0,
+            "bowlingStyle": rng.choice(["RF", "RM", "OB", "LB", "SLA", "LF"]),
+        }
+
+    match = {
+        "_id": {"$oid": f"{BASE_TIME + match_no * 3600:08x}{match_no:016x}"},
+        "latestBatting": batting,
+        "latestBowling": bowling,
+        "innings1Balls": {"runs": team_runs, "overs": _overs(min(total_balls, 120)), "teamName": rng.choice(TEAMS)},
+    }
+    if ball_by_ball:
+        home, away = rng.sample(TEAMS, 2)
+        # Scorecard batters bat first against the bowlers, then the bowlers and the
+        # top order bat against the lower order
+        second_order = lineup[batters:] + lineup[:max(0, batters - bowlers)]
+        match["innings1Balls"] = generate_innings(rng, lineup[:batters], lineup[batters:], home)
+        match["innings2Balls"] = generate_innings(rng, second_order, lineup[max(0, batters - bowlers):batters], away)
+    return match
+
+def generate_matches(innings: int, players: int = 5000, batters: int = 11, bowlers: int = 6,
+                     seed: int = 7, ball_by_ball: bool = False) -> Iterator[Dict]:
+    """Yield enough matches for `innings` batting innings, deterministically for a given seed"""
+    rng = random.Random(seed)
+    players = max(players, batters + bowlers)
+    for match_no in range(max(1, -(-innings // batters))):
+        yield generate_match(rng, match_no, players, batters, bowlers, seed, ball_by_ball)
+
+def write_matches(path: str, innings: int, fmt: str = "jsonl", **kwargs) -> int:
+    """Write synthetic matches as JSON lines or a JSON array and return the match count"""
+    count = 0
+    with open(path, "w") as f:
+        if fmt == "array":
+            f.write("[\n")
+        for match in generate_matches(innings, **kwargs):
+            if fmt == "array":
+                f.write(",\n" if count else "")
+                f.write(json.dumps(match))
+            else:
+                f.write(json.dumps(match) + "\n")
+            count += 1
+        if fmt == "array":
+            f.write("\n]\n")
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic cricket match JSON")
+    parser.add_argument("output", help="File to write")
+    parser.add_argument("--innings", type=int, default=10000, help="Batting innings to generate")
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--format", choices=["jsonl", "array"], default="jsonl")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--ball-by-ball", action="store_true", help="Add per-ball data for both innings")
+    args = parser.parse_args()
+
+    matches = write_matches(args.output, args.innings, args.format, players=args.players, seed=args.seed,
+                            ball_by_ball=args.ball_by_ball)
+    print(f"Wrote {matches} matches to {args.output}")
+
+if __name__ == "__main__":
+    main()
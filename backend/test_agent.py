@@ -0,0 +1,118 @@
+"""
+Behaviour tests for CricketAgent on the scripted model
+Run from the backend directory: python -m pytest test_agent.py
+"""
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from agent import CricketAgent
+from fake_llm import ScriptedChatModel
+from synthetic_data import player_name
+from worker_pool import BoundedWorkerPool
+
+def _stream(agent, question, session_id=None):
+    async def collect():
+        return [event async for event in agent.astream(question, session_id)]
+    return asyncio.run(collect())
+
+def test_stream_answer_is_the_final_turn_only(cricket_db, monkeypatch):
+    monkeypatch.setenv("ROUTER_ENABLED", "0")
+    llm = ScriptedChatModel(script=[
+        AIMessage(content="Let me look that up.", tool_calls=[
+            {"name": "get_top_performers", "args": {"category": "bowlers", "limit": 3}, "id": "call-1"}
+        ]),
+        AIMessage(content="Here are the top bowlers."),
+    ])
+    agent = CricketAgent(llm=llm)
+
+    events = _stream(agent, "Who are the top bowlers?")
+    kinds = [event["event"] for event in events]
+    assert "tool_start" in kinds and "tool_end" in kinds
+    # The preamble is streamed as it happens, but is not part of the answer
+    assert "Let me look that up." in "".join(e["text"] for e in events if e["event"] == "token")
+    done = events[-1]
+    assert done["event"] == "done"
+    assert done["answer"] == "Here are the top bowlers."
+    assert done["tools_used"] == ["get_top_performers"]
+    assert agent.cache.get("Who are the top bowlers?", cricket_db.data_version)["answer"] == done["answer"]
+
+def _batch_questions():
+    return [f"How many runs has {player_name(pid)} scored?" for pid in range(1, 7)]
+
+def test_batch_jobs_take_shared_pool_slots(cricket_db, monkeypatch):
+    monkeypatch.setenv("ROUTER_ENABLED", "0")
+    monkeypatch.setenv("SCRIPTED_LLM_LATENCY", "0.02")
+    agent = CricketAgent()
+    pool = BoundedWorkerPool(max_workers=2, queue_depth=0)
+    release = pool.reserve()  # the batch request's own slot, as the server takes it
+    try:
+        results = list(agent.ask_many(_batch_questions(), 4, pool))
+        assert all(result["success"] for result in results)
+        assert [result["answer"] for result in results] == [agent.ask(q)["answer"] for q in _batch_questions()]
+        # Only one slot was free, so the batch ran one job at a time instead of its 4
+        assert pool.completed == 6
+        assert pool.rejected > 0
+    finally:
+        release()
+        pool.shutdown()
+
+def test_batch_runs_on_its_own_slot_when_the_pool_is_full(cricket_db, monkeypatch):
+    monkeypatch.setenv("ROUTER_ENABLED", "0")
+    agent = CricketAgent()
+    pool = BoundedWorkerPool(max_workers=1, queue_depth=0)
+    release = pool.reserve()
+    try:
+        results = list(agent.ask_many(_batch_questions(), 4, pool))
+        assert len(results) == 6 and all(result["success"] for result in results)
+        assert pool.completed == 0
+    finally:
+        release()
+        pool.shutdown()
+
+def test_stream_falls_back_to_the_agent_when_the_router_fails(cricket_db, monkeypatch):
+    monkeypatch.setenv("ROUTER_ENABLED", "1")
+    agent = CricketAgent(llm=ScriptedChatModel(script=[AIMessage(content="Answered by the agent.")]))
+    assert agent.router.plan("Who are the top bowlers?") is not None
+
+    def broken(plan):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(agent.router, "execute", broken)
+
+    done = _stream(agent, "Who are the top bowlers?")[-1]
+    assert done["event"] == "done" and done["success"]
+    assert done["answer"] == "Answered by the agent."
+    assert agent.ask("Who are the top bowlers this season?")["answer"] == "Answered by the agent."
+
+def _lookup(name):
+    return AIMessage(content="", tool_calls=[
+        {"name": "get_player_batting_stats", "args": {"player_name": name}, "id": f"call-{name}"}
+    ])
+
+def test_pronoun_questions_bypass_the_response_cache(cricket_db, monkeypatch):
+    monkeypatch.setenv("ROUTER_ENABLED", "0")
+    first, second = player_name(3), player_name(4)
+    agent = CricketAgent(llm=ScriptedChatModel(script=[
+        _lookup(first), AIMessage(content=f"{first} stats."),
+        AIMessage(content=f"{first} follow-up."),
+        _lookup(second), AIMessage(content=f"{second} stats."),
+        AIMessage(content=f"{second} follow-up."),
+    ]))
+    agent.ask(f"How many runs has {first} scored?", "a")
+    assert agent.ask("What is his strike rate?", "a")["answer"] == f"{first} follow-up."
+    agent.ask(f"How many runs has {second} scored?", "b")
+    # Same words, but "his" means another player in this session, so it must not be served from the cache
+    assert agent.ask("What is his strike rate?", "b")["answer"] == f"{second} follow-up."
+    assert agent.cache.get("What is his strike rate?", cricket_db.data_version) is None
+    assert agent.cache.get(f"How many runs has {first} scored?", cricket_db.data_version) is not None
+
+def test_stream_keeps_session_context(cricket_db, monkeypatch):
+    monkeypatch.setenv("ROUTER_ENABLED", "0")
+    name = player_name(5)
+    agent = CricketAgent(llm=ScriptedChatModel(script=[
+        _lookup(name), AIMessage(content=f"{name} stats."), AIMessage(content=f"{name} follow-up."),
+    ]))
+    _stream(agent, f"How many runs has {name} scored?", "a")
+    assert agent.sessions.current_player("a") == name
+    assert _stream(agent, "What is his strike rate?", "a")[-1]["answer"] == f"{name} follow-up."
+    assert agent.cache.get("What is his strike rate?", cricket_db.data_version) is None
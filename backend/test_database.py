@@ -0,0 +1,126 @@
+"""
+Tests for ingest, data versions and aggregates in CricketDatabase
+Run from the backend directory: python -m pytest test_database.py
+"""
+import json
+
+import pytest
+
+from check_query_plans import sample_match
+from database import CricketDatabase
+from synthetic_data import generate_matches, write_matches
+
+ROW_TABLES = ['players', 'batting_performances', 'bowling_performances', 'matches', 'innings', 'deliveries',
+              'innings_phases', 'ingested_matches']
+SUMMARY_TABLES = ['player_batting_summary', 'player_bowling_summary', 'player_phase_batting',
+                  'player_phase_bowling', 'matchups']
+
+@pytest.fixture
+def db(tmp_path):
+    database = CricketDatabase(str(tmp_path / "cricket_stats.db"))
+    yield database
+    database.close()
+
+@pytest.fixture
+def fresh_db(tmp_path):
+    """A second, empty database to compare loads against"""
+    database = CricketDatabase(str(tmp_path / "fresh.db"))
+    yield database
+    database.close()
+
+def _matches(count=20):
+    return list(generate_matches(count * 11, players=30, ball_by_ball=True))[:count]
+
+def _write_lines(path, matches, mode="w"):
+    with open(path, mode) as f:
+        for match in matches:
+            f.write(json.dumps(match) + "\n")
+
+def _row_counts(db):
+    return {table: db.fetch_all(f"SELECT COUNT(*) AS n FROM {table}")[0]["n"] for table in ROW_TABLES}
+
+def _aggregates(db):
+    """Every career summary row, with float sums rounded so summation order does not matter"""
+    return {table: sorted(tuple(round(v, 6) if isinstance(v, float) else v for v in tuple(row))
+                          for row in db.fetch_all(f"SELECT * FROM {table}"))
+            for table in SUMMARY_TABLES}
+
+def test_data_version_changes_only_after_commit(db):
+    before = db.data_version
+    seen = []
+    db.add_listener(seen.append)
+    with db.transaction() as cursor:
+        db._bump_data_version(cursor)
+        assert db.data_version == before
+    assert db.data_version == before + 1
+    assert seen == [before + 1]
+
+def test_rolled_back_bump_is_not_published(db):
+    before = db.data_version
+    with pytest.raises(RuntimeError):
+        with db.transaction() as cursor:
+            db._bump_data_version(cursor)
+            raise RuntimeError("ingest failed")
+    assert db.data_version == before
+    db.process_match_data(sample_match(0))
+    assert db.data_version == before + 1 == db._read_data_version()
+
+def test_reingesting_the_same_file_is_a_no_op(db, tmp_path):
+    feed = str(tmp_path / "matches.json")
+    write_matches(feed, 200, fmt="array", players=30, ball_by_ball=True)
+    first = db.load_json_stream(feed)
+    counts, aggregates, version = _row_counts(db), _aggregates(db), db.data_version
+
+    again = db.load_json_stream(feed)
+    assert again['new'] == again['replaced'] == 0
+    assert again['skipped'] == first['new']
+    assert (_row_counts(db), _aggregates(db)) == (counts, aggregates)
+    assert db.data_version == version
+
+def test_replaced_match_matches_a_fresh_load(db, fresh_db, tmp_path):
+    matches = _matches()
+    _write_lines(tmp_path / "old.jsonl", matches)
+    db.load_json_stream(str(tmp_path / "old.jsonl"))
+
+    corrected = json.loads(json.dumps(matches[3]))
+    batter = corrected["latestBatting"]["0"]
+    batter["runsScored"] += 50
+    batter["ballsFaced"] += 20
+    matches[3] = corrected
+    _write_lines(tmp_path / "corrected.jsonl", [corrected])
+    assert db.load_json_stream(str(tmp_path / "corrected.jsonl"))['replaced'] == 1
+
+    _write_lines(tmp_path / "all.jsonl", matches)
+    fresh_db.load_json_stream(str(tmp_path / "all.jsonl"))
+    assert _row_counts(db) == _row_counts(fresh_db)
+    assert _aggregates(db) == _aggregates(fresh_db)
+
+@pytest.mark.parametrize("fmt, commit_every, batch_size", [
+    ("jsonl", None, 5000),
+    ("jsonl", 3, 50),
+    ("array", 7, 5000),
+])
+def test_load_modes_write_the_same_rows(db, fresh_db, tmp_path, fmt, commit_every, batch_size):
+    write_matches(str(tmp_path / "reference.json"), 200, fmt="array", players=30, ball_by_ball=True)
+    fresh_db.load_json_stream(str(tmp_path / "reference.json"))
+
+    feed = str(tmp_path / f"matches.{fmt}")
+    write_matches(feed, 200, fmt=fmt, players=30, ball_by_ball=True)
+    db.load_json_stream(feed, batch_size=batch_size, commit_every=commit_every)
+    assert _row_counts(db) == _row_counts(fresh_db)
+    assert _aggregates(db) == _aggregates(fresh_db)
+
+def test_appended_feed_resumes_from_the_saved_offset(db, fresh_db, tmp_path):
+    matches = _matches()
+    feed = tmp_path / "feed.jsonl"
+    _write_lines(feed, matches[:12])
+    assert db.load_json_stream(str(feed))['new'] == 12
+
+    _write_lines(feed, matches[12:], mode="a")
+    resumed = db.load_json_stream(str(feed))
+    # Only the appended lines are read; the first 12 are not even re-checked
+    assert (resumed['new'], resumed['replaced'], resumed['skipped']) == (8, 0, 0)
+
+    fresh_db.load_json_stream(str(feed))
+    assert _row_counts(db) == _row_counts(fresh_db)
+    assert _aggregates(db) == _aggregates(fresh_db)
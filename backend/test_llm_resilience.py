@@ -0,0 +1,54 @@
+"""
+Tests for the LLM resilience wrapper's circuit breaker and deadlines
+Run from the backend directory: python -m pytest test_llm_resilience.py
+"""
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from fake_llm import ScriptedChatModel
+from llm_resilience import CircuitOpen, LLMTimeout, resilient
+
+QUESTION = [HumanMessage(content="Who are the top batsmen?")]
+
+def _model(inner, **overrides):
+    model = resilient(inner, backoff=0.01, **overrides)
+    model.state.breaker.failure_threshold = 1
+    model.state.breaker.reset_timeout = 0.05
+    return model
+
+def _open_breaker(model):
+    model.state.breaker.record_failure()
+    assert model.state.breaker.state == 'open'
+    with pytest.raises(CircuitOpen):
+        model.invoke(QUESTION)
+    time.sleep(0.06)
+
+def test_abandoned_half_open_stream_releases_probe():
+    model = _model(ScriptedChatModel(script=[AIMessage(content="one two three four")]))
+    _open_breaker(model)
+
+    stream = model.stream(QUESTION)
+    next(stream)
+    assert model.state.breaker.state == 'half_open'
+    stream.close()
+
+    # The next call probes instead of being rejected forever, and its success closes the breaker
+    assert model.invoke(QUESTION).content == "one two three four"
+    assert model.state.breaker.state == 'closed'
+
+def test_failed_probe_reopens_breaker():
+    model = _model(ScriptedChatModel(script=[AIMessage(content="ok")], error_rate=1.0), max_retries=0)
+    _open_breaker(model)
+    with pytest.raises(Exception):
+        model.invoke(QUESTION)
+    assert model.state.breaker.state == 'open'
+
+def test_slow_call_is_bounded_by_deadline():
+    model = _model(ScriptedChatModel(script=[AIMessage(content="late")], latency=2.0),
+                   attempt_timeout=0.1, timeout=0.3, max_retries=1)
+    start = time.monotonic()
+    with pytest.raises(LLMTimeout):
+        model.invoke(QUESTION)
+    assert time.monotonic() - start < 1.0
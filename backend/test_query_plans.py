@@ -0,0 +1,14 @@
+"""
+Query plan regression test for every registered tool statement
+Run from the backend directory: python -m pytest test_query_plans.py
+"""
+from check_query_plans import check_plans, plan_regressions
+
+def test_no_query_plan_regressions(cricket_db):
+    problems = {name: scans for name, scans in check_plans().items() if scans}
+    assert problems == {}
+
+def test_full_index_scan_is_flagged(cricket_db):
+    conn = cricket_db.reader()
+    query = "SELECT player_name FROM player_batting_summary ORDER BY total_runs DESC LIMIT 5"
+    assert plan_regressions(conn, query, ()) != []
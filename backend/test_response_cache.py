@@ -0,0 +1,81 @@
+"""
+Tests for ResponseCache paraphrase matching, expiry and persistence
+Run from the backend directory: python -m pytest test_response_cache.py
+"""
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+ANSWER = {"answer": "42 runs", "tools_used": ["get_player_batting_stats"], "success": True}
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable time.time for the cache module"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    return now
+
+@pytest.fixture
+def index(cricket_db):
+    from cricket_tools import get_player_index
+    return get_player_index()
+
+def test_paraphrase_of_the_same_player_hits(index):
+    cache = ResponseCache(index, similarity_threshold=0.3)
+    cache.put("How many runs has Amit Pardeshi scored?", 1, ANSWER)
+    assert cache.get("runs scored by amit pardeshi", 1) == ANSWER
+    assert cache.stats()["similar_hits"] == 1
+
+@pytest.mark.parametrize("cached, asked", [
+    # Full names resolve to different player ids
+    ("How many runs has Amit Pardeshi scored?", "How many runs has Ram Charan scored?"),
+    # Bare surnames are not resolved, but are still names
+    ("Pardeshi runs", "Charan runs"),
+    ("top 5 batsmen", "top 5 bowlers"),
+    ("top 5 batsmen", "top 10 batsmen"),
+])
+def test_paraphrase_must_share_players_numbers_and_stats(index, cached, asked):
+    cache = ResponseCache(index, similarity_threshold=0.3)
+    cache.put(cached, 1, ANSWER)
+    assert cache.get(asked, 1) is None
+
+def test_data_version_is_part_of_the_key(index):
+    cache = ResponseCache(index, similarity_threshold=0.3)
+    cache.put("top 5 batsmen", 1, ANSWER)
+    assert cache.get("top 5 batsmen", 2) is None
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResponseCache(ttl=60, similarity_threshold=0.3)
+    cache.put("top 5 batsmen", 1, ANSWER)
+    clock[0] += 59
+    assert cache.get("Top 5 batsmen?", 1) == ANSWER
+    clock[0] += 2
+    assert cache.get("top 5 batsmen", 1) is None
+    # An expired entry is not served as a paraphrase either
+    assert cache.get("show the top 5 batsmen", 1) is None
+
+def test_lru_bound(clock):
+    cache = ResponseCache(max_entries=2)
+    for question in ("top 5 batsmen", "top 5 bowlers", "top 10 batsmen"):
+        clock[0] += 1
+        cache.put(question, 1, ANSWER)
+    assert cache.get("top 5 batsmen", 1) is None
+    assert cache.get("top 10 batsmen", 1) == ANSWER
+    assert cache.stats()["evictions"] == 1
+
+def test_file_cache_survives_a_restart(tmp_path, clock):
+    path = str(tmp_path / "response_cache.db")
+    ResponseCache(path=path).put("top 5 batsmen", 1, ANSWER)
+
+    restarted = ResponseCache(path=path, ttl=60)
+    assert restarted.get("top 5 batsmen", 1) == ANSWER
+    assert restarted.get("top 5 batsmen", 2) is None
+
+    # Entries for older data are dropped from the file on the next write
+    restarted.put("top 5 bowlers", 2, ANSWER)
+    assert ResponseCache(path=path).get("top 5 batsmen", 1) is None
+
+    # The TTL applies to persisted entries too
+    clock[0] += 61
+    assert ResponseCache(path=path, ttl=60).get("top 5 bowlers", 2) is None
@@ -0,0 +1,46 @@
+"""
+Tests for the fast-path intent router
+Run from the backend directory: python -m pytest test_router.py
+"""
+import pytest
+
+from router import IntentRouter, RoutePlan
+
+@pytest.fixture
+def router(cricket_db):
+    from cricket_tools import get_player_index, get_tools
+    return IntentRouter({tool.name: tool.func for tool in get_tools()}, get_player_index())
+
+def test_named_player_wins_over_pronoun(router):
+    plan = router.plan("how is Ram Charan doing with his batting", default_player="Amit Pardeshi")
+    assert plan == RoutePlan('get_player_batting_stats', ('Ram Charan',))
+
+def test_pronoun_uses_default_player(router):
+    plan = router.plan("and how is his bowling?", default_player="Amit Pardeshi")
+    assert plan == RoutePlan('get_player_bowling_stats', ('Amit Pardeshi',))
+
+def test_pronoun_without_default_player_goes_to_agent(router):
+    assert router.plan("how is his bowling?") is None
+
+@pytest.mark.parametrize("question", [
+    "top 5 batsmen by average",
+    "who has the best bowling economy",
+    "best batsmen by strike rate",
+    "top bowlers by dot balls",
+    "which team has the best batting",
+    "Show the top batsmen and Ram Charan's recent form",
+    "How many runs has Ram Charan scored and who are the top bowlers?",
+    "top 3 batsmen in the powerplay",
+    "best bowlers at the death",
+])
+def test_leaderboards_with_another_intent_go_to_agent(router, question):
+    assert router.plan(question) is None
+
+@pytest.mark.parametrize("question, plan", [
+    ("Who are the top 5 batsmen?", RoutePlan('get_top_performers', ('batsmen', 5))),
+    ("most wickets", RoutePlan('get_top_performers', ('bowlers', 5))),
+    ("Give me a match summary", RoutePlan('get_match_summary', ())),
+    ("what is the average team score", RoutePlan('get_match_summary', ())),
+])
+def test_plain_leaderboards_and_summary_are_routed(router, question, plan):
+    assert router.plan(question) == plan
@@ -0,0 +1,75 @@
+"""
+Tests for SessionStore eviction and context trimming
+Run from the backend directory: python -m pytest test_session_memory.py
+"""
+import pytest
+
+import session_memory
+from session_memory import SessionStore, estimate_tokens
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable time.monotonic for the session module"""
+    now = [1000.0]
+    monkeypatch.setattr(session_memory.time, "monotonic", lambda: now[0])
+    return now
+
+def _turn(store, session_id, question, answer="ok", players=()):
+    store.record(session_id, question, {"answer": answer, "tools_used": ["get_player_batting_stats"],
+                                        "success": True}, players)
+
+def test_least_recently_used_session_is_evicted(clock):
+    store = SessionStore(max_sessions=2)
+    _turn(store, "a", "first", players=[(1, "Ram Kohli1")])
+    _turn(store, "b", "second", players=[(2, "Ram Kohli2")])
+    # Reading "a" makes "b" the least recently used
+    assert store.current_player("a") == "Ram Kohli1"
+    _turn(store, "c", "third")
+    assert store.current_player("b") is None
+    assert store.current_player("a") == "Ram Kohli1"
+    assert store.stats()["evicted"] == 1
+
+def test_idle_sessions_expire(clock):
+    store = SessionStore(ttl=60)
+    _turn(store, "a", "first", players=[(1, "Ram Kohli1")])
+    clock[0] += 30
+    _turn(store, "b", "second", players=[(2, "Ram Kohli2")])
+    clock[0] += 45
+    assert store.current_player("a") is None
+    assert store.current_player("b") == "Ram Kohli2"
+    assert store.stats() == {'sessions': 1, 'max_sessions': 10000, 'evicted': 0, 'expired': 1}
+
+def test_window_keeps_recent_turns_and_older_players():
+    store = SessionStore(window=2)
+    for pid in range(1, 4):
+        _turn(store, "a", f"question {pid}", players=[(pid, f"Ram Kohli{pid}")])
+    summary, messages = store.context("a")
+    assert [m.content for m in messages] == ["question 2", "ok", "question 3", "ok"]
+    # Turns that left the window still name their players, most recent first
+    assert "Ram Kohli3 (id 3), Ram Kohli2 (id 2), Ram Kohli1 (id 1)" in summary
+
+def test_context_fits_the_token_budget():
+    answer = "x" * 200
+    summary_store = SessionStore()
+    for i in range(3):
+        _turn(summary_store, "a", f"question {i}", answer)
+    summary, _ = summary_store.context("a")
+    turn_cost = estimate_tokens("question 0") + estimate_tokens(answer)
+
+    # Room for the summary and two turns, but not three
+    store = SessionStore(token_budget=estimate_tokens(summary) + 2 * turn_cost + turn_cost // 2)
+    for i in range(3):
+        _turn(store, "a", f"question {i}", answer)
+    _, messages = store.context("a")
+    assert [m.content for m in messages[::2]] == ["question 1", "question 2"]
+
+    # A turn too long for the budget is left out whole, not cut
+    tiny = SessionStore(token_budget=turn_cost // 2)
+    _turn(tiny, "a", "question", answer)
+    assert tiny.context("a")[1] == []
+
+def test_answers_are_clipped_in_memory():
+    store = SessionStore(max_answer_chars=50)
+    _turn(store, "a", "question", "word " * 40)
+    _, messages = store.context("a")
+    assert len(messages[1].content) <= 50 and messages[1].content.endswith("...")
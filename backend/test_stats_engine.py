@@ -0,0 +1,22 @@
+"""
+Tests that the in-memory stats engine matches the SQL leaderboards
+Run from the backend directory: python -m pytest test_stats_engine.py
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from stats_engine import StatsEngine
+
+@pytest.mark.parametrize("query, method, count_column", [
+    ("top_batsmen", "top_batsmen", "innings"),
+    ("top_bowlers", "top_bowlers", "matches"),
+])
+def test_leaderboards_match_sql_including_ties(cricket_db, query, method, count_column):
+    from cricket_tools import get_queries
+
+    engine = StatsEngine(cricket_db)
+    engine.refresh()
+    limit = 25
+    sql = [row["player_name"] for row in get_queries().run(query, (limit,))]
+    assert [row["player_name"] for row in getattr(engine, method)(limit)] == sql
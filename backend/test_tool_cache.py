@@ -0,0 +1,32 @@
+"""
+Tests for the tool result cache
+Run from the backend directory: python -m pytest test_tool_cache.py
+"""
+from tool_cache import ToolCache
+
+def test_output_computed_across_an_ingest_is_not_stored():
+    data = {'version': 1}
+    cache = ToolCache(version=lambda: data['version'])
+    calls = []
+
+    @cache.memoize('get_top_performers', key=lambda category: (category,))
+    def top(category):
+        calls.append(category)
+        if len(calls) == 1:
+            # An ingest commits while the first call is still computing
+            data['version'] = 2
+        return f"{category} v{len(calls)}"
+
+    assert top('batsmen') == "batsmen v1"
+    assert top('batsmen') == "batsmen v2"
+    assert top('batsmen') == "batsmen v2"
+    assert len(calls) == 2
+
+def test_version_change_invalidates():
+    data = {'version': 1}
+    cache = ToolCache(version=lambda: data['version'])
+    cache.put('t', ('k',), 'old')
+    assert cache.get('t', ('k',)) == (True, 'old')
+    data['version'] = 2
+    assert cache.get('t', ('k',)) == (False, None)
+    assert cache.invalidations == 1
@@ -0,0 +1,131 @@
+"""
+Memoization for the cricket tools
+Tool outputs are cached per tool on canonical arguments (resolved player ids,
+normalized categories) and the database's data version, with LRU eviction and
+a TTL per tool
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from metrics import TOOL_CACHE_LOOKUPS
+
+def parse_ttls(spec: Optional[str]) -> Dict[str, float]:
+    """'get_match_summary=600,get_top_performers=120' -> {tool: seconds}"""
+    ttls = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            tool, seconds = item.split('=', 1)
+            ttls[tool.strip()] = float(seconds)
+    return ttls
+
+class _ToolEntries:
+    """LRU of one tool's outputs plus its hit and miss counts"""
+
+    def __init__(self):
+        self.entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+class ToolCache:
+    """Per-tool LRU caches of tool outputs, dropped whenever the data version changes
+
+    `version` returns the current data version; every ingest bumps it, so a
+    change clears all entries before the next lookup. TTLs additionally
+    bound how long an entry is served, per tool with a default.
+    """
+
+    def __init__(self, version: Callable[[], int], max_entries: int = 256, default_ttl: float = 300,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.version = version
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self._tools: Dict[str, _ToolEntries] = {}
+        self._lock = threading.Lock()
+        self._version = None
+        self.invalidations = 0
+
+    def memoize(self, tool: str, key: Callable[..., tuple]):
+        """Decorator caching `tool`'s output under `key(*args, **kwargs)`"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if self.max_entries <= 0:
+                    return fn(*args, **kwargs)
+                cache_key = key(*args, **kwargs)
+                # The output belongs to the data version seen before computing it
+                version = self.version()
+                found, value = self.get(tool, cache_key, version)
+                if found:
+                    return value
+                value = fn(*args, **kwargs)
+                self.put(tool, cache_key, value, version)
+                return value
+            wrapper.uncached = fn
+            return wrapper
+        return decorator
+
+    def _entries(self, tool: str, version: int) -> _ToolEntries:
+        # Called with the lock held
+        if version != self._version:
+            if self._version is not None:
+                self.invalidations += 1
+            for entries in self._tools.values():
+                entries.entries.clear()
+            self._version = version
+        return self._tools.setdefault(tool, _ToolEntries())
+
+    def get(self, tool: str, key: tuple, version: Optional[int] = None):
+        """(True, output) on a fresh hit, else (False, None)"""
+        if version is None:
+            version = self.version()
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries(tool, version)
+            entry = entries.entries.get(key)
+            if entry is not None and entry[0] > now:
+                entries.entries.move_to_end(key)
+                entries.hits += 1
+                TOOL_CACHE_LOOKUPS.inc(tool=tool, result="hit")
+                return True, entry[1]
+            if entry is not None:
+                del entries.entries[key]
+            entries.misses += 1
+        TOOL_CACHE_LOOKUPS.inc(tool=tool, result="miss")
+        return False, None
+
+    def put(self, tool: str, key: tuple, value, version: Optional[int] = None):
+        """Store an output computed against `version`; dropped if the data has moved on since"""
+        if version is None:
+            version = self.version()
+        expires = time.monotonic() + self.ttls.get(tool, self.default_ttl)
+        with self._lock:
+            if version != self.version():
+                return
+            entries = self._entries(tool, version)
+            entries.entries[key] = (expires, value)
+            entries.entries.move_to_end(key)
+            while len(entries.entries) > self.max_entries:
+                entries.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            for entries in self._tools.values():
+                entries.entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            tools = {}
+            for tool, entries in sorted(self._tools.items()):
+                lookups = entries.hits + entries.misses
+                tools[tool] = {
+                    'hits': entries.hits,
+                    'misses': entries.misses,
+                    'hit_ratio': entries.hits / lookups if lookups else 0.0,
+                    'entries': len(entries.entries),
+                    'ttl': self.ttls.get(tool, self.default_ttl),
+                }
+            return {'max_entries': self.max_entries, 'invalidations': self.invalidations, 'tools': tools}
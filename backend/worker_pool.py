@@ -0,0 +1,86 @@
+"""
+Bounded worker pool for running blocking agent work off the event loop
+Rejects new work immediately once the workers and queue are full
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the queue is full"""
+
+class BoundedWorkerPool:
+    """Thread pool with a hard cap on running plus queued jobs"""
+
+    def __init__(self, max_workers: int = 8, queue_depth: int = 32):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-worker")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_depth
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise PoolSaturated(f"{self._in_flight} requests in flight (limit {self.capacity})")
+            self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run a blocking call on the pool, raising PoolSaturated if it is full"""
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            # Carry the caller's context (request trace) into the worker thread
+            call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+            return await loop.run_in_executor(self._executor, call)
+        finally:
+            self._release()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue a blocking call from a worker thread, such as one job of a batch
+
+        Takes a slot like `run`, freed when the call finishes; raises PoolSaturated if the pool is full.
+        """
+        self._acquire()
+        try:
+            job = self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        job.add_done_callback(lambda _: self._release())
+        return job
+
+    def reserve(self) -> Callable[[], None]:
+        """Take a slot for work that runs on the event loop, such as a streamed response
+
+        Raises PoolSaturated if the pool is full; call the returned function to free the slot.
+        """
+        self._acquire()
+        return self._release
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'workers': self.max_workers,
+            'queue_depth': self.queue_depth,
+            'in_flight': self._in_flight,
+            'completed': self.completed,
+            'rejected': self.rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 import json
+import uuid
 from datetime import datetime
 
 # Page configuration
@@ -42,11 +43,26 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def stream_events(response):
+    """Parse a Server-Sent Events response into (event, data) pairs"""
+    event, data = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line and data:
+            yield event, json.loads("\n".join(data))
+            event, data = None, []
+
 # Header
 st.markdown("<h1>⚡ CRICKET ANALYTICS AI</h1>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; color: white;'>Powered by Advanced AI • Real-time Stats</p>", unsafe_allow_html=True)
 
 # Initialize session
+if 'session_id' not in st.session_state:
+    # Lets the backend resolve follow-ups like "and his bowling?"
+    st.session_state.session_id = uuid.uuid4().hex
 if 'messages' not in st.session_state:
     st.session_state.messages = []
     # Welcome message
@@ -69,27 +85,47 @@ if prompt := st.chat_input("Ask about cricket statistics..."):
     
     # Get AI response
     with st.chat_message("assistant", avatar="🏏"):
-        with st.spinner("Analyzing cricket data..."):
-            try:
-                response = requests.post(
-                    "http://localhost:8000/chat",
-                    json={"question": prompt},
-                    timeout=10
-                )
-                
+        status = st.empty()
+        placeholder = st.empty()
+        status.caption("Analyzing cricket data...")
+        try:
+            # Connect timeout, then a generous read timeout between streamed events
+            with requests.post(
+                "http://localhost:8000/chat/stream",
+                json={"question": prompt, "session_id": st.session_state.session_id},
+                stream=True,
+                timeout=(5, 120)
+            ) as response:
                 if response.status_code == 200:
-                    data = response.json()
-                    st.write(data["answer"])
+                    answer = ""
+                    for event, data in stream_events(response):
+                        if event == "tool_start":
+                            status.caption(f"Running {data['tool']}...")
+                        elif event == "token":
+                            answer += data["text"]
+                            placeholder.markdown(answer + "▌")
+                        elif event == "done":
+                            answer = data["answer"]
+                        elif event == "error":
+                            answer = f"Error: {data['detail']}"
+                    status.empty()
+                    placeholder.markdown(answer)
                     st.session_state.messages.append({
                         "role": "assistant",
-                        "content": data["answer"]
+                        "content": answer
                     })
+                elif response.status_code == 503:
+                    status.empty()
+                    st.error("Server is busy. Please try again in a moment.")
                 else:
+                    status.empty()
                     st.error("Failed to get response. Please try again.")
-            except requests.exceptions.ConnectionError:
-                st.error("Cannot connect to backend. Please ensure server is running.")
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+        except requests.exceptions.ConnectionError:
+            status.empty()
+            st.error("Cannot connect to backend. Please ensure server is running.")
+        except Exception as e:
+            status.empty()
+            st.error(f"Error: {str(e)}")
 
 # Minimal footer
 st.markdown("---")